@@ -36,6 +36,18 @@ contract BasisStrategy is
         int256 unitAccumulativeFunding;
     }
 
+    // struct to hold a read of the MCDEX margin account of the strategy
+    struct MarginAccount {
+        int256 cash;
+        int256 position;
+        int256 availableMargin;
+        int256 margin;
+        int256 settleableMargin;
+        bool isInitialMarginSafe;
+        bool isMaintenanceMarginSafe;
+        bool isMarginSafe;
+    }
+
     // MCDEX Liquidity and Perpetual Pool interface address
     IMCLP public mcLiquidityPool;
     // Uniswap v3 pair pool interface address
@@ -83,6 +95,15 @@ contract BasisStrategy is
     bool isV2;
     // bool for whether to turn on slippage control
     bool isSlippageControl;
+    // MCDEX oracle of the perpetual, cleared when the liquidity pool or perpetual index change
+    IOracle public oracle;
+    // fee tier of the uniswap v3 pool, 0 for uniswap v2 style routers
+    uint24 public uniswapFee;
+    // whether the fee tier and router allowances are set up for the current pool and version
+    bool isSwapConfigured;
+    // margin to short notional ratio (1e18 = 1x) a withdrawal paid from the margin buffer has to
+    // keep, 0 disables paying withdrawals from the buffer
+    uint256 public minMarginRatio;
     // modifier to check that the caller is governance
     modifier onlyGovernance() {
         require(msg.sender == governance, "!governance");
@@ -163,6 +184,8 @@ contract BasisStrategy is
             .getLiquidityPoolInfo();
         DECIMAL_SHIFT = int256(1e18 / 10**(stores[0]));
         isSlippageControl = true;
+        _refreshOracle();
+        _configureSwaps();
     }
 
     /**********
@@ -220,6 +243,7 @@ contract BasisStrategy is
     event LmClaimerSet(address indexed oldAddress, address newAddress);
     event McbSet(address indexed oldAddress, address newAddress);
     event SlippageControlSet(bool oldState, bool newState);
+    event MinMarginRatioSet(uint256 oldRatio, uint256 newRatio);
 
     /***********
      * SETTERS *
@@ -233,6 +257,8 @@ contract BasisStrategy is
     function setLiquidityPool(address _mcLiquidityPool) external onlyOwner {
         emit LiquidityPoolSet(address(mcLiquidityPool), _mcLiquidityPool);
         mcLiquidityPool = IMCLP(_mcLiquidityPool);
+        // the oracle is read from the new pool on next use
+        delete oracle;
     }
 
     /**
@@ -253,6 +279,7 @@ contract BasisStrategy is
     function setUniswapPool(address _pool) external onlyOwner {
         emit UniswapPoolSet(pool, _pool);
         pool = _pool;
+        _configureSwaps();
     }
 
     /**
@@ -296,6 +323,8 @@ contract BasisStrategy is
     function setPerpetualIndex(uint256 _perpetualIndex) external onlyOwner {
         emit PerpIndexSet(perpetualIndex, _perpetualIndex);
         perpetualIndex = _perpetualIndex;
+        // the oracle of the new perpetual is read on next use
+        delete oracle;
     }
 
     /**
@@ -361,6 +390,20 @@ contract BasisStrategy is
         keeper = _keeper;
     }
 
+    /**
+     * @notice  setter for the margin ratio withdrawals paid from the margin buffer have to keep
+     * @param   _minMarginRatio margin to short notional ratio scaled by 1e18, 0 to disable
+     * @dev     only callable by owner
+     */
+    function setMinMarginRatio(uint256 _minMarginRatio) external onlyOwner {
+        require(
+            _minMarginRatio == 0 || _minMarginRatio >= 1e18,
+            "!_minMarginRatio"
+        );
+        emit MinMarginRatioSet(minMarginRatio, _minMarginRatio);
+        minMarginRatio = _minMarginRatio;
+    }
+
     /**
      * @notice set router version for network
      * @param _isV2 bool to set the version of rooter
@@ -369,6 +412,7 @@ contract BasisStrategy is
     function setVersion(bool _isV2) external onlyOwner {
         emit VersionSet(isV2, _isV2);
         isV2 = _isV2;
+        _configureSwaps();
     }
 
     /**
@@ -400,23 +444,37 @@ contract BasisStrategy is
      * @dev     only callable by the owner, governance or keeper
      */
     function harvest() public onlyKeeper {
+        _harvest();
+    }
+
+    /**
+     * @notice  harvest implementation, see harvest()
+     * @return  price the oracle price used to open the perpetual position, 0 if no funds
+     *          were activated and the price was not read
+     */
+    function _harvest() internal returns (int256 price) {
         uint256 shortPosition;
         uint256 longPosition;
         uint256 bufferPosition;
-        isUnwind = false;
 
         mcLiquidityPool.forceToSyncState();
+        // the funding state is synced, the accumulative funding does not change for the
+        // rest of the transaction
+        (, , int256 unitAccumulativeFunding) = _getPerpetualInfo();
         // determine the profit since the last harvest and remove profits from the margin
         // account to be redistributed
         uint256 amount;
         bool loss;
         if (positions.unitAccumulativeFunding != 0) {
-            (amount, loss) = _determineFee();
+            (amount, loss) = _determineFee(unitAccumulativeFunding);
         }
         // update the vault with profits/losses accrued and receive deposits
         // vault.update(amount, loss) returns the total fund that will be deposit
         // strategy use the funds inside the vault, if loss no fees are taken
+        // queued vault withdrawals are settled in the update, while unwound they are paid from
+        // the idle want of the strategy so the unwind state is only left afterwards
         vault.update(amount, loss);
+        isUnwind = false;
         // combine the funds and check that they are larger than 0
         uint256 toActivate = IERC20(want).balanceOf(address(this));
 
@@ -428,11 +486,16 @@ contract BasisStrategy is
             // deposit the bufferPosition to the margin account
             _depositToMarginAccount(bufferPosition);
             // open a short perpetual position and store the number of perp contracts
-            positions.perpContracts += _openPerpPosition(shortPosition, true);
+            price = _getPrice();
+            positions.perpContracts += _openPerpPosition(
+                shortPosition,
+                true,
+                price
+            );
         }
         // record incremented positions
         positions.margin = getMargin();
-        positions.unitAccumulativeFunding = getUnitAccumulativeFunding();
+        positions.unitAccumulativeFunding = unitAccumulativeFunding;
         emit Harvest(
             positions.perpContracts,
             IERC20(long).balanceOf(address(this)),
@@ -450,13 +513,18 @@ contract BasisStrategy is
         require(!isUnwind, "unwound");
         isUnwind = true;
         mcLiquidityPool.forceToSyncState();
+        (
+            IMCLP.PerpetualState perpetualState,
+            ,
+            int256 unitAccumulativeFunding
+        ) = _getPerpetualInfo();
         // swap long asset back to want
         _swap(IERC20(long).balanceOf(address(this)), long, want);
         // check if the perpetual is in settlement, if it is then settle it
         // otherwise unwind the fund as normal.
-        if (!_settle()) {
+        if (!_settle(perpetualState)) {
             // close the short position
-            _closeAllPerpPositions();
+            _closeAllPerpPositions(getMarginPositions(), _getPrice());
             // withdraw all cash in the margin account
             mcLiquidityPool.withdraw(
                 perpetualIndex,
@@ -467,7 +535,7 @@ contract BasisStrategy is
         // reset positions
         positions.perpContracts = 0;
         positions.margin = getMargin();
-        positions.unitAccumulativeFunding = getUnitAccumulativeFunding();
+        positions.unitAccumulativeFunding = unitAccumulativeFunding;
         emit StrategyUnwind(IERC20(want).balanceOf(address(this)));
     }
 
@@ -493,20 +561,19 @@ contract BasisStrategy is
      */
     function remargin() public onlyOwner {
         // harvest the funds so the positions are up to date
-        harvest();
+        int256 price = _harvest();
         // ratio of the short in the short and buffer
         int256 K = (((int256(MAX_BPS) - int256(buffer)) / 2) * 1e18) /
             (((int256(MAX_BPS) - int256(buffer)) / 2) + int256(buffer));
-        // get the price of ETH
-        (, address oracleAddress, ) = mcLiquidityPool.getPerpetualInfo(
-            perpetualIndex
-        );
-        IOracle oracle = IOracle(oracleAddress);
-        (int256 price, ) = oracle.priceTWAPLong();
+        // get the price of ETH, unless the harvest already read it
+        if (price == 0) {
+            price = _getPrice();
+        }
+        MarginAccount memory account = _getMarginAccount();
         // calculate amount to unwind
-        int256 unwindAmount = (((price * -getMarginPositions()) -
+        int256 unwindAmount = (((price * -account.position) -
             K *
-            getMargin()) * 1e18) / ((1e18 + K) * price);
+            account.margin) * 1e18) / ((1e18 + K) * price);
         require(unwindAmount != 0, "no changes to margin necessary");
         // check if leverage is to be reduced or increased then act accordingly
         if (unwindAmount > 0) {
@@ -546,9 +613,10 @@ contract BasisStrategy is
             // open a long position with the withdrawn funds
             _swap(uint256(withdrawAmount / DECIMAL_SHIFT), want, long);
         }
-        positions.margin = getMargin();
-        positions.unitAccumulativeFunding = getUnitAccumulativeFunding();
-        positions.perpContracts = getMarginPositions();
+        // the accumulative funding was recorded by the harvest in this transaction
+        account = _getMarginAccount();
+        positions.margin = account.margin;
+        positions.perpContracts = account.position;
         emit Remargined(unwindAmount);
     }
 
@@ -565,62 +633,26 @@ contract BasisStrategy is
         returns (uint256 loss, uint256 withdrawn)
     {
         require(_amount > 0, "withdraw: _amount is 0");
-        uint256 longPositionWant;
-        if (!isUnwind) {
+        MarginAccount memory account;
+        // idle want, such as the funding withdrawn by a harvest that is settling vault
+        // withdrawals, pays out first so matching inflows and outflows are not traded
+        uint256 idle = IERC20(want).balanceOf(address(this));
+        if (!isUnwind && _amount > idle) {
             mcLiquidityPool.forceToSyncState();
-            // remove the buffer from the amount
-            uint256 bufferPosition = (_amount * buffer) / MAX_BPS;
-            // decrement the amount by buffer position
-            uint256 _remAmount = _amount - bufferPosition;
-            // determine the shortPosition
-            uint256 shortPosition = _remAmount / 2;
-            // close the short position
-            int256 positionsClosed = _closePerpPosition(shortPosition);
-            // determine the long position
-            uint256 longPosition = uint256(positionsClosed);
-            // check that there are enough long positions, if there is not then close all longs
-            if (longPosition < IERC20(long).balanceOf(address(this))) {
-                // if for whatever reason there are funds left in long when there shouldnt be then liquidate them
-                if (getMarginPositions() == 0) {
-                    longPosition = IERC20(long).balanceOf(address(this));
-                }
-                // convert the long to want
-                longPositionWant = _swap(longPosition, long, want);
-            } else {
-                // convert the long to want
-                longPositionWant = _swap(
-                    IERC20(long).balanceOf(address(this)),
-                    long,
-                    want
-                );
-            }
-            // check if there is enough margin to cover the buffer and short withdrawal
-            // also make sure there are margin positions, as if there are none you can
-            // withdraw most of the position
-            if (
-                getMargin() >
-                int256(bufferPosition + shortPosition) * DECIMAL_SHIFT &&
-                getMarginPositions() < 0
-            ) {
-                // withdraw the short and buffer from the margin account
+            int256 price = _getPrice();
+            uint256 toUnwind = _amount - idle;
+            account = _getMarginAccount();
+            if (_isBufferWithdrawable(account, toUnwind, price)) {
+                // pay the withdrawal from the excess margin buffer without trading, the
+                // positions are rebalanced by the next remargin
                 mcLiquidityPool.withdraw(
                     perpetualIndex,
                     address(this),
-                    int256(bufferPosition + shortPosition) * DECIMAL_SHIFT
+                    int256(toUnwind) * DECIMAL_SHIFT
                 );
             } else {
-                if (getMarginPositions() < 0) {
-                    _closeAllPerpPositions();
-                }
-                mcLiquidityPool.withdraw(
-                    perpetualIndex,
-                    address(this),
-                    getMargin()
-                );
+                _unwindPositions(toUnwind, price, account.position);
             }
-            withdrawn = longPositionWant + shortPosition + bufferPosition;
-        } else {
-            withdrawn = _amount;
         }
 
         uint256 wantBalance = IERC20(want).balanceOf(address(this));
@@ -636,8 +668,9 @@ contract BasisStrategy is
             withdrawn = _amount;
         }
 
-        positions.perpContracts = getMarginPositions();
-        positions.margin = getMargin();
+        account = _getMarginAccount();
+        positions.perpContracts = account.position;
+        positions.margin = account.margin;
         emit WithdrawStrategy(withdrawn, loss);
     }
 
@@ -710,31 +743,116 @@ contract BasisStrategy is
      * INTERNAL FUNCTIONS *
      **********************/
 
+    /**
+     * @notice  close the perp and long positions backing an amount of want and withdraw it from
+     *          the margin account
+     * @param   _amount          the amount of want to free up
+     * @param   price            the long asset mark price from the MCDEX oracle
+     * @param   _marginPositions the current margin positions of the strategy
+     */
+    function _unwindPositions(
+        uint256 _amount,
+        int256 price,
+        int256 _marginPositions
+    ) internal {
+        // remove the buffer from the amount
+        uint256 bufferPosition = (_amount * buffer) / MAX_BPS;
+        // decrement the amount by buffer position
+        uint256 _remAmount = _amount - bufferPosition;
+        // determine the shortPosition
+        uint256 shortPosition = _remAmount / 2;
+        // close the short position
+        int256 positionsClosed = _closePerpPosition(
+            shortPosition,
+            price,
+            _marginPositions
+        );
+        // determine the long position
+        uint256 longPosition = uint256(positionsClosed);
+        // the swaps below do not touch the margin account, read it once after the close
+        MarginAccount memory account = _getMarginAccount();
+        // check that there are enough long positions, if there is not then close all longs
+        if (longPosition < IERC20(long).balanceOf(address(this))) {
+            // if for whatever reason there are funds left in long when there shouldnt be then liquidate them
+            if (account.position == 0) {
+                longPosition = IERC20(long).balanceOf(address(this));
+            }
+            // convert the long to want
+            _swap(longPosition, long, want);
+        } else {
+            // convert the long to want
+            _swap(IERC20(long).balanceOf(address(this)), long, want);
+        }
+        // check if there is enough margin to cover the buffer and short withdrawal
+        // also make sure there are margin positions, as if there are none you can
+        // withdraw most of the position
+        if (
+            account.margin >
+            int256(bufferPosition + shortPosition) * DECIMAL_SHIFT &&
+            account.position < 0
+        ) {
+            // withdraw the short and buffer from the margin account
+            mcLiquidityPool.withdraw(
+                perpetualIndex,
+                address(this),
+                int256(bufferPosition + shortPosition) * DECIMAL_SHIFT
+            );
+        } else {
+            int256 margin = account.margin;
+            if (account.position < 0) {
+                _closeAllPerpPositions(account.position, price);
+                margin = getMargin();
+            }
+            mcLiquidityPool.withdraw(perpetualIndex, address(this), margin);
+        }
+    }
+
+    /**
+     * @notice  whether a withdrawal can be paid from the margin buffer alone
+     * @param   account the current margin account of the strategy
+     * @param   _amount the amount of want to withdraw
+     * @param   price   the long asset mark price from the MCDEX oracle
+     * @return  true if the margin left covers minMarginRatio of the short notional
+     */
+    function _isBufferWithdrawable(
+        MarginAccount memory account,
+        uint256 _amount,
+        int256 price
+    ) internal view returns (bool) {
+        if (minMarginRatio == 0) {
+            return false;
+        }
+        int256 amount = int256(_amount) * DECIMAL_SHIFT;
+        if (amount > account.availableMargin) {
+            return false;
+        }
+        int256 notional = (-account.position * price) / 1e18;
+        return
+            (account.margin - amount) * 1e18 >= notional * int256(minMarginRatio);
+    }
+
     /**
      * @notice  open the perpetual short position on MCDEX
      * @param   _amount the collateral used to purchase the perpetual short position
+     * @param   price   the long asset mark price from the MCDEX oracle
      * @return  tradeAmount the amount of perpetual contracts opened
      */
-    function _openPerpPosition(uint256 _amount, bool deposit)
-        internal
-        returns (int256 tradeAmount)
-    {
+    function _openPerpPosition(
+        uint256 _amount,
+        bool deposit,
+        int256 price
+    ) internal returns (int256 tradeAmount) {
         if (deposit) {
             // deposit funds to the margin account to enable trading
             _depositToMarginAccount(_amount);
         }
 
-        (, address oracleAddress, ) = mcLiquidityPool.getPerpetualInfo(
-            perpetualIndex
-        );
-        IOracle oracle = IOracle(oracleAddress);
-        // get the long asset mark price from the MCDEX oracle
-        (int256 price, ) = oracle.priceTWAPLong();
         // calculate the number of contracts (*1e12 because USDC is 6 decimals)
         int256 contracts = ((int256(_amount) * DECIMAL_SHIFT) * 1e18) / price;
         int256 longBalInt = -int256(IERC20(long).balanceOf(address(this)));
+        int256 marginPositions = getMarginPositions();
         // check that the long and short positions will be equal after the deposit
-        if (-contracts + getMarginPositions() >= longBalInt) {
+        if (-contracts + marginPositions >= longBalInt) {
             // open short position
             tradeAmount = mcLiquidityPool.trade(
                 perpetualIndex,
@@ -749,7 +867,7 @@ contract BasisStrategy is
             tradeAmount = mcLiquidityPool.trade(
                 perpetualIndex,
                 address(this),
-                -(getMarginPositions() - longBalInt),
+                -(marginPositions - longBalInt),
                 price - slippageTolerance,
                 block.timestamp,
                 referrer,
@@ -762,21 +880,18 @@ contract BasisStrategy is
     /**
      * @notice  close the perpetual short position on MCDEX
      * @param   _amount the collateral to be returned from the short position
+     * @param   price   the long asset mark price from the MCDEX oracle
+     * @param   _marginPositions the current margin positions of the strategy
      * @return  tradeAmount the amount of perpetual contracts closed
      */
-    function _closePerpPosition(uint256 _amount)
-        internal
-        returns (int256 tradeAmount)
-    {
-        (, address oracleAddress, ) = mcLiquidityPool.getPerpetualInfo(
-            perpetualIndex
-        );
-        IOracle oracle = IOracle(oracleAddress);
-        // get the long asset mark price from the MCDEX oracle
-        (int256 price, ) = oracle.priceTWAPLong();
+    function _closePerpPosition(
+        uint256 _amount,
+        int256 price,
+        int256 _marginPositions
+    ) internal returns (int256 tradeAmount) {
         // calculate the number of contracts (*1e12 because USDC is 6 decimals)
         int256 contracts = ((int256(_amount) * DECIMAL_SHIFT) * 1e18) / price;
-        if (contracts + getMarginPositions() < -dust) {
+        if (contracts + _marginPositions < -dust) {
             // close short position
             tradeAmount = mcLiquidityPool.trade(
                 perpetualIndex,
@@ -792,7 +907,7 @@ contract BasisStrategy is
             tradeAmount = mcLiquidityPool.trade(
                 perpetualIndex,
                 address(this),
-                -getMarginPositions(),
+                -_marginPositions,
                 price + slippageTolerance,
                 block.timestamp,
                 referrer,
@@ -805,20 +920,19 @@ contract BasisStrategy is
 
     /**
      * @notice  close all perpetual short positions on MCDEX
+     * @param   _marginPositions the current margin positions of the strategy
+     * @param   price            the long asset mark price from the MCDEX oracle
      * @return  tradeAmount the amount of perpetual contracts closed
      */
-    function _closeAllPerpPositions() internal returns (int256 tradeAmount) {
-        (, address oracleAddress, ) = mcLiquidityPool.getPerpetualInfo(
-            perpetualIndex
-        );
-        IOracle oracle = IOracle(oracleAddress);
-        // get the long asset mark price from the MCDEX oracle
-        (int256 price, ) = oracle.priceTWAPLong();
+    function _closeAllPerpPositions(int256 _marginPositions, int256 price)
+        internal
+        returns (int256 tradeAmount)
+    {
         // close short position
         tradeAmount = mcLiquidityPool.trade(
             perpetualIndex,
             address(this),
-            -getMarginPositions(),
+            -_marginPositions,
             price + slippageTolerance,
             block.timestamp,
             referrer,
@@ -843,23 +957,24 @@ contract BasisStrategy is
 
     /**
      * @notice  determine the funding premiums that have been collected since the last epoch
+     * @param   unitAccumulativeFunding the current unit accumulative funding of the perpetual
      * @return  fee  the funding rate premium collected since the last epoch
      * @return  loss whether the funding rate was a loss or not
      */
-    function _determineFee() internal returns (uint256 fee, bool loss) {
+    function _determineFee(int256 unitAccumulativeFunding)
+        internal
+        returns (uint256 fee, bool loss)
+    {
         int256 feeInt;
-        // get the cash held in the margin cash, funding rates are saved as cash in the margin account
-        int256 newAccFunding = getUnitAccumulativeFunding();
-        int256 prevAccFunding = positions.unitAccumulativeFunding;
-        int256 livePositions = getMarginPositions();
-        if (prevAccFunding >= newAccFunding) {
+        (feeInt, loss) = _fundingSinceLastHarvest(
+            getMarginPositions(),
+            unitAccumulativeFunding
+        );
+        if (loss) {
             // if the margin cash held has gone down then record a loss
-            loss = true;
-            feeInt = ((prevAccFunding - newAccFunding) * -livePositions) / 1e18;
             fee = uint256(feeInt / DECIMAL_SHIFT);
         } else {
             // if the margin cash held has gone up then record a profit and withdraw the excess for redistribution
-            feeInt = ((newAccFunding - prevAccFunding) * -livePositions) / 1e18;
             uint256 balanceBefore = IERC20(want).balanceOf(address(this));
             if (feeInt > 0) {
                 mcLiquidityPool.withdraw(perpetualIndex, address(this), feeInt);
@@ -868,6 +983,27 @@ contract BasisStrategy is
         }
     }
 
+    /**
+     * @notice  funding accrued by the live perp positions since the last recorded accumulative funding
+     * @param   livePositions the current margin positions of the strategy
+     * @param   newAccFunding the current unit accumulative funding of the perpetual
+     * @return  feeInt the absolute funding accrued in the margin account decimals
+     * @return  loss   whether the funding accrued was a loss or not
+     */
+    function _fundingSinceLastHarvest(
+        int256 livePositions,
+        int256 newAccFunding
+    ) internal view returns (int256 feeInt, bool loss) {
+        // funding rates are saved as cash in the margin account
+        int256 prevAccFunding = positions.unitAccumulativeFunding;
+        if (prevAccFunding >= newAccFunding) {
+            loss = true;
+            feeInt = ((prevAccFunding - newAccFunding) * -livePositions) / 1e18;
+        } else {
+            feeInt = ((newAccFunding - prevAccFunding) * -livePositions) / 1e18;
+        }
+    }
+
     /**
      * @notice  split an amount of assets into three:
      *          the short position which represents the short perpetual position
@@ -910,74 +1046,25 @@ contract BasisStrategy is
         address _tokenIn,
         address _tokenOut
     ) internal returns (uint256 amountOut) {
-        // set up swap params
+        if (!isSwapConfigured) {
+            _configureSwaps();
+        }
         if (!isV2) {
-            uint256 deadline = block.timestamp;
-            address tokenIn = _tokenIn;
-            address tokenOut = _tokenOut;
-            uint24 fee = IUniswapV3Pool(pool).fee();
-            address recipient = address(this);
-            uint256 amountIn = _amount;
-            uint256 amountOutMinimum = 0;
-            uint160 sqrtPriceLimitX96 = 0;
-            ISwapRouter.ExactInputSingleParams memory params = ISwapRouter
-                .ExactInputSingleParams(
-                    tokenIn,
-                    tokenOut,
-                    fee,
-                    recipient,
-                    deadline,
-                    amountIn,
-                    amountOutMinimum,
-                    sqrtPriceLimitX96
-                );
-            // approve the router to spend the tokens
-            IERC20(_tokenIn).safeApprove(router, _amount);
             // swap optimistically via the uniswap v3 router
-            amountOut = ISwapRouter(router).exactInputSingle(params);
-        } else {
-            uint256 expectedAmountOut;
-            //get balance of tokenOut
-            uint256 amountTokenOut = IERC20(_tokenOut).balanceOf(address(this));
-            // set the swap params
-            uint256 deadline = block.timestamp;
-            address[] memory path;
-            if (_tokenIn == weth || _tokenOut == weth) {
-                path = new address[](2);
-                path[0] = _tokenIn;
-                path[1] = _tokenOut;
-                if (isSlippageControl) {
-                    expectedAmountOut = IRouterV2(router).getAmountsOut(
-                        _amount,
-                        path
-                    )[1];
-                }
-            } else {
-                path = new address[](3);
-                path[0] = _tokenIn;
-                path[1] = weth;
-                path[2] = _tokenOut;
-                if (isSlippageControl) {
-                    expectedAmountOut = IRouterV2(router).getAmountsOut(
-                        _amount,
-                        path
-                    )[2];
-                }
-            }
-
-            // approve the router to spend the token
-            IERC20(_tokenIn).safeApprove(router, _amount);
-            IRouterV2(router).swapExactTokensForTokens(
-                _amount,
-                expectedAmountOut,
-                path,
-                address(this),
-                deadline
+            amountOut = ISwapRouter(router).exactInputSingle(
+                ISwapRouter.ExactInputSingleParams(
+                    _tokenIn,
+                    _tokenOut,
+                    uniswapFee,
+                    address(this),
+                    block.timestamp,
+                    _amount,
+                    0,
+                    0
+                )
             );
-
-            amountOut =
-                IERC20(_tokenOut).balanceOf(address(this)) -
-                amountTokenOut;
+        } else {
+            amountOut = _swapV2(_amount, _tokenIn, _tokenOut);
         }
     }
 
@@ -993,85 +1080,174 @@ contract BasisStrategy is
         address _tokenIn,
         address _tokenOut
     ) internal returns (uint256 out) {
+        if (!isSwapConfigured) {
+            _configureSwaps();
+        }
         if (!isV2) {
-            // set up swap params
-            uint256 deadline = block.timestamp;
-            address tokenIn = _tokenIn;
-            address tokenOut = _tokenOut;
-            uint24 fee = IUniswapV3Pool(pool).fee();
-            address recipient = address(this);
-            uint256 amountOut = _amount;
-            uint256 amountInMaximum = IERC20(_tokenIn).balanceOf(address(this));
-            uint160 sqrtPriceLimitX96 = 0;
-            ISwapRouter.ExactOutputSingleParams memory params = ISwapRouter
-                .ExactOutputSingleParams(
-                    tokenIn,
-                    tokenOut,
-                    fee,
-                    recipient,
-                    deadline,
-                    amountOut,
-                    amountInMaximum,
-                    sqrtPriceLimitX96
-                );
-            // approve the router to spend the tokens
-            IERC20(_tokenIn).safeApprove(
-                router,
-                IERC20(_tokenIn).balanceOf(address(this))
-            );
             // swap optimistically via the uniswap v3 router
-            out = ISwapRouter(router).exactOutputSingle(params);
+            out = ISwapRouter(router).exactOutputSingle(
+                ISwapRouter.ExactOutputSingleParams(
+                    _tokenIn,
+                    _tokenOut,
+                    uniswapFee,
+                    address(this),
+                    block.timestamp,
+                    _amount,
+                    IERC20(_tokenIn).balanceOf(address(this)),
+                    0
+                )
+            );
         } else {
-            uint256 expectedAmountOut;
-            //get balance of tokenOut
-            uint256 amountTokenOut = IERC20(_tokenOut).balanceOf(address(this));
-            // set the swap params
-            uint256 deadline = block.timestamp;
-            address[] memory path;
-            if (_tokenIn == weth || _tokenOut == weth) {
-                path = new address[](2);
-                path[0] = _tokenIn;
-                path[1] = _tokenOut;
-                if (isSlippageControl) {
-                    expectedAmountOut = IRouterV2(router).getAmountsOut(
-                        _amount,
-                        path
-                    )[1];
-                }
-            } else {
-                path = new address[](3);
-                path[0] = _tokenIn;
-                path[1] = weth;
-                path[2] = _tokenOut;
-                if (isSlippageControl) {
-                    expectedAmountOut = IRouterV2(router).getAmountsOut(
-                        _amount,
-                        path
-                    )[2];
-                }
-            }
+            out = _swapV2(_amount, _tokenIn, _tokenOut);
+        }
+    }
 
-            // approve the router to spend the token
-            IERC20(_tokenIn).safeApprove(router, _amount);
-            IRouterV2(router).swapExactTokensForTokens(
-                _amount,
-                expectedAmountOut,
-                path,
-                address(this),
-                deadline
-            );
+    /**
+     * @notice  swap an exact amount in via a uniswap v2 style router, routing through weth
+     *          unless one of the tokens is weth
+     * @param   _amount    the amount to be swapped
+     * @param   _tokenIn   the asset sent in
+     * @param   _tokenOut  the asset taken out
+     * @return  amountOut the amount of tokenOut exchanged for tokenIn
+     */
+    function _swapV2(
+        uint256 _amount,
+        address _tokenIn,
+        address _tokenOut
+    ) internal returns (uint256 amountOut) {
+        address[] memory path;
+        if (_tokenIn == weth || _tokenOut == weth) {
+            path = new address[](2);
+            path[0] = _tokenIn;
+            path[1] = _tokenOut;
+        } else {
+            path = new address[](3);
+            path[0] = _tokenIn;
+            path[1] = weth;
+            path[2] = _tokenOut;
+        }
+        uint256 expectedAmountOut;
+        if (isSlippageControl) {
+            expectedAmountOut = IRouterV2(router).getAmountsOut(_amount, path)[
+                path.length - 1
+            ];
+        }
+        //get balance of tokenOut
+        uint256 amountTokenOut = IERC20(_tokenOut).balanceOf(address(this));
+        IRouterV2(router).swapExactTokensForTokens(
+            _amount,
+            expectedAmountOut,
+            path,
+            address(this),
+            block.timestamp
+        );
+        amountOut = IERC20(_tokenOut).balanceOf(address(this)) - amountTokenOut;
+    }
+
+    /**
+     * @notice  resolve the swap settings once instead of on every swap: cache the fee tier of
+     *          the uniswap v3 pool and give the router a standing allowance for want and long
+     * @dev     run by initialize, setUniswapPool and setVersion, and on the first swap of a
+     *          strategy upgraded from a version without the cache
+     */
+    function _configureSwaps() internal {
+        uniswapFee = isV2 ? 0 : IUniswapV3Pool(pool).fee();
+        _approveRouter(want);
+        _approveRouter(long);
+        isSwapConfigured = true;
+    }
+
+    /**
+     * @notice  set the allowance of the router for a token to the maximum
+     * @param   _token the token to approve
+     */
+    function _approveRouter(address _token) internal {
+        if (
+            IERC20(_token).allowance(address(this), router) <
+            type(uint256).max / 2
+        ) {
+            IERC20(_token).safeApprove(router, 0);
+            IERC20(_token).safeApprove(router, type(uint256).max);
+        }
+    }
+
+    /**
+     * @notice  read the MCDEX margin account of the strategy in a single call
+     * @return  account the margin account of the strategy
+     */
+    function _getMarginAccount()
+        internal
+        view
+        returns (MarginAccount memory account)
+    {
+        (
+            account.cash,
+            account.position,
+            account.availableMargin,
+            account.margin,
+            account.settleableMargin,
+            account.isInitialMarginSafe,
+            account.isMaintenanceMarginSafe,
+            account.isMarginSafe,
+
+        ) = mcLiquidityPool.getMarginAccount(perpetualIndex, address(this));
+    }
+
+    /**
+     * @notice  read the state and funding of the perpetual in a single call
+     * @return  perpetualState          the state of the perpetual
+     * @return  fundingRate             the funding rate of the perpetual
+     * @return  unitAccumulativeFunding the unit accumulative funding of the perpetual
+     */
+    function _getPerpetualInfo()
+        internal
+        view
+        returns (
+            IMCLP.PerpetualState perpetualState,
+            int256 fundingRate,
+            int256 unitAccumulativeFunding
+        )
+    {
+        int256[39] memory nums;
+        (perpetualState, , nums) = mcLiquidityPool.getPerpetualInfo(
+            perpetualIndex
+        );
+        fundingRate = nums[3];
+        unitAccumulativeFunding = nums[4];
+    }
+
+    /**
+     * @notice  cache the oracle of the perpetual
+     */
+    function _refreshOracle() internal {
+        (, address oracleAddress, ) = mcLiquidityPool.getPerpetualInfo(
+            perpetualIndex
+        );
+        oracle = IOracle(oracleAddress);
+    }
 
-            out = IERC20(_tokenOut).balanceOf(address(this)) - amountTokenOut;
+    /**
+     * @notice  get the long asset mark price from the MCDEX oracle
+     * @return  price the TWAP long price of the oracle
+     * @dev     the oracle is cached by initialize, and on first use after setLiquidityPool,
+     *          setPerpetualIndex or an upgrade from a version without the cache
+     */
+    function _getPrice() internal returns (int256 price) {
+        if (address(oracle) == address(0)) {
+            _refreshOracle();
         }
+        (price, ) = oracle.priceTWAPLong();
     }
 
     /**
      * @notice  settle function for dealing with the perpetual if it has settled
+     * @param   perpetualState the current state of the perpetual
      * @return  isSettled whether the perp needed to be settled or not.
      */
-    function _settle() internal returns (bool isSettled) {
-        (IMCLP.PerpetualState perpetualState, , ) = mcLiquidityPool
-            .getPerpetualInfo(perpetualIndex);
+    function _settle(IMCLP.PerpetualState perpetualState)
+        internal
+        returns (bool isSettled)
+    {
         if (perpetualState == IMCLP.PerpetualState.CLEARED) {
             mcLiquidityPool.settle(perpetualIndex, address(this));
             isSettled = true;
@@ -1154,25 +1330,79 @@ contract BasisStrategy is
         ) = mcLiquidityPool.getMarginAccount(perpetualIndex, address(this));
     }
 
+    /**
+     * @notice  preview what a harvest would do with the current state, so keepers can skip
+     *          harvests that neither accrue funding nor activate funds
+     * @return  fee            the funding premium (or loss) accrued since the last harvest in want
+     * @return  loss           whether the accrued funding is a loss
+     * @return  toActivate     the amount of want that would be split into positions
+     * @return  shortPosition  the size of the short perpetual position in want
+     * @return  longPosition   the size of the long spot position in want, before the swap
+     * @return  bufferPosition the size of the buffer position in want
+     * @return  marginAfter    the expected margin of the margin account after the harvest
+     * @dev     uses the stored MCDEX state, call mcLiquidityPool.forceToSyncState() first in
+     *          the same static call for up to date funding. Trading fees are not included.
+     */
+    function harvestPreview()
+        external
+        view
+        returns (
+            uint256 fee,
+            bool loss,
+            uint256 toActivate,
+            uint256 shortPosition,
+            uint256 longPosition,
+            uint256 bufferPosition,
+            int256 marginAfter
+        )
+    {
+        MarginAccount memory account = _getMarginAccount();
+        marginAfter = account.margin;
+        if (positions.unitAccumulativeFunding != 0) {
+            int256 feeInt;
+            (feeInt, loss) = _fundingSinceLastHarvest(
+                account.position,
+                getUnitAccumulativeFunding()
+            );
+            fee = uint256(feeInt / DECIMAL_SHIFT);
+            if (!loss && feeInt > 0) {
+                // profits are withdrawn from the margin account and redistributed
+                marginAfter -= feeInt;
+            }
+        }
+        // funds held by the strategy and the deposits the vault update sends, after it paid
+        // out queued withdrawals and kept its idle reserve
+        toActivate =
+            IERC20(want).balanceOf(address(this)) +
+            vault.availableToDeposit();
+        if (!loss) {
+            toActivate += fee;
+        }
+        if (toActivate > 0) {
+            bufferPosition = (toActivate * buffer) / MAX_BPS;
+            longPosition = (toActivate - bufferPosition) / 2;
+            shortPosition = toActivate - bufferPosition - longPosition;
+            marginAfter += int256(shortPosition + bufferPosition) * DECIMAL_SHIFT;
+        }
+    }
+
     /**
      * @notice Get the funding rate
      * @return the funding rate of the perpetual
      */
-    function getFundingRate() public view returns (int256) {
-        (, , int256[39] memory nums) = mcLiquidityPool.getPerpetualInfo(
-            perpetualIndex
-        );
-        return nums[3];
+    function getFundingRate() public view returns (int256 fundingRate) {
+        (, fundingRate, ) = _getPerpetualInfo();
     }
 
     /**
      * @notice Get the unit accumulative funding
      * @return get the unit accumulative funding of the perpetual
      */
-    function getUnitAccumulativeFunding() public view returns (int256) {
-        (, , int256[39] memory nums) = mcLiquidityPool.getPerpetualInfo(
-            perpetualIndex
-        );
-        return nums[4];
+    function getUnitAccumulativeFunding()
+        public
+        view
+        returns (int256 unitAccumulativeFunding)
+    {
+        (, , unitAccumulativeFunding) = _getPerpetualInfo();
     }
 }
@@ -27,6 +27,12 @@ contract BasisVault is
     using SafeERC20 for IERC20;
     using Math for uint256;
 
+    // struct to store the queued withdrawal of a user
+    struct WithdrawRequest {
+        uint256 shares;
+        uint256 epoch;
+    }
+
     // token used as the vault's underlying currency
     IERC20 public want;
     // total amount of want that can be deposited in the vault
@@ -37,6 +43,10 @@ contract BasisVault is
     uint256 public lastUpdate;
     // MAX_BPS
     uint256 public constant MAX_BPS = 10_000;
+    // maxSettlementLoss of a new vault, covers the swap and trade fees of an unwind
+    uint256 public constant DEFAULT_MAX_SETTLEMENT_LOSS = 100;
+    // shortfall of the idle reserve, in MAX_BPS of it, the update leaves to later deposits
+    uint256 public constant RESERVE_BAND = 2_500;
     // Seconds in a year, taken from yearn
     uint256 public constant SECS_PER_YEAR = 31_556_952;
     // strat address
@@ -54,6 +64,21 @@ contract BasisVault is
 
     bool public limitActivate = true;
 
+    // withdrawal epoch accepting requests, settled by the next update
+    uint256 public withdrawEpoch;
+    // shares queued for withdrawal in the current epoch, held by the vault until settled
+    uint256 public queuedShares;
+    // want held by the vault for settled withdrawal requests that are not claimed yet
+    uint256 public totalClaimable;
+    // want paid per share (scaled by 1e18) to the requests of each settled epoch
+    mapping(uint256 => uint256) public epochSharePrice;
+    // queued withdrawal of each user
+    mapping(address => WithdrawRequest) public withdrawRequests;
+    // share of totalAssets kept idle in the vault for instant withdrawals, in MAX_BPS
+    uint256 public idleReserve;
+    // largest shortfall a withdrawal epoch is settled with, in MAX_BPS of its value
+    uint256 public maxSettlementLoss;
+
     // modifier to check that the caller is the strategy
     modifier onlyStrategy() {
         require(msg.sender == strategy, "!strategy");
@@ -79,6 +104,7 @@ contract BasisVault is
         performanceFee = _performanceFee;
         managementFee = _managementFee;
         protocolFeeRecipient = msg.sender;
+        maxSettlementLoss = DEFAULT_MAX_SETTLEMENT_LOSS;
     }
 
     /**********
@@ -104,6 +130,34 @@ contract BasisVault is
     );
     event ProtocolFeesIssued(uint256 wantAmount, uint256 sharesIssued);
     event IndividualCapChanged(uint256 oldState, uint256 newState);
+    event IdleReserveUpdated(uint256 oldReserve, uint256 newReserve);
+    event WithdrawRequested(
+        address indexed user,
+        uint256 shares,
+        uint256 epoch
+    );
+    event WithdrawCancelled(
+        address indexed user,
+        uint256 shares,
+        uint256 epoch
+    );
+    event WithdrawEpochSettled(
+        uint256 epoch,
+        uint256 shares,
+        uint256 amount,
+        uint256 netted
+    );
+    event WithdrawEpochDeferred(
+        uint256 epoch,
+        uint256 amount,
+        uint256 available
+    );
+    event WithdrawClaimed(
+        address indexed user,
+        address recipient,
+        uint256 amount,
+        uint256 shares
+    );
 
     /***********
      * SETTERS *
@@ -178,6 +232,33 @@ contract BasisVault is
         protocolFeeRecipient = _newRecipient;
     }
 
+    /**
+     * @notice set the share of the assets kept idle in the vault, topped up on every update so
+     *         small withdrawals are a single transfer instead of a strategy withdrawal
+     * @param  _idleReserve the target idle reserve in MAX_BPS of totalAssets
+     * @dev    only callable by the owner
+     */
+    function setIdleReserve(uint256 _idleReserve) external onlyOwner {
+        require(_idleReserve < MAX_BPS, "!_idleReserve");
+        emit IdleReserveUpdated(idleReserve, _idleReserve);
+        idleReserve = _idleReserve;
+    }
+
+    /**
+     * @notice set the largest loss the withdrawal requests of an epoch are settled with, an
+     *         epoch short of more than this stays open until a later update
+     * @param  _maxSettlementLoss the max loss in MAX_BPS of the value of the queued shares
+     * @dev    only callable by the owner
+     */
+    function setMaxSettlementLoss(uint256 _maxSettlementLoss)
+        external
+        onlyOwner
+    {
+        require(_maxSettlementLoss <= MAX_BPS, "!_maxSettlementLoss");
+        maxSettlementLoss = _maxSettlementLoss;
+        emit MaxLossUpdated(_maxSettlementLoss);
+    }
+
     /**
      * @notice pause the vault
      * @dev    only callable by the owner
@@ -254,7 +335,7 @@ contract BasisVault is
         require(_shares > 0, "!_shares");
         require(_shares <= balanceOf(msg.sender), "insufficient balance");
         amount = _calcShareValue(_shares);
-        uint256 vaultBalance = want.balanceOf(address(this));
+        uint256 vaultBalance = idleBalance();
         uint256 loss;
 
         // if the vault doesnt have free funds then funds should be taken from the strategy
@@ -263,7 +344,7 @@ contract BasisVault is
             needed = Math.min(needed, totalLent);
             uint256 withdrawn;
             (loss, withdrawn) = IStrategy(strategy).withdraw(needed);
-            vaultBalance = want.balanceOf(address(this));
+            vaultBalance = idleBalance();
             if (loss > 0) {
                 require(loss <= _maxLoss, "loss more than expected");
                 amount = vaultBalance;
@@ -288,6 +369,69 @@ contract BasisVault is
         want.safeTransfer(_recipient, amount);
     }
 
+    /**
+     * @notice  queue shares for withdrawal in the current epoch. The shares are locked in the
+     *          vault and the next update unwinds the total of all requests of the epoch from the
+     *          strategy in one pass, after which the payout can be claimed.
+     * @param   _shares amount of shares to be redeemed
+     * @dev     a request of a settled epoch has to be claimed before a new one is made
+     */
+    function requestWithdraw(uint256 _shares)
+        external
+        nonReentrant
+        whenNotPaused
+    {
+        require(_shares > 0, "!_shares");
+        require(_shares <= balanceOf(msg.sender), "insufficient balance");
+        WithdrawRequest storage request = withdrawRequests[msg.sender];
+        require(
+            request.shares == 0 || request.epoch == withdrawEpoch,
+            "unclaimed withdrawal"
+        );
+        _transfer(msg.sender, address(this), _shares);
+        request.shares += _shares;
+        request.epoch = withdrawEpoch;
+        queuedShares += _shares;
+        emit WithdrawRequested(msg.sender, _shares, withdrawEpoch);
+    }
+
+    /**
+     * @notice  cancel a withdrawal request that has not been settled yet and return the shares
+     */
+    function cancelWithdraw() external nonReentrant {
+        WithdrawRequest memory request = withdrawRequests[msg.sender];
+        require(request.shares > 0, "!request");
+        require(request.epoch == withdrawEpoch, "settled");
+        delete withdrawRequests[msg.sender];
+        queuedShares -= request.shares;
+        _transfer(address(this), msg.sender, request.shares);
+        emit WithdrawCancelled(msg.sender, request.shares, request.epoch);
+    }
+
+    /**
+     * @notice  claim the payout of a settled withdrawal request
+     * @param   _recipient recipient of the amount as the recipient may not be the sender
+     * @return  amount the amount paid out for the queued shares
+     */
+    function claim(address _recipient)
+        external
+        nonReentrant
+        returns (uint256 amount)
+    {
+        require(_recipient != address(0), "!_recipient");
+        WithdrawRequest memory request = withdrawRequests[msg.sender];
+        require(request.shares > 0, "!request");
+        require(request.epoch < withdrawEpoch, "!settled");
+        delete withdrawRequests[msg.sender];
+        amount = Math.min(
+            (request.shares * epochSharePrice[request.epoch]) / 1e18,
+            totalClaimable
+        );
+        totalClaimable -= amount;
+        emit WithdrawClaimed(msg.sender, _recipient, amount, request.shares);
+        want.safeTransfer(_recipient, amount);
+    }
+
     /**
      * @notice function to update the state of the strategy in the vault and pull any funds to be redeposited
      * @param  _amount change in the vault amount sent by the strategy
@@ -307,8 +451,23 @@ contract BasisVault is
             _determineProtocolFees(_amount);
             totalLent += _amount;
         }
+        // pay out the withdrawal requests of the epoch before sending deposits to the strategy
+        if (queuedShares > 0) {
+            _settleWithdrawEpoch();
+        }
+        // top up the idle reserve from the strategy once withdrawals have drawn it down by
+        // more than RESERVE_BAND, a smaller top up costs more in fees than it saves
+        uint256 reserve = (totalAssets() * idleReserve) / MAX_BPS;
+        uint256 vaultBalance = idleBalance();
+        if (
+            vaultBalance < reserve &&
+            (reserve - vaultBalance) * MAX_BPS > reserve * RESERVE_BAND &&
+            totalLent > 0
+        ) {
+            _withdrawFromStrategy(Math.min(reserve - vaultBalance, totalLent));
+        }
         // increase the totalLent by the amount of deposits that havent yet been sent to the vault
-        toDeposit = want.balanceOf(address(this));
+        toDeposit = availableToDeposit();
         totalLent += toDeposit;
         lastUpdate = block.timestamp;
         emit StrategyUpdate(_amount, _loss, toDeposit);
@@ -321,6 +480,55 @@ contract BasisVault is
      * INTERNAL FUNCTIONS *
      **********************/
 
+    /**
+     * @dev    settle the withdrawal requests of the current epoch: the outflow is netted against
+     *         the deposits waiting in the vault first, so only the net difference is traded, and
+     *         the shortfall is withdrawn from the strategy in a single call. A loss on that
+     *         withdrawal is borne by the requests, as it is for withdraw, up to
+     *         maxSettlementLoss of their value. A larger shortfall does not revert the
+     *         update, the epoch stays open and is settled by a later update with the
+     *         want withdrawn so far kept idle.
+     */
+    function _settleWithdrawEpoch() internal {
+        uint256 shares = queuedShares;
+        uint256 amount = _calcShareValue(shares);
+        uint256 vaultBalance = idleBalance();
+        uint256 netted = Math.min(amount, vaultBalance);
+        if (amount > vaultBalance && totalLent > 0) {
+            _withdrawFromStrategy(Math.min(amount - vaultBalance, totalLent));
+            vaultBalance = idleBalance();
+        }
+        uint256 epoch = withdrawEpoch;
+        if (amount > vaultBalance) {
+            if (
+                (amount - vaultBalance) * MAX_BPS > amount * maxSettlementLoss
+            ) {
+                emit WithdrawEpochDeferred(epoch, amount, vaultBalance);
+                return;
+            }
+            amount = vaultBalance;
+        }
+
+        epochSharePrice[epoch] = (amount * 1e18) / shares;
+        totalClaimable += amount;
+        queuedShares = 0;
+        withdrawEpoch = epoch + 1;
+        _burn(address(this), shares);
+        emit WithdrawEpochSettled(epoch, shares, amount, netted);
+    }
+
+    /**
+     * @dev    withdraw funds from the strategy into the vault, reducing totalLent by the amount
+     *         withdrawn and the loss recorded by the strategy
+     * @param  _amount amount of want to withdraw
+     */
+    function _withdrawFromStrategy(uint256 _amount) internal {
+        (uint256 loss, uint256 withdrawn) = IStrategy(strategy).withdraw(
+            _amount
+        );
+        totalLent -= Math.min(loss + withdrawn, totalLent);
+    }
+
     /**
      * @dev     function for handling share issuance during a deposit
      * @param  _amount    amount of want to be deposited
@@ -424,7 +632,7 @@ contract BasisVault is
 
     function expectedLoss(uint256 _shares) public view returns (uint256 loss) {
         uint256 strategyBalance = want.balanceOf(strategy);
-        uint256 vaultBalance = want.balanceOf(address(this));
+        uint256 vaultBalance = idleBalance();
         uint256 amount = _calcShareValue(_shares);
         if (amount > vaultBalance) {
             uint256 needed = amount - vaultBalance;
@@ -441,7 +649,65 @@ contract BasisVault is
      * @return total assets in want available in the vault
      */
     function totalAssets() public view returns (uint256) {
-        return want.balanceOf(address(this)) + totalLent;
+        return idleBalance() + totalLent;
+    }
+
+    /**
+     * @notice get the want held by the vault that is not reserved for claims of settled withdrawals
+     * @return idle want in the vault
+     */
+    function idleBalance() public view returns (uint256) {
+        return want.balanceOf(address(this)) - totalClaimable;
+    }
+
+    /**
+     * @notice get the idle want the next update would send to the strategy, after paying the
+     *         queued withdrawals and keeping the idle reserve
+     * @return amount of want available to deposit in the strategy
+     */
+    function availableToDeposit() public view returns (uint256) {
+        uint256 vaultBalance = idleBalance();
+        uint256 queued = queuedAssets();
+        if (vaultBalance <= queued) {
+            return 0;
+        }
+        vaultBalance -= queued;
+        uint256 reserve = ((totalAssets() - queued) * idleReserve) / MAX_BPS;
+        return vaultBalance > reserve ? vaultBalance - reserve : 0;
+    }
+
+    /**
+     * @notice get the flows the next update nets against each other before trading
+     * @return inflow  deposits waiting in the vault
+     * @return outflow current value of the shares queued for withdrawal
+     */
+    function pendingFlows()
+        external
+        view
+        returns (uint256 inflow, uint256 outflow)
+    {
+        inflow = idleBalance();
+        outflow = queuedAssets();
+    }
+
+    /**
+     * @notice get the current value of the shares queued for withdrawal
+     * @return value of the queued shares in want
+     */
+    function queuedAssets() public view returns (uint256) {
+        return _calcShareValue(queuedShares);
+    }
+
+    /**
+     * @notice get the payout a user can claim for a settled withdrawal request
+     * @param  _user the user that requested the withdrawal
+     * @return amount claimable in want, 0 while the request is not settled
+     */
+    function claimable(address _user) external view returns (uint256 amount) {
+        WithdrawRequest memory request = withdrawRequests[_user];
+        if (request.shares > 0 && request.epoch < withdrawEpoch) {
+            amount = (request.shares * epochSharePrice[request.epoch]) / 1e18;
+        }
     }
 
     /**
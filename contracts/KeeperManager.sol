@@ -5,14 +5,58 @@ import "@oz-upgradeable/contracts/access/OwnableUpgradeable.sol";
 import "@oz-upgradeable/contracts/security/PausableUpgradeable.sol";
 
 import "../interfaces/IStrategy.sol";
+import "../interfaces/IBasisVault.sol";
+import "../interfaces/IVaultRegistry.sol";
 
 contract KeeperManager is OwnableUpgradeable, PausableUpgradeable {
+    // struct to store the accumulative funding of a strategy at a point in time
+    struct FundingCheckpoint {
+        int256 unitAccumulativeFunding;
+        uint256 timestamp;
+    }
+
+    // upkeep action flags carried in performData
+    uint256 public constant HARVEST = 1;
+    uint256 public constant UNWIND = 2;
+    uint256 public constant CHECKPOINT = 4;
+
     address public registryContract;
     uint256 public cooldown;
+    // timestamp of the last upkeep when the cooldown was shared, replaced by lastUpkeep
     uint256 public lastTimestamp;
+    // funding rate above which an unwound strategy re-enters its positions
+    int256 public enterThreshold;
+    // funding rate below the negative of which an invested strategy unwinds
+    int256 public exitThreshold;
+    // minimum age of the funding checkpoint used to confirm a regime change, 0 disables it
+    uint256 public fundingWindow;
+    // latest accumulative funding checkpoint of each strategy, rolled every fundingWindow
+    mapping(address => FundingCheckpoint) public checkpoints;
+    // checkpoint of each strategy before the latest one
+    mapping(address => FundingCheckpoint) public previousCheckpoints;
+    // vault registry walked by checkUpkeep when checkData is empty
+    IVaultRegistry public vaultRegistry;
+    // timestamp of the last harvest or unwind of each strategy, the cooldown applies per strategy
+    mapping(address => uint256) public lastUpkeep;
+    // most strategies checkUpkeep returns for one perform, 0 for no limit
+    uint256 public maxPerUpkeep;
+    // strategy performed last, checkUpkeep walks the vault registry from the one after it
+    address public upkeepCursor;
 
     event CooldownSet(uint256 cooldown);
     event RegistryContractSet(address indexed registryContract);
+    event RegimeThresholdsSet(
+        int256 enterThreshold,
+        int256 exitThreshold,
+        uint256 fundingWindow
+    );
+    event FundingCheckpointed(
+        address indexed strategy,
+        int256 unitAccumulativeFunding
+    );
+    event VaultRegistrySet(address indexed vaultRegistry);
+    event UpkeepFailed(address indexed strategy, uint256 action);
+    event MaxPerUpkeepSet(uint256 maxPerUpkeep);
 
     function initialize(uint256 _cooldown, address _registryContract)
         public
@@ -35,33 +79,277 @@ contract KeeperManager is OwnableUpgradeable, PausableUpgradeable {
     }
 
     /**
-     * @param  checkData  encoded strategy address: abi.encode(strategy, (address))
+     * @notice set the vault registry whose active vaults are kept
+     * @param  _vaultRegistry the VaultRegistry
+     * @dev    only callable by owner
+     */
+    function setVaultRegistry(address _vaultRegistry) public onlyOwner {
+        vaultRegistry = IVaultRegistry(_vaultRegistry);
+        emit VaultRegistrySet(_vaultRegistry);
+    }
+
+    /**
+     * @notice set the most strategies performed by one upkeep, so that every harvest of a
+     *         batch fits the gas limit of the upkeep
+     * @param  _maxPerUpkeep the batch size, 0 for no limit
+     * @dev    only callable by owner
+     */
+    function setMaxPerUpkeep(uint256 _maxPerUpkeep) public onlyOwner {
+        maxPerUpkeep = _maxPerUpkeep;
+        emit MaxPerUpkeepSet(_maxPerUpkeep);
+    }
+
+    /**
+     * @notice set the hysteresis band of the funding regime
+     * @param  _enterThreshold funding rate an unwound strategy needs to exceed to re-enter
+     * @param  _exitThreshold  funding rate an invested strategy needs to fall below (negated) to unwind
+     * @param  _fundingWindow  minimum age of the funding checkpoint that has to confirm a regime change
+     * @dev    only callable by owner
+     */
+    function setRegimeThresholds(
+        int256 _enterThreshold,
+        int256 _exitThreshold,
+        uint256 _fundingWindow
+    ) public onlyOwner {
+        require(_enterThreshold >= 0, "!_enterThreshold");
+        require(_exitThreshold >= 0, "!_exitThreshold");
+        enterThreshold = _enterThreshold;
+        exitThreshold = _exitThreshold;
+        fundingWindow = _fundingWindow;
+        emit RegimeThresholdsSet(
+            _enterThreshold,
+            _exitThreshold,
+            _fundingWindow
+        );
+    }
+
+    /**
+     * @notice check every strategy of the active vaults of the vault registry, or a single
+     *         strategy, for a due harvest, unwind or funding checkpoint
+     * @param  checkData   empty to walk the vault registry, or abi.encode(strategy) to only
+     *                     check one strategy
+     * @return performData abi.encode(address[] strategies, uint256[] actions) of the
+     *                     strategies with something to do, actions are HARVEST, UNWIND and
+     *                     CHECKPOINT flags
+     * @dev    at most maxPerUpkeep strategies are returned. The registry walk starts after
+     *         the upkeepCursor and wraps around, so the strategies left out are picked up by
+     *         the next upkeep even if the performed ones are due again
      */
     function checkUpkeep(bytes calldata checkData)
         external
         returns (bool upkeepNeeded, bytes memory performData)
     {
-        address strategy = abi.decode(checkData, (address));
+        address[] memory candidates;
+        uint256 start;
+        if (checkData.length == 0) {
+            candidates = _registryStrategies();
+            start = _cursorIndex(candidates);
+        } else {
+            candidates = new address[](1);
+            candidates[0] = abi.decode(checkData, (address));
+        }
 
-        bool harvestNeeded = IStrategy(strategy).getFundingRate() > 0;
-        bool unwindNeeded = !harvestNeeded && !IStrategy(strategy).isUnwind();
+        uint256 length = candidates.length;
+        address[] memory strategies = new address[](length);
+        uint256[] memory actions = new uint256[](length);
+        uint256 limit = maxPerUpkeep == 0 ? length : maxPerUpkeep;
+        uint256 count;
+        for (uint256 i = 0; i < length && count < limit; i++) {
+            address strategy = candidates[(start + i) % length];
+            uint256 action = _upkeepAction(strategy);
+            if (action != 0) {
+                strategies[count] = strategy;
+                actions[count] = action;
+                count++;
+            }
+        }
+        assembly {
+            mstore(strategies, count)
+            mstore(actions, count)
+        }
 
-        upkeepNeeded =
-            (harvestNeeded || unwindNeeded) &&
-            (block.timestamp - lastTimestamp) > cooldown;
-        performData = checkData;
+        upkeepNeeded = count > 0;
+        performData = abi.encode(strategies, actions);
     }
 
+    /**
+     * @notice perform the actions found by checkUpkeep, a strategy whose harvest or unwind
+     *         reverts does not block the others
+     * @param  performData abi.encode(address[] strategies, uint256[] actions)
+     * @dev    the funding rate is not read again, only the cooldown and the checkpoint age
+     *         are checked to skip duplicate performs. The last strategy becomes the
+     *         upkeepCursor
+     */
     function performUpkeep(bytes calldata performData) external {
         require(msg.sender == registryContract, "!chainLinkRegistry");
 
-        address strategy = abi.decode(performData, (address));
-        lastTimestamp = block.timestamp;
+        (address[] memory strategies, uint256[] memory actions) = abi.decode(
+            performData,
+            (address[], uint256[])
+        );
+        require(strategies.length == actions.length, "!performData");
+
+        for (uint256 i = 0; i < strategies.length; i++) {
+            _performUpkeep(strategies[i], actions[i]);
+        }
+        if (strategies.length > 0) {
+            upkeepCursor = strategies[strategies.length - 1];
+        }
+    }
+
+    function _performUpkeep(address strategy, uint256 action) internal {
+        if (
+            (action & (HARVEST | UNWIND)) != 0 &&
+            (block.timestamp - lastUpkeep[strategy]) > cooldown
+        ) {
+            // a failed upkeep also waits out the cooldown instead of being retried every block
+            lastUpkeep[strategy] = block.timestamp;
+            if ((action & HARVEST) != 0) {
+                try IStrategy(strategy).harvest() {} catch {
+                    emit UpkeepFailed(strategy, HARVEST);
+                }
+            } else {
+                try IStrategy(strategy).unwind() {} catch {
+                    emit UpkeepFailed(strategy, UNWIND);
+                }
+            }
+        }
+        if ((action & CHECKPOINT) != 0 && _checkpointDue(strategy)) {
+            _checkpoint(strategy);
+        }
+    }
 
-        if (IStrategy(strategy).getFundingRate() > 0) {
-            IStrategy(strategy).harvest();
-        } else if (!IStrategy(strategy).isUnwind()) {
-            IStrategy(strategy).unwind();
+    /**
+     * @notice the strategies of the active vaults of the vault registry
+     */
+    function _registryStrategies()
+        internal
+        view
+        returns (address[] memory strategies)
+    {
+        address[] memory vaults = vaultRegistry.getActiveVaults(
+            0,
+            vaultRegistry.activeVaultCount()
+        );
+        strategies = new address[](vaults.length);
+        uint256 count;
+        for (uint256 i = 0; i < vaults.length; i++) {
+            address strategy = IBasisVault(vaults[i]).strategy();
+            if (strategy != address(0)) {
+                strategies[count++] = strategy;
+            }
+        }
+        assembly {
+            mstore(strategies, count)
         }
     }
+
+    /**
+     * @notice the index the registry walk of checkUpkeep starts at, the one after the
+     *         upkeepCursor or 0 when the cursor is not in the list
+     * @param  strategies the strategies of the vault registry
+     */
+    function _cursorIndex(address[] memory strategies)
+        internal
+        view
+        returns (uint256)
+    {
+        for (uint256 i = 0; i < strategies.length; i++) {
+            if (strategies[i] == upkeepCursor) {
+                return i + 1;
+            }
+        }
+        return 0;
+    }
+
+    /**
+     * @notice the upkeep a strategy needs, a harvest or unwind once its cooldown passed
+     *         and a funding checkpoint once the last one is fundingWindow old
+     * @param  strategy the strategy to check
+     * @return action   HARVEST, UNWIND and CHECKPOINT flags, 0 when nothing is due
+     */
+    function _upkeepAction(address strategy)
+        internal
+        view
+        returns (uint256 action)
+    {
+        if ((block.timestamp - lastUpkeep[strategy]) > cooldown) {
+            (bool harvestNeeded, bool unwindNeeded) = _checkStrategy(strategy);
+            if (harvestNeeded) {
+                action = HARVEST;
+            } else if (unwindNeeded) {
+                action = UNWIND;
+            }
+        }
+        if (_checkpointDue(strategy)) {
+            action |= CHECKPOINT;
+        }
+    }
+
+    /**
+     * @notice an invested strategy harvests while funding is positive and unwinds once funding
+     *         falls below -exitThreshold, an unwound strategy only re-enters once funding rises
+     *         above enterThreshold. Funding between the thresholds keeps the current state.
+     *         With a funding window set, the funding accrued since the checkpoint has to agree.
+     * @param  strategy the strategy to check
+     */
+    function _checkStrategy(address strategy)
+        internal
+        view
+        returns (bool harvestNeeded, bool unwindNeeded)
+    {
+        int256 fundingRate = IStrategy(strategy).getFundingRate();
+        int256 windowFunding = _windowFunding(strategy);
+        if (IStrategy(strategy).isUnwind()) {
+            harvestNeeded = fundingRate > enterThreshold && windowFunding >= 0;
+        } else {
+            harvestNeeded = fundingRate > 0;
+            unwindNeeded = fundingRate <= -exitThreshold && windowFunding <= 0;
+        }
+        if (harvestNeeded) {
+            // skip harvests that neither accrue funding nor activate funds
+            (uint256 fee, , uint256 toActivate, , , , ) = IStrategy(strategy)
+                .harvestPreview();
+            harvestNeeded = fee > 0 || toActivate > 0;
+        }
+    }
+
+    /**
+     * @notice accumulative funding accrued by a short position over the rolling window of the
+     *         strategy, measured from the most recent checkpoint that is at least fundingWindow
+     *         old. 0 when the funding window is disabled or there is no such checkpoint yet
+     * @param  strategy the strategy to check
+     */
+    function _windowFunding(address strategy) internal view returns (int256) {
+        if (fundingWindow == 0) {
+            return 0;
+        }
+        FundingCheckpoint memory checkpoint = checkpoints[strategy];
+        if (block.timestamp - checkpoint.timestamp < fundingWindow) {
+            checkpoint = previousCheckpoints[strategy];
+        }
+        if (checkpoint.timestamp == 0) {
+            return 0;
+        }
+        return
+            IStrategy(strategy).getUnitAccumulativeFunding() -
+            checkpoint.unitAccumulativeFunding;
+    }
+
+    function _checkpointDue(address strategy) internal view returns (bool) {
+        return
+            fundingWindow > 0 &&
+            block.timestamp - checkpoints[strategy].timestamp >= fundingWindow;
+    }
+
+    function _checkpoint(address strategy) internal {
+        int256 unitAccumulativeFunding = IStrategy(strategy)
+            .getUnitAccumulativeFunding();
+        previousCheckpoints[strategy] = checkpoints[strategy];
+        checkpoints[strategy] = FundingCheckpoint(
+            unitAccumulativeFunding,
+            block.timestamp
+        );
+        emit FundingCheckpointed(strategy, unitAccumulativeFunding);
+    }
 }
@@ -0,0 +1,155 @@
+// SPDX-License-Identifier: AGPL V3.0
+pragma solidity 0.8.4;
+
+import "./BasisVault.sol";
+import "./BasisStrategy.sol";
+import "./VaultRegistry.sol";
+
+// view of the BasisStrategy getters that return structs, abi compatible with the tuple getters
+interface IBasisStrategyLens {
+    function positions()
+        external
+        view
+        returns (BasisStrategy.Positions memory);
+
+    function getMarginAccount()
+        external
+        view
+        returns (BasisStrategy.MarginAccount memory);
+}
+
+/**
+ * @title  VaultLens
+ * @author akropolis.io
+ * @notice Read only contract returning the state of many basis vaults and their strategies
+ *         in a single call
+ * @dev    Can be used without being deployed: an eth_call of the creation code with a
+ *         non-empty vault list or a registry returns the abi encoded VaultInfo[] of
+ *         getVaults / getRegistryVaults directly from the constructor.
+ */
+contract VaultLens {
+    // struct to hold the state of a vault and its strategy
+    struct VaultInfo {
+        address vault;
+        address strategy;
+        address want;
+        uint256 totalAssets;
+        uint256 totalLent;
+        uint256 totalSupply;
+        uint256 pricePerShare;
+        uint256 idleBalance;
+        uint256 queuedShares;
+        uint256 totalClaimable;
+        uint256 performanceFee;
+        uint256 managementFee;
+        uint256 depositLimit;
+        uint256 individualDepositLimit;
+        uint256 idleReserve;
+        bool paused;
+        BasisStrategy.Positions positions;
+        BasisStrategy.MarginAccount marginAccount;
+        int256 fundingRate;
+        bool isUnwind;
+        uint256 buffer;
+    }
+
+    /**
+     * @param  _vaults   vaults to read, ignored when _registry is set
+     * @param  _registry registry to read a page of active vaults of, or the zero address
+     * @param  _offset   position of the first active vault of the registry to read
+     * @param  _limit    maximum number of active vaults of the registry to read
+     * @dev    a deployment passes an empty list and the zero address, anything else makes
+     *         the constructor return the read instead of the runtime code
+     */
+    constructor(
+        address[] memory _vaults,
+        address _registry,
+        uint256 _offset,
+        uint256 _limit
+    ) {
+        if (_registry == address(0) && _vaults.length == 0) {
+            return;
+        }
+        VaultInfo[] memory infos = _registry == address(0)
+            ? getVaults(_vaults)
+            : getRegistryVaults(_registry, _offset, _limit);
+        bytes memory data = abi.encode(infos);
+        assembly {
+            return(add(data, 32), mload(data))
+        }
+    }
+
+    /**
+     * @notice read the state of a list of vaults and their strategies
+     * @param  _vaults the vaults to read
+     * @return infos   the state of each vault, in the order of _vaults
+     */
+    function getVaults(address[] memory _vaults)
+        public
+        view
+        returns (VaultInfo[] memory infos)
+    {
+        infos = new VaultInfo[](_vaults.length);
+        for (uint256 i = 0; i < _vaults.length; i++) {
+            infos[i] = getVault(_vaults[i]);
+        }
+    }
+
+    /**
+     * @notice read the state of a page of the active vaults of a registry
+     * @param  _registry the vault registry
+     * @param  _offset   position of the first active vault to read
+     * @param  _limit    maximum number of vaults to read
+     * @return infos     the state of each vault, in the order of getActiveVaults
+     */
+    function getRegistryVaults(
+        address _registry,
+        uint256 _offset,
+        uint256 _limit
+    ) public view returns (VaultInfo[] memory infos) {
+        return
+            getVaults(
+                VaultRegistry(_registry).getActiveVaults(_offset, _limit)
+            );
+    }
+
+    /**
+     * @notice read the state of a vault and its strategy
+     * @param  _vault the vault to read
+     * @return info   the state of the vault, strategy fields are left empty when no
+     *                strategy is set
+     */
+    function getVault(address _vault)
+        public
+        view
+        returns (VaultInfo memory info)
+    {
+        BasisVault vault = BasisVault(_vault);
+        info.vault = _vault;
+        info.strategy = vault.strategy();
+        info.want = address(vault.want());
+        info.totalAssets = vault.totalAssets();
+        info.totalLent = vault.totalLent();
+        info.totalSupply = vault.totalSupply();
+        info.pricePerShare = vault.pricePerShare();
+        info.idleBalance = vault.idleBalance();
+        info.queuedShares = vault.queuedShares();
+        info.totalClaimable = vault.totalClaimable();
+        info.performanceFee = vault.performanceFee();
+        info.managementFee = vault.managementFee();
+        info.depositLimit = vault.depositLimit();
+        info.individualDepositLimit = vault.individualDepositLimit();
+        info.idleReserve = vault.idleReserve();
+        info.paused = vault.paused();
+        if (info.strategy == address(0)) {
+            return info;
+        }
+        BasisStrategy strategy = BasisStrategy(info.strategy);
+        info.positions = IBasisStrategyLens(info.strategy).positions();
+        info.marginAccount = IBasisStrategyLens(info.strategy)
+            .getMarginAccount();
+        info.fundingRate = strategy.getFundingRate();
+        info.isUnwind = strategy.isUnwind();
+        info.buffer = strategy.buffer();
+    }
+}
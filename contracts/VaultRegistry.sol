@@ -10,6 +10,14 @@ import "@oz-upgradeable/contracts/access/OwnableUpgradeable.sol";
  */
 contract VaultRegistry is OwnableUpgradeable {
     mapping(address => bool) public isVault;
+    // every vault ever registered, in order of first registration
+    address[] internal vaults;
+    // currently registered vaults, unordered
+    address[] internal activeVaults;
+    // position + 1 of a vault in vaults, 0 when it was never registered
+    mapping(address => uint256) internal vaultIndex;
+    // position + 1 of a vault in activeVaults, 0 when it is not active
+    mapping(address => uint256) internal activeVaultIndex;
 
     event VaultRegistered(address indexed vault);
     event VaultDeactivated(address indexed vault);
@@ -18,15 +26,103 @@ contract VaultRegistry is OwnableUpgradeable {
         __Ownable_init();
     }
 
+    /**
+     * @notice  register a vault, or re-activate a deactivated one
+     * @param   _vault the vault to register
+     * @dev     vaults registered before enumeration was added are registered again to
+     *          be listed
+     */
     function registerVault(address _vault) external onlyOwner {
         require(_vault != address(0), "!_zeroAddress");
         isVault[_vault] = true;
+        if (vaultIndex[_vault] == 0) {
+            vaults.push(_vault);
+            vaultIndex[_vault] = vaults.length;
+        }
+        if (activeVaultIndex[_vault] == 0) {
+            activeVaults.push(_vault);
+            activeVaultIndex[_vault] = activeVaults.length;
+        }
         emit VaultRegistered(_vault);
     }
 
+    /**
+     * @notice  deactivate a vault, it stays listed in getVaults
+     * @param   _vault the vault to deactivate
+     * @dev     swaps the last active vault into the slot of _vault
+     */
     function deactivateVault(address _vault) external onlyOwner {
         require(isVault[_vault], "!registered");
         isVault[_vault] = false;
+        uint256 index = activeVaultIndex[_vault];
+        if (index != 0) {
+            address last = activeVaults[activeVaults.length - 1];
+            activeVaults[index - 1] = last;
+            activeVaultIndex[last] = index;
+            activeVaults.pop();
+            delete activeVaultIndex[_vault];
+        }
         emit VaultDeactivated(_vault);
     }
+
+    /**
+     * @notice  number of vaults ever registered
+     */
+    function vaultCount() external view returns (uint256) {
+        return vaults.length;
+    }
+
+    /**
+     * @notice  number of currently registered vaults
+     */
+    function activeVaultCount() external view returns (uint256) {
+        return activeVaults.length;
+    }
+
+    /**
+     * @notice  page through every vault ever registered, in order of registration
+     * @param   _offset the position of the first vault to return
+     * @param   _limit  the maximum number of vaults to return
+     * @return  page    the vaults from _offset, shorter than _limit at the end of the list
+     */
+    function getVaults(uint256 _offset, uint256 _limit)
+        external
+        view
+        returns (address[] memory page)
+    {
+        return _page(vaults, _offset, _limit);
+    }
+
+    /**
+     * @notice  page through the currently registered vaults
+     * @param   _offset the position of the first vault to return
+     * @param   _limit  the maximum number of vaults to return
+     * @return  page    the vaults from _offset, shorter than _limit at the end of the list
+     * @dev     the order changes when a vault is deactivated, read all pages at one block
+     */
+    function getActiveVaults(uint256 _offset, uint256 _limit)
+        external
+        view
+        returns (address[] memory page)
+    {
+        return _page(activeVaults, _offset, _limit);
+    }
+
+    function _page(
+        address[] storage _list,
+        uint256 _offset,
+        uint256 _limit
+    ) internal view returns (address[] memory page) {
+        uint256 length = _list.length;
+        if (_offset >= length) {
+            return page;
+        }
+        if (_limit > length - _offset) {
+            _limit = length - _offset;
+        }
+        page = new address[](_limit);
+        for (uint256 i = 0; i < _limit; i++) {
+            page[i] = _list[_offset + i];
+        }
+    }
 }
@@ -0,0 +1,25 @@
+// SPDX-License-Identifier: AGPL V3.0
+pragma solidity 0.8.4;
+
+import "./BasicERC20.sol";
+
+/*
+BasicERC20 with configurable decimals, used for the long asset on the development
+network. Any account can call mint()
+*/
+
+contract MockERC20 is BasicERC20 {
+    uint8 private _decimals;
+
+    constructor(
+        string memory name_,
+        string memory symbol_,
+        uint8 decimals_
+    ) BasicERC20(name_, symbol_) {
+        _decimals = decimals_;
+    }
+
+    function decimals() public view override returns (uint8) {
+        return _decimals;
+    }
+}
@@ -0,0 +1,346 @@
+// SPDX-License-Identifier: AGPL V3.0
+pragma solidity 0.8.4;
+
+import "../../interfaces/IMCLP.sol";
+import "./MockOracle.sol";
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/IERC20Metadata.sol";
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+
+/*
+MCDEX liquidity pool with a single perpetual used for testing on the development
+network, the perpetual index is ignored. Trades fill against the pool at the oracle
+price moved by halfSpread and pay tradeFeeRate of the notional. Funding accrues on
+forceToSyncState like MCDEX: fundingRate of the index price per 8 hours is added to
+unitAccumulativeFunding, and a position pays position * unitAccumulativeFunding.
+Amounts are in 18 decimals, the collateral is converted on deposit and withdraw, and
+the funding gains are paid out of the collateral the pool is funded with.
+*/
+
+contract MockMCLP is IMCLP {
+    using SafeERC20 for IERC20;
+
+    struct MarginAccount {
+        int256 cash;
+        int256 position;
+        int256 targetLeverage;
+    }
+
+    // period fundingRate applies to
+    uint256 public constant FUNDING_INTERVAL = 8 hours;
+    // MCDEX trade flag that skips the limit price check
+    uint32 public constant MASK_MARKET_ORDER = 0x40000000;
+
+    IERC20 public collateral;
+    MockOracle public oracle;
+    int256 public decimalShift;
+    PerpetualState public state = PerpetualState.NORMAL;
+    int256 public fundingRate;
+    int256 public unitAccumulativeFunding;
+    uint256 public lastFundingTime;
+    // rates in 1e18 = 100%
+    int256 public initialMarginRate = 0.05e18;
+    int256 public maintenanceMarginRate = 0.03e18;
+    int256 public tradeFeeRate = 0.0007e18;
+    int256 public halfSpread;
+    mapping(address => MarginAccount) public marginAccounts;
+
+    constructor(address _collateral, address _oracle) {
+        collateral = IERC20(_collateral);
+        oracle = MockOracle(_oracle);
+        decimalShift = int256(
+            10**(18 - IERC20Metadata(_collateral).decimals())
+        );
+        lastFundingTime = block.timestamp;
+    }
+
+    /***********
+     * SETTERS *
+     ***********/
+
+    function setFundingRate(int256 _fundingRate) external {
+        forceToSyncState();
+        fundingRate = _fundingRate;
+    }
+
+    function setUnitAccumulativeFunding(int256 _unitAccumulativeFunding)
+        external
+    {
+        forceToSyncState();
+        unitAccumulativeFunding = _unitAccumulativeFunding;
+    }
+
+    function setMarginRates(
+        int256 _initialMarginRate,
+        int256 _maintenanceMarginRate
+    ) external {
+        initialMarginRate = _initialMarginRate;
+        maintenanceMarginRate = _maintenanceMarginRate;
+    }
+
+    function setTradeFee(int256 _tradeFeeRate, int256 _halfSpread) external {
+        tradeFeeRate = _tradeFeeRate;
+        halfSpread = _halfSpread;
+    }
+
+    function setState(PerpetualState _state) external {
+        state = _state;
+    }
+
+    /*********
+     * MCDEX *
+     *********/
+
+    function forceToSyncState() public override {
+        if (state == PerpetualState.NORMAL) {
+            unitAccumulativeFunding +=
+                (((_price() * fundingRate) / 1e18) *
+                    int256(block.timestamp - lastFundingTime)) /
+                int256(FUNDING_INTERVAL);
+        }
+        lastFundingTime = block.timestamp;
+    }
+
+    function deposit(
+        uint256,
+        address trader,
+        int256 amount
+    ) external override {
+        require(trader == msg.sender, "!trader");
+        require(amount > 0, "invalid amount");
+        uint256 collateralAmount = uint256(amount / decimalShift);
+        collateral.safeTransferFrom(trader, address(this), collateralAmount);
+        marginAccounts[trader].cash += int256(collateralAmount) * decimalShift;
+    }
+
+    function withdraw(
+        uint256,
+        address trader,
+        int256 amount
+    ) external override {
+        require(trader == msg.sender, "!trader");
+        require(amount > 0, "invalid amount");
+        require(
+            state == PerpetualState.NORMAL,
+            "perpetual should be in NORMAL state"
+        );
+        marginAccounts[trader].cash -= amount;
+        require(_isSafe(trader, true), "margin is unsafe after withdrawal");
+        collateral.safeTransfer(trader, uint256(amount / decimalShift));
+    }
+
+    function trade(
+        uint256,
+        address trader,
+        int256 amount,
+        int256 limitPrice,
+        uint256 deadline,
+        address,
+        uint32 flags
+    ) external override returns (int256 tradeAmount) {
+        require(trader == msg.sender, "!trader");
+        require(amount != 0, "invalid amount");
+        require(deadline >= block.timestamp, "deadline exceeded");
+        require(
+            state == PerpetualState.NORMAL,
+            "perpetual should be in NORMAL state"
+        );
+        (int256 price, int256 fee) = _tradePrice(amount);
+        if (flags & MASK_MARKET_ORDER == 0) {
+            require(
+                amount > 0 ? price <= limitPrice : price >= limitPrice,
+                "price exceeds limit"
+            );
+        }
+        MarginAccount storage account = marginAccounts[trader];
+        bool opening = _abs(account.position + amount) > _abs(account.position);
+        // the funding of the traded amount is settled into the cash
+        account.cash +=
+            ((unitAccumulativeFunding - price) * amount) /
+            1e18 -
+            fee;
+        account.position += amount;
+        require(_isSafe(trader, opening), "trader margin unsafe");
+        tradeAmount = amount;
+    }
+
+    function settle(uint256, address trader) external override {
+        require(
+            state == PerpetualState.CLEARED,
+            "perpetual should be in CLEARED state"
+        );
+        int256 margin = _margin(marginAccounts[trader]);
+        delete marginAccounts[trader];
+        if (margin > 0) {
+            collateral.safeTransfer(trader, uint256(margin / decimalShift));
+        }
+    }
+
+    function setTargetLeverage(
+        uint256,
+        address trader,
+        int256 targetLeverage
+    ) external override {
+        require(trader == msg.sender, "!trader");
+        marginAccounts[trader].targetLeverage = targetLeverage;
+    }
+
+    function queryTrade(
+        uint256,
+        address,
+        int256 amount,
+        address,
+        uint32
+    )
+        external
+        view
+        override
+        returns (
+            int256 tradePrice,
+            int256 totalFee,
+            int256 cost
+        )
+    {
+        (tradePrice, totalFee) = _tradePrice(amount);
+        cost = 0;
+    }
+
+    /***********
+     * GETTERS *
+     ***********/
+
+    function getMarginAccount(uint256, address trader)
+        external
+        view
+        override
+        returns (
+            int256 cash,
+            int256 position,
+            int256 availableMargin,
+            int256 margin,
+            int256 settleableMargin,
+            bool isInitialMarginSafe,
+            bool isMaintenanceMarginSafe,
+            bool isMarginSafe,
+            int256 targetLeverage
+        )
+    {
+        MarginAccount memory account = marginAccounts[trader];
+        cash = account.cash;
+        position = account.position;
+        margin = _margin(account);
+        availableMargin = margin - _requiredMargin(position, initialMarginRate);
+        settleableMargin = margin;
+        isInitialMarginSafe = availableMargin >= 0;
+        isMaintenanceMarginSafe =
+            margin >= _requiredMargin(position, maintenanceMarginRate);
+        isMarginSafe = margin >= 0;
+        targetLeverage = account.targetLeverage;
+    }
+
+    function getPerpetualInfo(uint256)
+        external
+        view
+        override
+        returns (
+            PerpetualState,
+            address,
+            int256[39] memory nums
+        )
+    {
+        int256 price = _price();
+        nums[0] = int256(collateral.balanceOf(address(this))) * decimalShift;
+        nums[1] = price;
+        nums[2] = price;
+        nums[3] = fundingRate;
+        nums[4] = unitAccumulativeFunding;
+        nums[5] = initialMarginRate;
+        nums[6] = maintenanceMarginRate;
+        nums[8] = tradeFeeRate;
+        nums[13] = halfSpread;
+        return (state, address(oracle), nums);
+    }
+
+    function getLiquidityPoolInfo()
+        external
+        view
+        override
+        returns (
+            bool isRunning,
+            bool isFastCreationEnabled,
+            address[7] memory addresses,
+            int256[5] memory intNums,
+            uint256[6] memory uintNums
+        )
+    {
+        isRunning = true;
+        addresses[5] = address(collateral);
+        uintNums[0] = IERC20Metadata(address(collateral)).decimals();
+        uintNums[1] = 1;
+        uintNums[2] = lastFundingTime;
+        return (
+            isRunning,
+            isFastCreationEnabled,
+            addresses,
+            intNums,
+            uintNums
+        );
+    }
+
+    /**********************
+     * INTERNAL FUNCTIONS *
+     **********************/
+
+    function _price() internal view returns (int256 price) {
+        (price, ) = oracle.priceTWAPLong();
+    }
+
+    function _tradePrice(int256 amount)
+        internal
+        view
+        returns (int256 price, int256 fee)
+    {
+        int256 spread = amount > 0 ? halfSpread : -halfSpread;
+        price = (_price() * (1e18 + spread)) / 1e18;
+        fee = (((_abs(amount) * price) / 1e18) * tradeFeeRate) / 1e18;
+    }
+
+    function _margin(MarginAccount memory account)
+        internal
+        view
+        returns (int256)
+    {
+        return
+            account.cash +
+            (account.position * (_price() - unitAccumulativeFunding)) /
+            1e18;
+    }
+
+    function _requiredMargin(int256 position, int256 rate)
+        internal
+        view
+        returns (int256)
+    {
+        return (((_abs(position) * _price()) / 1e18) * rate) / 1e18;
+    }
+
+    // an account that increased its position has to keep the initial margin
+    function _isSafe(address trader, bool initial)
+        internal
+        view
+        returns (bool)
+    {
+        MarginAccount memory account = marginAccounts[trader];
+        int256 margin = _margin(account);
+        if (initial && account.position != 0) {
+            return
+                margin >=
+                _requiredMargin(account.position, initialMarginRate);
+        }
+        return margin >= 0;
+    }
+
+    function _abs(int256 x) internal pure returns (int256) {
+        return x >= 0 ? x : -x;
+    }
+}
@@ -0,0 +1,58 @@
+// SPDX-License-Identifier: AGPL V3.0
+pragma solidity 0.8.4;
+
+import "../../interfaces/IOracle.sol";
+
+/*
+MCDEX oracle used for testing on the development network. The price is set by any
+account and is both the mark and the index price.
+*/
+
+contract MockOracle is IOracle {
+    int256 public price;
+    uint256 public timestamp;
+
+    constructor(int256 _price) {
+        setPrice(_price);
+    }
+
+    function setPrice(int256 _price) public {
+        require(_price > 0, "!_price");
+        price = _price;
+        timestamp = block.timestamp;
+    }
+
+    function isMarketClosed() external pure override returns (bool) {
+        return false;
+    }
+
+    function isTerminated() external pure override returns (bool) {
+        return false;
+    }
+
+    function collateral() external pure override returns (string memory) {
+        return "USDC";
+    }
+
+    function underlyingAsset() external pure override returns (string memory) {
+        return "ETH";
+    }
+
+    function priceTWAPLong()
+        external
+        view
+        override
+        returns (int256 newPrice, uint256 newTimestamp)
+    {
+        return (price, timestamp);
+    }
+
+    function priceTWAPShort()
+        external
+        view
+        override
+        returns (int256 newPrice, uint256 newTimestamp)
+    {
+        return (price, timestamp);
+    }
+}
@@ -0,0 +1,167 @@
+// SPDX-License-Identifier: AGPL V3.0
+pragma solidity 0.8.4;
+
+import "./MockOracle.sol";
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/IERC20Metadata.sol";
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "@uniswap/v3-periphery/contracts/interfaces/ISwapRouter.sol";
+
+/*
+Uniswap router used for testing on the development network, with the single swaps of
+the v3 router and the exact input swap of a v2 router. It swaps want and long out of
+its own balance at the oracle price less the fee: the fee tier of a v3 swap or v2Fee,
+both in 1e6 = 100%. A v2 path may route through other tokens, every hop pays v2Fee but
+only the ends of the path are priced.
+*/
+
+contract MockSwapRouter {
+    using SafeERC20 for IERC20;
+
+    // uniswap fee unit
+    uint256 public constant FEE_UNIT = 1e6;
+
+    MockOracle public oracle;
+    address public want;
+    address public long;
+    uint256 public v2Fee = 3000;
+
+    constructor(
+        address _oracle,
+        address _want,
+        address _long
+    ) {
+        oracle = MockOracle(_oracle);
+        want = _want;
+        long = _long;
+    }
+
+    function setV2Fee(uint256 _v2Fee) external {
+        require(_v2Fee < FEE_UNIT, "!_v2Fee");
+        v2Fee = _v2Fee;
+    }
+
+    /**************
+     * UNISWAP V3 *
+     **************/
+
+    function exactInputSingle(
+        ISwapRouter.ExactInputSingleParams calldata params
+    ) external returns (uint256 amountOut) {
+        require(params.deadline >= block.timestamp, "Transaction too old");
+        amountOut = _quote(
+            (params.amountIn * (FEE_UNIT - params.fee)) / FEE_UNIT,
+            params.tokenIn,
+            params.tokenOut
+        );
+        require(amountOut >= params.amountOutMinimum, "Too little received");
+        _settle(
+            params.tokenIn,
+            params.tokenOut,
+            params.amountIn,
+            amountOut,
+            params.recipient
+        );
+    }
+
+    function exactOutputSingle(
+        ISwapRouter.ExactOutputSingleParams calldata params
+    ) external returns (uint256 amountIn) {
+        require(params.deadline >= block.timestamp, "Transaction too old");
+        // the input is rounded up, a swap never pays out more than it is worth
+        (uint256 numerator, uint256 denominator) = _rate(
+            params.tokenIn,
+            params.tokenOut
+        );
+        amountIn = _ceilDiv(params.amountOut * denominator, numerator);
+        amountIn = _ceilDiv(amountIn * FEE_UNIT, FEE_UNIT - params.fee);
+        require(amountIn <= params.amountInMaximum, "Too much requested");
+        _settle(
+            params.tokenIn,
+            params.tokenOut,
+            amountIn,
+            params.amountOut,
+            params.recipient
+        );
+    }
+
+    /**************
+     * UNISWAP V2 *
+     **************/
+
+    function getAmountsOut(uint256 amountIn, address[] memory path)
+        public
+        view
+        returns (uint256[] memory amounts)
+    {
+        require(path.length >= 2, "UniswapV2Library: INVALID_PATH");
+        amounts = new uint256[](path.length);
+        amounts[0] = amountIn;
+        for (uint256 i = 1; i < path.length; i++) {
+            amounts[i] = (amounts[i - 1] * (FEE_UNIT - v2Fee)) / FEE_UNIT;
+        }
+        uint256 last = path.length - 1;
+        amounts[last] = _quote(amounts[last], path[0], path[last]);
+    }
+
+    function swapExactTokensForTokens(
+        uint256 amountIn,
+        uint256 amountOutMin,
+        address[] calldata path,
+        address to,
+        uint256 deadline
+    ) external returns (uint256[] memory amounts) {
+        require(deadline >= block.timestamp, "UniswapV2Router: EXPIRED");
+        amounts = getAmountsOut(amountIn, path);
+        uint256 amountOut = amounts[path.length - 1];
+        require(
+            amountOut >= amountOutMin,
+            "UniswapV2Router: INSUFFICIENT_OUTPUT_AMOUNT"
+        );
+        _settle(path[0], path[path.length - 1], amountIn, amountOut, to);
+    }
+
+    /**********************
+     * INTERNAL FUNCTIONS *
+     **********************/
+
+    function _settle(
+        address tokenIn,
+        address tokenOut,
+        uint256 amountIn,
+        uint256 amountOut,
+        address recipient
+    ) internal {
+        IERC20(tokenIn).safeTransferFrom(msg.sender, address(this), amountIn);
+        IERC20(tokenOut).safeTransfer(recipient, amountOut);
+    }
+
+    function _quote(
+        uint256 amountIn,
+        address tokenIn,
+        address tokenOut
+    ) internal view returns (uint256) {
+        (uint256 numerator, uint256 denominator) = _rate(tokenIn, tokenOut);
+        return (amountIn * numerator) / denominator;
+    }
+
+    // units of tokenOut per unit of tokenIn as a fraction, in the token decimals
+    function _rate(address tokenIn, address tokenOut)
+        internal
+        view
+        returns (uint256 numerator, uint256 denominator)
+    {
+        (int256 price, ) = oracle.priceTWAPLong();
+        uint256 wantUnit = 10**IERC20Metadata(want).decimals();
+        uint256 longUnit = 10**IERC20Metadata(long).decimals();
+        if (tokenIn == long && tokenOut == want) {
+            return (uint256(price) * wantUnit, 1e18 * longUnit);
+        }
+        require(tokenIn == want && tokenOut == long, "!pair");
+        return (1e18 * longUnit, uint256(price) * wantUnit);
+    }
+
+    function _ceilDiv(uint256 a, uint256 b) internal pure returns (uint256) {
+        return (a + b - 1) / b;
+    }
+}
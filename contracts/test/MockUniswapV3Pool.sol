@@ -0,0 +1,23 @@
+// SPDX-License-Identifier: AGPL V3.0
+pragma solidity 0.8.4;
+
+/*
+Uniswap v3 pool used for testing on the development network, the strategy only reads
+the fee tier. The swaps are made by MockSwapRouter.
+*/
+
+contract MockUniswapV3Pool {
+    address public token0;
+    address public token1;
+    uint24 public fee;
+
+    constructor(
+        address _token0,
+        address _token1,
+        uint24 _fee
+    ) {
+        token0 = _token0;
+        token1 = _token1;
+        fee = _fee;
+    }
+}
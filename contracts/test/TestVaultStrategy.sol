@@ -0,0 +1,45 @@
+// SPDX-License-Identifier: AGPL V3.0
+pragma solidity 0.8.4;
+
+import "../BasisVault.sol";
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "@openzeppelin/contracts/utils/math/Math.sol";
+
+/*
+Strategy stand-in used for testing the vault accounting. It holds the want it is
+lent, reports whatever gain or loss it is told to and pays withdrawals out of its
+balance, recording the shortfall as a loss like BasisStrategy.withdraw.
+*/
+
+contract TestVaultStrategy {
+    using SafeERC20 for IERC20;
+
+    BasisVault public vault;
+    IERC20 public want;
+
+    constructor(address _vault) {
+        vault = BasisVault(_vault);
+        want = BasisVault(_vault).want();
+    }
+
+    function update(uint256 _amount, bool _loss) external returns (uint256) {
+        return vault.update(_amount, _loss);
+    }
+
+    // lose want without reporting it, e.g. to a liquidation
+    function lose(uint256 _amount) external {
+        want.safeTransfer(msg.sender, _amount);
+    }
+
+    function withdraw(uint256 _amount)
+        external
+        returns (uint256 loss, uint256 withdrawn)
+    {
+        require(msg.sender == address(vault), "!vault");
+        require(_amount > 0, "withdraw: _amount is 0");
+        withdrawn = Math.min(_amount, want.balanceOf(address(this)));
+        loss = _amount - withdrawn;
+        want.safeTransfer(address(vault), withdrawn);
+    }
+}
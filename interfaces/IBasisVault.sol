@@ -9,4 +9,8 @@ interface IBasisVault {
     function update(uint256, bool) external returns (uint256);
 
     function want() external returns (IERC20);
+
+    function availableToDeposit() external view returns (uint256);
+
+    function strategy() external view returns (address);
 }
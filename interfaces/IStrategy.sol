@@ -8,9 +8,24 @@ interface IStrategy {
 
     function getFundingRate() external view returns (int256);
 
+    function getUnitAccumulativeFunding() external view returns (int256);
+
     function setKeeper(address) external;
 
     function isUnwind() external view returns (bool);
 
     function unwind() external;
+
+    function harvestPreview()
+        external
+        view
+        returns (
+            uint256 fee,
+            bool loss,
+            uint256 toActivate,
+            uint256 shortPosition,
+            uint256 longPosition,
+            uint256 bufferPosition,
+            int256 marginAfter
+        );
 }
@@ -0,0 +1,13 @@
+// SPDX-License-Identifier: AGPL V3.0
+pragma solidity 0.8.4;
+
+interface IVaultRegistry {
+    function isVault(address) external view returns (bool);
+
+    function activeVaultCount() external view returns (uint256);
+
+    function getActiveVaults(uint256, uint256)
+        external
+        view
+        returns (address[] memory);
+}
@@ -0,0 +1,46 @@
+import numpy as np
+
+# columns of a series csv, funding is read from whichever funding column is present
+PRICE_COLUMN = "price"
+FUNDING_RATE_COLUMN = "funding_rate"
+ACCUMULATIVE_FUNDING_COLUMN = "unit_accumulative_funding"
+
+
+def funding_from_rates(prices, funding_rates):
+    """
+    @dev
+        Funding paid to a short of one contract per period from the funding rate of each
+        period, MCDEX charges the rate on the mark price.
+    """
+    return np.asarray(prices, dtype=float) * np.asarray(funding_rates, dtype=float)
+
+
+def funding_from_accumulative(unit_accumulative_funding):
+    """
+    @dev
+        Funding per period from samples of the MCDEX unitAccumulativeFunding, nothing is
+        paid in the first period.
+    """
+    accumulative = np.asarray(unit_accumulative_funding, dtype=float)
+    return np.diff(accumulative, axis=0, prepend=accumulative[:1])
+
+
+def load_csv(path):
+    """
+    @dev
+        Loads a price and funding series, one row per period. The csv has a header with
+        a price column and either a funding_rate or a unit_accumulative_funding column,
+        other columns such as a timestamp are ignored.
+    @return prices, funding, ready for run_backtest
+    """
+    rows = np.genfromtxt(path, delimiter=",", names=True, dtype=float)
+    columns = rows.dtype.names
+    prices = rows[PRICE_COLUMN]
+    if FUNDING_RATE_COLUMN in columns:
+        return prices, funding_from_rates(prices, rows[FUNDING_RATE_COLUMN])
+    if ACCUMULATIVE_FUNDING_COLUMN in columns:
+        funding = funding_from_accumulative(rows[ACCUMULATIVE_FUNDING_COLUMN])
+        return prices, funding
+    raise ValueError(
+        f"{path} has no {FUNDING_RATE_COLUMN} or {ACCUMULATIVE_FUNDING_COLUMN} column"
+    )
@@ -0,0 +1,289 @@
+from dataclasses import dataclass
+import numpy as np
+
+# BasisStrategy.MAX_BPS, the unit of the strategy buffer
+STRATEGY_MAX_BPS = 1_000_000
+# BasisVault.MAX_BPS, the unit of the vault fees and idle reserve
+VAULT_MAX_BPS = 10_000
+# BasisVault.SECS_PER_YEAR
+SECS_PER_YEAR = 31_556_952
+# MCDEX funding period, the default period of the price and funding series
+FUNDING_PERIOD = 8 * 3600
+
+
+@dataclass
+class BacktestConfig:
+    """
+    Parameters of a backtest, in the units of the contracts. Any parameter can be a
+    NumPy array with one value per path to sweep it in a single run.
+    """
+
+    # BasisStrategy.buffer, 1e6 = 100%
+    buffer: object = 100_000
+    # BasisVault.performanceFee and managementFee, 1e4 = 100%
+    performance_fee: object = 2500
+    management_fee: object = 0
+    # BasisVault.idleReserve, 1e4 = 100%
+    idle_reserve: object = 0
+    # periods between harvests and harvests between remargins, 0 never remargins
+    harvest_interval: int = 1
+    remargin_interval: int = 0
+    # remargin at a harvest when the margin ratio is below it, 0 disables it
+    remargin_margin_ratio: object = 0
+    # uniswap pool fee and MCDEX trading fee as a fraction of the traded value
+    swap_fee: object = 0.0005
+    trade_fee: object = 0.0007
+    # price impact of every swap and perpetual trade as a fraction of the price,
+    # stands in for the slippageTolerance the trades are allowed to fill at
+    slippage: object = 0.0
+    # MCDEX initial margin rate, a margin below it is a margin call (not isInitialMarginSafe)
+    initial_margin_rate: object = 0.05
+    # MCDEX maintenance margin rate, a margin below it is liquidated
+    maintenance_margin_rate: object = 0.03
+    # seconds per period of the series
+    period: int = FUNDING_PERIOD
+
+
+@dataclass
+class BacktestResult:
+    # per period and path
+    price_per_share: np.ndarray
+    total_assets: np.ndarray
+    nav: np.ndarray
+    margin_ratio: np.ndarray
+    # per path
+    fee_shares: np.ndarray
+    remargins: np.ndarray
+    # first period below the margin rate, -1 if never
+    margin_called_at: np.ndarray
+    liquidated_at: np.ndarray
+    period: int
+
+    @property
+    def margin_called(self):
+        return self.margin_called_at >= 0
+
+    @property
+    def liquidated(self):
+        return self.liquidated_at >= 0
+
+    def apr(self):
+        """
+        @dev
+            Annualised return of the share price over the whole series.
+        @return apr per path, 1 = 100%
+        """
+        years = (len(self.price_per_share) - 1) * self.period / SECS_PER_YEAR
+        return (self.price_per_share[-1] / self.price_per_share[0] - 1) / years
+
+    def apy(self):
+        """
+        @dev
+            Compounded annual return of the share value marked to market, the nav per
+            share. A liquidated path counts as a total loss from liquidated_at on.
+        @return apy per path, 1 = 100%
+        """
+        years = (len(self.nav) - 1) * self.period / SECS_PER_YEAR
+        value = self.nav * self.price_per_share / self.total_assets
+        value = np.where(self.liquidated, 0, value[-1]) / value[0]
+        return value ** (1 / years) - 1
+
+
+# config fields that can hold one value per path
+PATH_PARAMETERS = (
+    "buffer",
+    "performance_fee",
+    "management_fee",
+    "idle_reserve",
+    "swap_fee",
+    "trade_fee",
+    "slippage",
+    "remargin_margin_ratio",
+    "initial_margin_rate",
+    "maintenance_margin_rate",
+)
+
+
+def _per_period(values, periods, paths):
+    values = np.asarray(values, dtype=float)
+    if len(values) != periods:
+        raise ValueError(f"series of {len(values)} periods, expected {periods}")
+    # a series without a path axis applies to every path
+    values = values.reshape(values.shape + (1,) * (1 + len(paths) - values.ndim))
+    return np.broadcast_to(values, (periods,) + paths).reshape(periods, -1)
+
+
+def _per_path(value, paths, scale=1):
+    return np.broadcast_to(np.asarray(value, dtype=float) / scale, paths).ravel()
+
+
+def _first(below):
+    return np.where(below.any(0), below.argmax(0), -1)
+
+
+def run_backtest(
+    prices, funding, config=None, initial_deposit=1_000_000, deposits=None
+):
+    """
+    @dev
+        Replays a price and funding series through the BasisVault and BasisStrategy
+        accounting: deposits wait in the vault until a harvest, a harvest withdraws the
+        funding accrued since the previous one (_determineFee), issues the protocol fee
+        shares (_determineProtocolFees) and splits the funds into the buffer, long and
+        short positions (_calculateSplit, _openPerpPosition), and every
+        remargin_interval harvests, or at a harvest that finds the margin ratio below
+        remargin_margin_ratio, the positions are rebalanced with the K ratio of
+        remargin. The share price follows totalLent like pricePerShare, nav marks the
+        strategy to market.
+
+        Only the harvests are stepped through, once for all paths. The positions do not
+        change between harvests, so the per period series are evaluated for every period
+        at once afterwards. The series are (periods,) or (periods, paths).
+    @param prices Mark price of the long asset in want.
+    @param funding Funding paid to a short of one contract during each period in want,
+           the increase of the MCDEX unitAccumulativeFunding.
+    @param config BacktestConfig, defaults if omitted.
+    @param initial_deposit Want deposited before the first period.
+    @param deposits Want deposited during each period, optional. Deposits are lent
+           at the next harvest.
+    @return BacktestResult
+    """
+    config = config or BacktestConfig()
+    if initial_deposit <= 0:
+        raise ValueError("initial_deposit has to be positive")
+    periods = len(prices)
+    paths = np.broadcast_shapes(
+        np.shape(prices)[1:],
+        np.shape(funding)[1:],
+        np.shape(deposits)[1:],
+        *(np.shape(getattr(config, name)) for name in PATH_PARAMETERS),
+    )
+    # the paths are flattened while stepping and reshaped in the result
+    prices = _per_period(prices, periods, paths)
+    accumulative = np.cumsum(_per_period(funding, periods, paths), axis=0)
+    if deposits is None:
+        deposits = np.zeros(periods)
+    deposits = _per_period(deposits, periods, paths)
+
+    # state at the harvests
+    harvests = np.arange(0, periods, config.harvest_interval)
+    harvest_prices = prices[harvests]
+    harvest_funding = accumulative[harvests]
+    # deposits of each period are lent at the harvest at or after it
+    harvest_deposits = np.diff(np.cumsum(deposits, axis=0)[harvests], axis=0, prepend=0)
+
+    buffer = _per_path(config.buffer, paths, STRATEGY_MAX_BPS)
+    swap_cost = _per_path(np.add(config.swap_fee, config.slippage), paths)
+    trade_cost = _per_path(np.add(config.trade_fee, config.slippage), paths)
+    performance_fee = _per_path(config.performance_fee, paths, VAULT_MAX_BPS)
+    # management fee of one harvest interval
+    management_fee = _per_path(
+        config.management_fee,
+        paths,
+        VAULT_MAX_BPS * SECS_PER_YEAR / (config.harvest_interval * config.period),
+    )
+    idle_reserve = _per_path(config.idle_reserve, paths, VAULT_MAX_BPS)
+    # share of the short in the short and buffer positions, K of remargin
+    half = (1 - buffer) / 2
+    k_ratio = half / (half + buffer)
+    remargin_margin_ratio = _per_path(config.remargin_margin_ratio, paths)
+    remargin_on_ratio = remargin_margin_ratio.any()
+
+    size = len(buffer)
+    # vault
+    total_supply = np.full(size, float(initial_deposit))
+    idle = np.full(size, float(initial_deposit))
+    total_lent = np.zeros(size)
+    fee_shares = np.zeros(size)
+    # strategy, position is negative for a short like the MCDEX position
+    position = np.zeros(size)
+    cash = np.zeros(size)
+    long = np.zeros(size)
+    gain = np.zeros(size)
+    remargins = np.zeros(size, dtype=int)
+
+    states = np.empty((6, len(harvests), size))
+    for i in range(len(harvests)):
+        price = harvest_prices[i]
+        deposited = harvest_deposits[i]
+        # BasisVault._calcSharesIssuable
+        total_supply += deposited * total_supply / (idle + total_lent)
+        idle += deposited
+
+        # _determineFee: funding accrued by the live position since the last harvest
+        if i > 0:
+            accrued = position * (harvest_funding[i - 1] - harvest_funding[i])
+            gain = np.maximum(accrued, 0)
+            # the gain is withdrawn from the margin account, a loss stays in it
+            cash += accrued - gain
+            # vault.update: protocol fees are issued as shares before the gain is lent
+            fee = np.minimum(gain * performance_fee + total_lent * management_fee, gain)
+            minted = fee * total_supply / (idle + total_lent)
+            total_supply += minted
+            fee_shares += minted
+            total_lent += accrued
+
+        to_deposit = np.maximum(idle - (idle + total_lent) * idle_reserve, 0)
+        idle -= to_deposit
+        total_lent += to_deposit
+
+        # _calculateSplit and _openPerpPosition
+        to_activate = gain + to_deposit
+        buffer_position = to_activate * buffer
+        long_want = (to_activate - buffer_position) / 2
+        long += long_want * (1 - swap_cost) / price
+        cash += to_activate - long_want
+        # the short is capped at the long balance
+        short_want = to_activate - buffer_position - long_want
+        contracts = np.minimum(short_want / price, long + position)
+        position -= contracts
+        cash += contracts * price * (1 - trade_cost)
+
+        due = config.remargin_interval and (i + 1) % config.remargin_interval == 0
+        if remargin_on_ratio and not due:
+            # the margin ratio is -margin / (position * price)
+            due = cash + position * price * (1 + remargin_margin_ratio) < 0
+        if np.any(due):
+            margin = cash + position * price
+            unwind = (price * -position - k_ratio * margin) / ((1 + k_ratio) * price)
+            unwind *= due
+            remargins += due
+            close = np.maximum(unwind, 0)
+            reopen = np.maximum(-unwind, 0)
+            # close part of the short with the long swapped back to want, or open more
+            # short and buy long with the margin it frees
+            long += reopen * (1 - swap_cost) - close
+            position += close - reopen
+            cash -= close * price * (swap_cost + trade_cost)
+            cash -= reopen * price * trade_cost
+
+        states[0, i] = idle
+        states[1, i] = total_lent
+        states[2, i] = total_supply
+        states[3, i] = position
+        states[4, i] = cash
+        states[5, i] = long
+
+    # positions are constant until the next harvest
+    at = np.arange(periods) // config.harvest_interval
+    idle, total_lent, total_supply, position, cash, long = states[:, at]
+    funding_since = accumulative - harvest_funding[at]
+    margin = cash - position * funding_since + position * prices
+    notional = -position * prices
+    margin_ratio = np.divide(
+        margin, notional, out=np.full_like(margin, np.inf), where=notional > 0
+    )
+    shape = (periods,) + paths
+    initial_margin_rate = _per_path(config.initial_margin_rate, paths)
+    maintenance_margin_rate = _per_path(config.maintenance_margin_rate, paths)
+    return BacktestResult(
+        price_per_share=((idle + total_lent) / total_supply).reshape(shape),
+        total_assets=(idle + total_lent).reshape(shape),
+        nav=(idle + long * prices + margin).reshape(shape),
+        margin_ratio=margin_ratio.reshape(shape),
+        fee_shares=fee_shares.reshape(paths),
+        remargins=remargins.reshape(paths),
+        margin_called_at=_first(margin_ratio < initial_margin_rate).reshape(paths),
+        liquidated_at=_first(margin_ratio < maintenance_margin_rate).reshape(paths),
+        period=config.period,
+    )
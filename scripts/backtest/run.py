@@ -0,0 +1,40 @@
+import argparse
+import numpy as np
+from scripts.backtest.data import load_csv
+from scripts.backtest.engine import BacktestConfig, run_backtest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Backtest the basis strategy on a price and funding csv"
+    )
+    parser.add_argument("csv")
+    parser.add_argument(
+        "--buffer", type=int, nargs="+", default=[100_000], help="1e6 = 100%%"
+    )
+    parser.add_argument("--harvest-interval", type=int, default=1)
+    parser.add_argument("--remargin-interval", type=int, default=0)
+    parser.add_argument("--slippage", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    prices, funding = load_csv(args.csv)
+    config = BacktestConfig(
+        buffer=np.array(args.buffer),
+        harvest_interval=args.harvest_interval,
+        remargin_interval=args.remargin_interval,
+        slippage=args.slippage,
+    )
+    result = run_backtest(prices, funding, config)
+    apr = result.apr()
+    min_margin_ratio = result.margin_ratio.min(0)
+    for i, buffer in enumerate(args.buffer):
+        liquidated = result.liquidated_at[i]
+        print(
+            f"buffer {buffer}: apr {apr[i]:.2%}, "
+            f"min margin ratio {min_margin_ratio[i]:.3f}, "
+            f"liquidated {'at period ' + str(liquidated) if liquidated >= 0 else 'never'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+import numpy as np
+from scripts.backtest.engine import (
+    FUNDING_PERIOD,
+    SECS_PER_YEAR,
+    BacktestConfig,
+    run_backtest,
+)
+
+# paths simulated per task, bounds the memory of a worker to a few hundred MB
+CHUNK_SIZE = 100
+# buffers of config/<chain>/deploy.json and the values around them
+DEFAULT_BUFFERS = (25_000, 50_000, 100_000, 150_000, 200_000, 300_000, 400_000)
+
+
+@dataclass
+class MarketModel:
+    """
+    Random price and funding paths: the price follows a geometric brownian motion
+    with jumps, the funding rate per period mean reverts around funding_mean.
+    Volatilities are annualised.
+    """
+
+    price: float = 2000
+    drift: float = 0
+    volatility: float = 0.8
+    # chance of a jump per period and the volatility of its log size
+    jump_probability: float = 0.002
+    jump_volatility: float = 0.15
+    funding_mean: float = 0.0001
+    funding_volatility: float = 0.002
+    # share of the distance to funding_mean closed every period
+    funding_reversion: float = 0.05
+
+    def generate(self, periods, paths, rng, period=FUNDING_PERIOD):
+        """
+        @dev
+            Draws price and funding paths.
+        @return prices, funding of shape (periods, paths), ready for run_backtest
+        """
+        dt = period / SECS_PER_YEAR
+        returns = rng.normal(
+            (self.drift - self.volatility**2 / 2) * dt,
+            self.volatility * np.sqrt(dt),
+            (periods, paths),
+        )
+        jumps = rng.random((periods, paths)) < self.jump_probability
+        returns += jumps * rng.normal(0, self.jump_volatility, (periods, paths))
+        returns[0] = 0
+        prices = self.price * np.exp(np.cumsum(returns, axis=0))
+
+        shocks = rng.normal(0, self.funding_volatility * np.sqrt(dt), (periods, paths))
+        rates = np.empty((periods, paths))
+        rates[0] = self.funding_mean
+        for t in range(1, periods):
+            rates[t] = (
+                rates[t - 1]
+                + self.funding_reversion * (self.funding_mean - rates[t - 1])
+                + shocks[t]
+            )
+        return prices, prices * rates
+
+
+@dataclass
+class StressResult:
+    buffer: int
+    margin_call_probability: float
+    liquidation_probability: float
+    expected_apy: float
+    # 5th percentile of the apy
+    apy_p5: float
+    mean_remargins: float
+
+
+def _simulate(model, config, buffers, periods, paths, seed):
+    rng = np.random.default_rng(seed)
+    prices, funding = model.generate(periods, paths, rng, config.period)
+    # paths along the first axis, buffers along the second
+    config = replace(config, buffer=np.asarray(buffers))
+    result = run_backtest(prices[:, :, None], funding[:, :, None], config)
+    return result.margin_called, result.liquidated, result.apy(), result.remargins
+
+
+def stress_test(
+    buffers=DEFAULT_BUFFERS,
+    model=None,
+    config=None,
+    paths=10_000,
+    years=1,
+    seed=0,
+    workers=None,
+    chunk_size=CHUNK_SIZE,
+):
+    """
+    @dev
+        Runs the backtest model over a grid of buffers on the same random paths, the
+        paths are split into chunks simulated in a process pool. Every chunk has its own
+        seed from seed, so a sweep is reproducible for any number of workers.
+    @param buffers Strategy buffers to compare, 1e6 = 100%.
+    @param config BacktestConfig of the other parameters, its buffer is ignored.
+           Remargins are counted when remargin_interval or remargin_margin_ratio is set.
+    @param workers Processes of the pool, the number of cpus if omitted.
+    @return list of StressResult, in the order of buffers
+    """
+    model = model or MarketModel()
+    config = config or BacktestConfig(remargin_margin_ratio=0.5)
+    periods = int(years * SECS_PER_YEAR / config.period) + 1
+    sizes = [min(chunk_size, paths - start) for start in range(0, paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = list(
+            executor.map(
+                _simulate,
+                [model] * len(sizes),
+                [config] * len(sizes),
+                [buffers] * len(sizes),
+                [periods] * len(sizes),
+                sizes,
+                seeds,
+            )
+        )
+    margin_called, liquidated, apy, remargins = (
+        np.concatenate(metric) for metric in zip(*chunks)
+    )
+    return [
+        StressResult(
+            buffer=buffer,
+            margin_call_probability=margin_called[:, i].mean(),
+            liquidation_probability=liquidated[:, i].mean(),
+            expected_apy=apy[:, i].mean(),
+            apy_p5=np.percentile(apy[:, i], 5),
+            mean_remargins=remargins[:, i].mean(),
+        )
+        for i, buffer in enumerate(buffers)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Monte Carlo stress test of the strategy buffer"
+    )
+    parser.add_argument("--buffers", type=int, nargs="+", default=DEFAULT_BUFFERS)
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--volatility", type=float, default=MarketModel.volatility)
+    parser.add_argument(
+        "--remargin-margin-ratio",
+        type=float,
+        default=0.5,
+        help="remargin at a harvest below this margin ratio, 0 never remargins",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = stress_test(
+        args.buffers,
+        model=MarketModel(volatility=args.volatility),
+        config=BacktestConfig(remargin_margin_ratio=args.remargin_margin_ratio),
+        paths=args.paths,
+        years=args.years,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    print("buffer   margin call  liquidation  apy      apy p5   remargins")
+    for result in results:
+        print(
+            f"{result.buffer:<8} {result.margin_call_probability:<12.2%} "
+            f"{result.liquidation_probability:<12.2%} {result.expected_apy:<8.2%} "
+            f"{result.apy_p5:<8.2%} {result.mean_remargins:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,10 +12,12 @@ from brownie import (
     KeeperManager,
     accounts,
     interface,
-    web3,
 )
 
 ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+# gas of a performUpkeep besides the strategies and the gas of a harvest or unwind
+UPKEEP_BASE_GAS = 200000
+UPKEEP_STRATEGY_GAS = 1500000
 
 
 def main():
@@ -77,6 +79,7 @@ def main():
 
     if deploy_config["use_alchemy_keeper"]:
         keeper = KeeperManager.at(utils_addresses["keeper_address"])
+        max_per_upkeep = deploy_config["keeper_max_per_upkeep"]
 
         if keeper.owner() == ZERO_ADDRESS:
             keeper.initialize(
@@ -85,12 +88,28 @@ def main():
                 {"from": safe.account},
             )
 
-        register_alchemy_upkeep(
-            safe.account,
-            utils_addresses["keeper_address"],
-            strategy_address,
-            f"Vortex Keeper {vault.symbol()}",
-        )
+        # one upkeep walks every active vault of the registry, new vaults only
+        # have to be registered. A keeper without a vault registry gets that upkeep
+        # once, also when it replaces a keeper with an upkeep per strategy
+        if keeper.vaultRegistry() != registry.address:
+            if keeper.vaultRegistry() == ZERO_ADDRESS:
+                register_alchemy_upkeep(
+                    safe.account,
+                    utils_addresses["keeper_address"],
+                    "Vortex Keeper",
+                    max_per_upkeep,
+                )
+            keeper.setVaultRegistry(registry, {"from": safe.account})
+
+        if keeper.maxPerUpkeep() != max_per_upkeep:
+            keeper.setMaxPerUpkeep(max_per_upkeep, {"from": safe.account})
+
+        # strategies of vaults registered before are moved to this keeper
+        vaults = registry.getActiveVaults(0, registry.activeVaultCount())
+        for address in vaults:
+            active_strategy = BasisStrategy.at(BasisVault.at(address).strategy())
+            if active_strategy.keeper() != keeper.address:
+                active_strategy.setKeeper(keeper, {"from": safe.account})
 
     safe_tx = safe.multisend_from_receipts()
 
@@ -102,9 +121,7 @@ def main():
     safe.post_transaction(safe_tx)
 
 
-def register_alchemy_upkeep(
-    safe_account, upkeep_address, strategy_address, upkeep_name
-):
+def register_alchemy_upkeep(safe_account, upkeep_address, upkeep_name, max_per_upkeep):
     utils_addresses = get_utils_addresses()
 
     registry = Contract.from_explorer(utils_addresses["upkeep_registry"])
@@ -123,9 +140,12 @@ def register_alchemy_upkeep(
 
     # encrypted team@akropolis.io
     encrypted_email = "0x53636aa464b01c808a1e950140569f4bb02a76adf5a847fe90af307782d8264248a05f3821f9f18d5b6e2f64e71a225ccc86a632e8e8d40c5921695029c419ca17f6335eff833a426862c411124554c6bb8835f64928d1eddb"
-    gas_limit = 2000000
+    # keeper.maxPerUpkeep caps the strategies of a perform, so the gas limit covers a
+    # harvest of each and the last one of a full batch does not run out of gas
+    gas_limit = UPKEEP_BASE_GAS + UPKEEP_STRATEGY_GAS * max_per_upkeep
     upkeep_admin = safe_account.address
-    check_data = f"0x{web3.eth.codec.encode_abi(['address'], [strategy_address]).hex()}"
+    # empty check data makes the keeper walk the vault registry
+    check_data = "0x"
     app_id = 97
     register_calldata = registar.register.encode_input(
         upkeep_name,
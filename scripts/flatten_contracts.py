@@ -21,5 +21,6 @@ def main():
         VaultRegistry,
         Faucet,
         KeeperManager,
+        VaultLens,
     ]
     _flattener(contracts_to_flatten)
@@ -0,0 +1,234 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from brownie import BasisStrategy, ZERO_ADDRESS, web3
+from scripts.utils.constants import (
+    get_deploy_config,
+    get_utils_addresses,
+    get_vaults_addresses,
+)
+from scripts.keeper.regime import POSITIVE, NEGATIVE, FundingRegimeDetector
+from scripts.keeper.scheduler import HarvestScheduler, native_price_from_config
+from scripts.keeper.subscriptions import Subscriber
+from scripts.keeper.transactions import TransactionPipeline
+from scripts.utils.lens import LensReader
+from scripts.utils.multicall import StateReader
+
+logger = logging.getLogger("keeper")
+
+HARVEST = "harvest"
+UNWIND = "unwind"
+
+
+def decide(funding_rate, is_unwind, preview=None, regime=None, hysteresis=False):
+    """
+    @dev
+        Same rule as KeeperManager.checkUpkeep: harvest while funding is positive,
+        otherwise unwind unless the strategy is already unwound.
+    @param preview Result of BasisStrategy.harvestPreview(), harvests that neither
+           accrue funding nor activate funds are skipped when it is given.
+    @param regime Funding regime from FundingRegimeDetector. When it is known an
+           unwound strategy only re-enters in a POSITIVE regime and an invested
+           strategy only unwinds in a NEGATIVE regime.
+    @param hysteresis True when the regime comes from a detector, an unknown regime
+           then keeps the current state like funding between the thresholds of
+           KeeperManager.
+    @return HARVEST, UNWIND or None when nothing has to be done
+    """
+    if hysteresis and regime is None:
+        return None
+    if regime is not None:
+        if is_unwind and regime != POSITIVE:
+            return None
+        if not is_unwind and funding_rate <= 0:
+            return UNWIND if regime == NEGATIVE else None
+    if funding_rate > 0:
+        if preview is not None and preview[0] == 0 and preview[2] == 0:
+            return None
+        return HARVEST
+    if not is_unwind:
+        return UNWIND
+    return None
+
+
+def strategy_addresses():
+    """
+    @dev
+        Strategies of the active vaults of the VaultRegistry set in
+        addresses/<chain>/utils.json, read with one lens call. Falls back to
+        addresses/<chain>/vaults.json when no registry is set.
+    @return list of strategy addresses
+    """
+    registry = get_utils_addresses().get("vaults_registry")
+    if not registry:
+        return [addresses["strategy"] for addresses in get_vaults_addresses()]
+    return [
+        info.strategy
+        for info in LensReader().read_registry(registry)
+        if info.strategy != ZERO_ADDRESS
+    ]
+
+
+class Keeper:
+    """
+    Long-running keeper for every strategy of the registered vaults.
+
+    The state of all strategies is read with a single aggregated call per tick and
+    blocking brownie transactions are pushed to a thread pool, so all strategies are
+    handled concurrently. The time between a funding flip and the reaction therefore
+    does not grow with the number of strategies. With a TransactionPipeline the
+    transactions of all strategies are in flight at once, so one stuck transaction
+    does not hold back the others.
+    """
+
+    def __init__(
+        self,
+        account,
+        strategies,
+        cooldown=0,
+        interval=60,
+        reader=None,
+        scheduler=None,
+        regime_detector=None,
+        pipeline=None,
+    ):
+        self.account = account
+        self.strategies = list(strategies)
+        self.cooldown = cooldown
+        self.interval = interval
+        self.reader = reader or StateReader()
+        self.scheduler = scheduler
+        self.regime_detector = regime_detector
+        self.pipeline = pipeline
+        self.last_upkeep = {strategy.address: 0 for strategy in self.strategies}
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self.strategies), 1))
+
+    @classmethod
+    def from_config(cls, account, interval=60):
+        strategies = [BasisStrategy.at(address) for address in strategy_addresses()]
+        deploy_config = get_deploy_config()
+        cooldown = deploy_config.get("keeper_cooldown", 0)
+        scheduler = HarvestScheduler(native_price_from_config(deploy_config))
+        regime_detector = FundingRegimeDetector(
+            enter_threshold=deploy_config.get("keeper_enter_threshold", 0),
+            exit_threshold=deploy_config.get("keeper_exit_threshold", 0),
+        )
+        pipeline = TransactionPipeline(
+            account, max_gas_price=deploy_config.get("keeper_max_gas_price")
+        )
+        return cls(
+            account,
+            strategies,
+            cooldown=cooldown,
+            interval=interval,
+            scheduler=scheduler,
+            regime_detector=regime_detector,
+            pipeline=pipeline,
+        )
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def _in_cooldown(self, strategy):
+        return time.time() - self.last_upkeep[strategy.address] <= self.cooldown
+
+    async def upkeep(self, strategy, state, gas_price):
+        regime = None
+        if self.regime_detector is not None:
+            regime = self.regime_detector.update(
+                strategy.address, state.funding_rate, state.unit_accumulative_funding
+            )
+        action = decide(
+            state.funding_rate,
+            state.is_unwind,
+            state.harvest_preview,
+            regime,
+            hysteresis=self.regime_detector is not None,
+        )
+        if action is None:
+            return None
+        if action == HARVEST and self.scheduler is not None:
+            decision = await self._call(
+                self.scheduler.decide, strategy, state, gas_price, self.account
+            )
+            if not decision.harvest:
+                return None
+        txid, gas_used = await self._send(strategy, action)
+        self.last_upkeep[strategy.address] = time.time()
+        if action == HARVEST and self.scheduler is not None:
+            self.scheduler.record(strategy, gas_used)
+        logger.info("%s %s in tx %s", action, strategy.address, txid)
+        return action
+
+    async def _send(self, strategy, action):
+        if self.pipeline is None:
+            tx = await self._call(getattr(strategy, action), {"from": self.account})
+            return tx.txid, tx.gas_used
+        receipt = await self.pipeline.send(getattr(strategy, action))
+        txid = receipt["transactionHash"].hex()
+        if receipt["status"] == 0:
+            raise ValueError(f"{action} of {strategy.address} reverted in tx {txid}")
+        return txid, receipt["gasUsed"]
+
+    async def tick(self, strategies=None):
+        if strategies is None:
+            strategies = self.strategies
+        due = [s for s in strategies if not self._in_cooldown(s)]
+        actions = {strategy.address: None for strategy in self.strategies}
+        try:
+            states, gas_price = await asyncio.gather(
+                self._call(self.reader.read_strategies, due),
+                self._call(lambda: web3.eth.gas_price),
+            )
+        except Exception as exc:
+            # a failed read skips the round instead of stopping run and watch
+            logger.error("reading %d strategies failed: %r", len(due), exc)
+            return actions
+        results = await asyncio.gather(
+            *(
+                self.upkeep(strategy, state, gas_price)
+                for strategy, state in zip(due, states)
+            ),
+            return_exceptions=True,
+        )
+        for strategy, result in zip(due, results):
+            if isinstance(result, Exception):
+                logger.error("upkeep of %s failed: %r", strategy.address, result)
+                result = None
+            actions[strategy.address] = result
+        return actions
+
+    async def run(self):
+        logger.info("keeping %d strategies", len(self.strategies))
+        while True:
+            started = time.monotonic()
+            await self.tick()
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+    async def watch(self, ws_url):
+        """
+        @dev
+            Event-driven alternative to run: strategies are only checked in the block
+            after one of their events or a log of their liquidity pool, and all of
+            them at least every interval seconds, so cooldowns and the scheduler's
+            maximum harvest interval are still honoured.
+        @param ws_url Websocket endpoint of the node, e.g. ws://127.0.0.1:8545
+        """
+        subscriber = Subscriber(ws_url, self.strategies)
+        logger.info("watching %d strategies on %s", len(self.strategies), ws_url)
+        last_full = time.monotonic()
+        async for block, changed in subscriber.heads():
+            if time.monotonic() - last_full >= self.interval:
+                changed = {strategy.address for strategy in self.strategies}
+                last_full = time.monotonic()
+            strategies = [s for s in self.strategies if s.address in changed]
+            if strategies:
+                logger.debug("block %d touched %d strategies", block, len(strategies))
+                await self.tick(strategies)
+
+    def run_once(self):
+        return asyncio.run(self.tick())
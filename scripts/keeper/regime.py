@@ -0,0 +1,68 @@
+import time
+from collections import defaultdict, deque
+
+POSITIVE = "positive"
+NEGATIVE = "negative"
+
+# number of funding samples in the rolling window
+REGIME_WINDOW = 12
+# samples needed before a regime is reported
+REGIME_MIN_SAMPLES = 3
+
+
+class FundingRegimeDetector:
+    """
+    Rolling-window funding regime detector with hysteresis.
+
+    The regime only switches to POSITIVE once the mean sampled funding rate rises
+    above enter_threshold, and only back to NEGATIVE once it falls below
+    -exit_threshold. Between the two thresholds the previous regime is kept, so
+    funding hovering around zero does not flip the strategy between a full
+    position and no position on every sample. When accumulative funding is
+    sampled as well, its change over the window has to agree with the switch.
+    """
+
+    def __init__(
+        self,
+        window=REGIME_WINDOW,
+        enter_threshold=0,
+        exit_threshold=0,
+        min_samples=REGIME_MIN_SAMPLES,
+    ):
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.min_samples = min(min_samples, window)
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.regimes = {}
+
+    def update(
+        self, address, funding_rate, unit_accumulative_funding=None, timestamp=None
+    ):
+        """
+        @dev
+            Adds a funding sample of a strategy and returns its regime.
+        @return POSITIVE, NEGATIVE or None while there are not enough samples
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self.samples[address].append(
+            (timestamp, funding_rate, unit_accumulative_funding)
+        )
+        return self.classify(address)
+
+    def classify(self, address):
+        samples = self.samples[address]
+        regime = self.regimes.get(address)
+        if len(samples) < self.min_samples:
+            return regime
+
+        mean_rate = sum(sample[1] for sample in samples) / len(samples)
+        first, last = samples[0][2], samples[-1][2]
+        accrued = None if first is None or last is None else last - first
+
+        if mean_rate > self.enter_threshold and (accrued is None or accrued > 0):
+            regime = POSITIVE
+        elif mean_rate < -self.exit_threshold and (accrued is None or accrued < 0):
+            regime = NEGATIVE
+        self.regimes[address] = regime
+        return regime
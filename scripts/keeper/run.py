@@ -0,0 +1,24 @@
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv, find_dotenv
+from brownie import accounts, network
+from scripts.keeper.daemon import Keeper
+
+KEEPER_INTERVAL = 60
+
+
+def main():
+    load_dotenv(find_dotenv())
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s"
+    )
+    print(f"You are using the '{network.show_active()}' network")
+    keeper_account = accounts.add(os.getenv("DEPLOYER_PRIVATE_KEY"))
+    interval = int(os.getenv("KEEPER_INTERVAL", KEEPER_INTERVAL))
+    keeper = Keeper.from_config(keeper_account, interval=interval)
+    ws_url = os.getenv("KEEPER_WS_URL")
+    if ws_url:
+        asyncio.run(keeper.watch(ws_url))
+    else:
+        asyncio.run(keeper.run())
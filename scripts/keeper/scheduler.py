@@ -0,0 +1,160 @@
+import logging
+import statistics
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from brownie import interface
+
+logger = logging.getLogger("keeper.scheduler")
+
+# harvest profit must cover this multiple of its gas cost
+PROFIT_RATIO = 2
+# harvest anyway after this many seconds so losses and fees are recorded
+MAX_HARVEST_INTERVAL = 7 * 24 * 3600
+# number of measured harvests the gas profile is based on
+GAS_PROFILE_WINDOW = 20
+
+
+@dataclass
+class HarvestDecision:
+    harvest: bool
+    reason: str
+    accrued_funding: int
+    pending_deposits: int
+    gas_used: int
+    gas_price: int
+    gas_cost: int
+
+
+class GasProfile:
+    """
+    Rolling record of the gas used by harvests of each strategy, seeded with
+    an estimate until the first receipt is recorded.
+    """
+
+    def __init__(self, window=GAS_PROFILE_WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, address, gas_used):
+        self._samples[address].append(gas_used)
+
+    def estimate(self, strategy, sender):
+        samples = self._samples[strategy.address]
+        if not samples:
+            samples.append(strategy.harvest.estimate_gas({"from": sender}))
+        return int(statistics.median(samples))
+
+
+def accrued_funding(state, decimal_shift):
+    """
+    @dev
+        Funding accrued since the last harvest, the off-chain mirror of
+        BasisStrategy._determineFee: accumulated funding delta times live positions.
+    @param state StrategyState read by scripts.utils.multicall.StateReader
+    @param decimal_shift BasisStrategy.DECIMAL_SHIFT of the strategy
+    @return accrued funding in want, negative for a loss
+    """
+    previous = state.positions[2]
+    if previous == 0:
+        return 0
+    delta = state.unit_accumulative_funding - previous
+    # the contract divides the absolute delta, truncating toward zero, and records
+    # the sign as a loss
+    accrued = _sol_div(
+        _sol_div(abs(delta) * -state.margin_positions, 10**18), decimal_shift
+    )
+    return -accrued if delta < 0 else accrued
+
+
+def _sol_div(a, b):
+    # int256 division of solidity, which truncates toward zero
+    quotient = abs(a) // abs(b)
+    return quotient if (a < 0) == (b < 0) else -quotient
+
+
+def oracle_native_price(strategy):
+    """price of the native token in want, for chains where the long asset is the native token"""
+    _, oracle, _ = interface.IMCLP(strategy.mcLiquidityPool()).getPerpetualInfo(
+        strategy.perpetualIndex()
+    )
+    price, _ = interface.IOracle(oracle).priceTWAPLong.call()
+    return price / strategy.DECIMAL_SHIFT()
+
+
+def router_native_price(router, weth, want):
+    """price of the native token in want quoted by a uniswap v2 style router"""
+    return interface.IRouterV2(router).getAmountsOut(10**18, [weth, want])[1]
+
+
+def native_price_from_config(deploy_config):
+    """
+    @dev
+        Picks the native token price source of the chain from config/<chain>/deploy.json.
+    @return callable taking the strategy and returning the native token price in want
+    """
+    if deploy_config["is_v2_router"]:
+        return lambda strategy: router_native_price(
+            deploy_config["uniswap_router"],
+            deploy_config["WETH"],
+            deploy_config["want_token"],
+        )
+    return oracle_native_price
+
+
+class HarvestScheduler:
+    """
+    Decides whether a harvest is worth its gas: the funding accrued since the last
+    harvest has to cover PROFIT_RATIO times the gas cost of a harvest. Deposits
+    waiting in the vault above min_deposit, or a harvest older than max_interval,
+    force a harvest regardless. Every decision is logged with its inputs.
+    """
+
+    def __init__(
+        self,
+        native_price,
+        profit_ratio=PROFIT_RATIO,
+        min_deposit=0,
+        max_interval=MAX_HARVEST_INTERVAL,
+        gas_profile=None,
+    ):
+        self.native_price = native_price
+        self.profit_ratio = profit_ratio
+        self.min_deposit = min_deposit
+        self.max_interval = max_interval
+        self.gas_profile = gas_profile or GasProfile()
+        self.last_harvest = {}
+        self._decimal_shift = {}
+
+    def _decimal_shift_of(self, strategy):
+        if strategy.address not in self._decimal_shift:
+            self._decimal_shift[strategy.address] = strategy.DECIMAL_SHIFT()
+        return self._decimal_shift[strategy.address]
+
+    def record(self, strategy, gas_used):
+        self.gas_profile.record(strategy.address, gas_used)
+        self.last_harvest[strategy.address] = time.time()
+
+    def decide(self, strategy, state, gas_price, sender):
+        accrued = accrued_funding(state, self._decimal_shift_of(strategy))
+        pending = 0
+        if state.harvest_preview is not None:
+            fee, loss, to_activate = state.harvest_preview[:3]
+            pending = to_activate - (0 if loss else fee)
+        gas_used = self.gas_profile.estimate(strategy, sender)
+        gas_cost = int(gas_used * gas_price * self.native_price(strategy) / 10**18)
+        last = self.last_harvest.setdefault(strategy.address, time.time())
+
+        if pending > 0 and pending >= self.min_deposit:
+            harvest, reason = True, "pending deposits"
+        elif time.time() - last >= self.max_interval:
+            harvest, reason = True, "max interval"
+        elif accrued >= self.profit_ratio * gas_cost:
+            harvest, reason = True, "funding covers gas"
+        else:
+            harvest, reason = False, "funding below gas"
+
+        decision = HarvestDecision(
+            harvest, reason, accrued, pending, gas_used, gas_price, gas_cost
+        )
+        logger.info("harvest decision for %s: %s", strategy.address, decision)
+        return decision
@@ -0,0 +1,102 @@
+import asyncio
+import itertools
+import json
+import logging
+import websockets
+from brownie import BasisStrategy
+
+logger = logging.getLogger("keeper.subscriptions")
+
+# strategy events after which the strategy state has to be checked again
+STRATEGY_EVENTS = ("Harvest", "Snapshot", "Remargined", "StrategyUnwind")
+# seconds to wait before reconnecting a dropped websocket, doubled up to the maximum
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 60
+
+
+class Subscriber:
+    """
+    Websocket subscription to new blocks and to the logs that change the state of
+    a set of strategies: the strategy events in STRATEGY_EVENTS and any log of the
+    MCDEX liquidity pool the strategy trades on, since trades move the funding rate.
+
+    Logs are collected between blocks and reported with the next block header, so
+    the consumer only looks at the strategies that were touched.
+    """
+
+    def __init__(self, ws_url, strategies):
+        self.ws_url = ws_url
+        self.strategies = [str(s) for s in strategies]
+        self.pools = {}
+        for strategy in strategies:
+            pool = str(strategy.mcLiquidityPool()).lower()
+            self.pools.setdefault(pool, set()).add(str(strategy))
+        self.topics = [BasisStrategy.topics[name] for name in STRATEGY_EVENTS]
+        self._ids = itertools.count(1)
+
+    async def _subscribe(self, ws, *params):
+        request_id = next(self._ids)
+        await ws.send(
+            json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": "eth_subscribe",
+                    "params": list(params),
+                }
+            )
+        )
+        while True:
+            response = json.loads(await ws.recv())
+            if response.get("id") == request_id:
+                break
+        if "error" in response:
+            raise ValueError(f"eth_subscribe {params[0]} failed: {response['error']}")
+        return response["result"]
+
+    def affected(self, log):
+        """
+        @dev
+            Maps a log to the strategies whose state it may have changed.
+        @return set of strategy addresses
+        """
+        address = log["address"].lower()
+        if address in self.pools:
+            return set(self.pools[address])
+        return {s for s in self.strategies if s.lower() == address}
+
+    async def heads(self):
+        """
+        @dev
+            Yields once per new block, reconnecting when the websocket drops. After a
+            reconnect every strategy is reported, logs may have been missed meanwhile.
+        @return block number
+                set of strategy addresses touched by logs since the previous block
+        """
+        delay = RECONNECT_DELAY
+        changed = set(self.strategies)
+        while True:
+            try:
+                async with websockets.connect(self.ws_url) as ws:
+                    heads = await self._subscribe(ws, "newHeads")
+                    await self._subscribe(
+                        ws,
+                        "logs",
+                        {"address": self.strategies, "topics": [self.topics]},
+                    )
+                    await self._subscribe(ws, "logs", {"address": list(self.pools)})
+                    delay = RECONNECT_DELAY
+                    async for message in ws:
+                        params = json.loads(message).get("params")
+                        if params is None:
+                            continue
+                        if params["subscription"] == heads:
+                            yield int(params["result"]["number"], 16), changed
+                            changed = set()
+                        else:
+                            changed |= self.affected(params["result"])
+            except (websockets.ConnectionClosed, OSError) as exc:
+                logger.warning("websocket %s dropped: %r", self.ws_url, exc)
+                changed = set(self.strategies)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
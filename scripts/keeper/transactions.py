@@ -0,0 +1,211 @@
+import asyncio
+import functools
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from brownie import web3
+
+logger = logging.getLogger("keeper.transactions")
+
+# seconds without a receipt after which a transaction is rebroadcast
+ESCALATION_INTERVAL = 60
+# gas price multiplier of a rebroadcast, nodes require at least +10% to replace
+ESCALATION_FACTOR = 1.125
+# seconds between receipt polls
+POLL_INTERVAL = 1
+# keeper transactions allowed in flight at the same time
+MAX_IN_FLIGHT = 8
+# seconds after the first broadcast without a receipt until a transaction is given up
+MAX_WAIT = 1800
+
+
+class NonceManager:
+    """
+    Hands out nonces locally so several transactions of one account can be in flight.
+    The nonce of a failed broadcast is handed out again before new ones, and the
+    manager only resynchronises with the pending nonce of the node once no
+    transaction is in flight, so the nonces of pending transactions are never reused.
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self._nonce = None
+        self._released = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            if self._nonce is None:
+                self._nonce = web3.eth.get_transaction_count(self.address, "pending")
+            if self._released:
+                nonce = heapq.heappop(self._released)
+            else:
+                nonce = self._nonce
+                self._nonce += 1
+            self._in_flight += 1
+            return nonce
+
+    def done(self, nonce, used=True):
+        """
+        @dev
+            Marks a nonce handed out by next as no longer in flight.
+        @param nonce The nonce.
+        @param used False when no transaction with the nonce reached the node, it is
+            handed out again.
+        """
+        with self._lock:
+            self._in_flight -= 1
+            if not used:
+                heapq.heappush(self._released, nonce)
+            if self._in_flight == 0:
+                # also fills the nonce of a transaction the node dropped
+                self._nonce = None
+                self._released = []
+
+
+@dataclass
+class PendingTransaction:
+    tx: dict
+    hashes: list = field(default_factory=list)
+    broadcast_at: float = 0
+
+    @property
+    def nonce(self):
+        return self.tx["nonce"]
+
+
+class TransactionPipeline:
+    """
+    Sends keeper transactions without waiting for the previous ones to confirm.
+
+    Nonces are assigned locally, up to max_in_flight transactions are pending at
+    once and their receipts are tracked concurrently. A transaction without a
+    receipt after escalation_interval seconds is rebroadcast with the same nonce
+    and a gas price raised by escalation_factor, capped at max_gas_price, and one
+    without a receipt after max_wait seconds raises TimeoutError.
+    """
+
+    def __init__(
+        self,
+        account,
+        max_in_flight=MAX_IN_FLIGHT,
+        escalation_interval=ESCALATION_INTERVAL,
+        escalation_factor=ESCALATION_FACTOR,
+        max_gas_price=None,
+        poll_interval=POLL_INTERVAL,
+        max_wait=MAX_WAIT,
+    ):
+        self.account = account
+        self.nonces = NonceManager(account.address)
+        self.escalation_interval = escalation_interval
+        self.escalation_factor = escalation_factor
+        self.max_gas_price = max_gas_price
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+        self._in_flight = {}
+
+    def _semaphore(self):
+        # one semaphore per event loop, Keeper.run_once starts a new loop on each call
+        loop = asyncio.get_running_loop()
+        if loop not in self._in_flight:
+            self._in_flight = {loop: asyncio.Semaphore(self.max_in_flight)}
+        return self._in_flight[loop]
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, functools.partial(fn, *args))
+
+    async def send(self, method, *args, gas_price=None):
+        """
+        @dev
+            Sends a contract transaction through the pipeline.
+        @param method Bound brownie ContractTx, e.g. strategy.harvest
+        @param args Arguments of the contract call.
+        @return receipt of the mined transaction
+        """
+        tx = {"to": method._address, "data": method.encode_input(*args)}
+        tx["gas"] = await self._run(method.estimate_gas, *args, {"from": self.account})
+        return await self.send_transaction(tx, gas_price=gas_price)
+
+    async def send_transaction(self, tx, gas_price=None):
+        """
+        @dev
+            Signs and broadcasts a transaction dict, then waits for its receipt while
+            escalating the gas price of the transaction when it gets stuck.
+        @return receipt of the mined transaction
+        """
+        async with self._semaphore():
+            tx = dict(tx, chainId=web3.eth.chain_id, value=tx.get("value", 0))
+            tx.setdefault("gas", 21000)
+            if gas_price is None:
+                gas_price = await self._run(lambda: web3.eth.gas_price)
+            tx["gasPrice"] = gas_price
+            tx["nonce"] = self.nonces.next()
+            pending = PendingTransaction(tx)
+            try:
+                await self._broadcast(pending)
+                return await self._wait(pending)
+            finally:
+                # a nonce that was never broadcast is filled by the next transaction
+                self.nonces.done(pending.nonce, used=bool(pending.hashes))
+
+    def _send_raw(self, tx):
+        if hasattr(self.account, "private_key"):
+            signed = self.account._acct.sign_transaction(tx)
+            return web3.eth.send_raw_transaction(signed.rawTransaction)
+        # accounts unlocked on the node, e.g. development and fork accounts
+        return web3.eth.send_transaction(dict(tx, **{"from": self.account.address}))
+
+    async def _broadcast(self, pending):
+        tx_hash = await self._run(self._send_raw, pending.tx)
+        pending.hashes.append(tx_hash)
+        pending.broadcast_at = time.monotonic()
+        logger.info(
+            "sent %s with nonce %d at gas price %d",
+            tx_hash.hex(),
+            pending.nonce,
+            pending.tx["gasPrice"],
+        )
+
+    async def _receipt(self, pending):
+        receipts = await asyncio.gather(
+            *(self._run(self._get_receipt, tx_hash) for tx_hash in pending.hashes)
+        )
+        return next((receipt for receipt in receipts if receipt is not None), None)
+
+    def _get_receipt(self, tx_hash):
+        try:
+            return web3.eth.get_transaction_receipt(tx_hash)
+        except Exception:  # web3 raises TransactionNotFound for pending transactions
+            return None
+
+    async def _escalate(self, pending):
+        gas_price = int(pending.tx["gasPrice"] * self.escalation_factor)
+        if self.max_gas_price is not None:
+            gas_price = min(gas_price, self.max_gas_price)
+        if gas_price <= pending.tx["gasPrice"]:
+            return
+        pending.tx = dict(pending.tx, gasPrice=gas_price)
+        try:
+            await self._broadcast(pending)
+        except ValueError as exc:
+            # the previous broadcast may have been mined in the meantime
+            logger.warning("rebroadcast of nonce %d failed: %s", pending.nonce, exc)
+
+    async def _wait(self, pending):
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            receipt = await self._receipt(pending)
+            if receipt is not None:
+                return receipt
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"no receipt for nonce {pending.nonce} after {self.max_wait}s"
+                )
+            if time.monotonic() - pending.broadcast_at >= self.escalation_interval:
+                await self._escalate(pending)
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,82 @@
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+# largest increase over the baseline gas that is not a regression, as a fraction
+DEFAULT_THRESHOLD = 0.02
+
+
+@dataclass
+class GasDiff:
+    name: str
+    baseline: Optional[int]
+    gas: int
+
+    @property
+    def change(self):
+        """
+        @dev
+            Change against the baseline as a fraction, None for a new operation.
+        """
+        if not self.baseline:
+            return None
+        return (self.gas - self.baseline) / self.baseline
+
+    def is_regression(self, threshold):
+        return self.change is not None and self.change > threshold
+
+    def describe(self):
+        if self.change is None:
+            return f"{self.gas} gas, not in the baseline"
+        return f"{self.gas} gas, baseline {self.baseline} ({self.change:+.2%})"
+
+
+def load_baseline(path):
+    """
+    @dev
+        Reads a baseline file, a JSON object of operation name to gas used.
+    @param path Path of the baseline file.
+    @return dict of name to gas, empty if the file does not exist
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_baseline(path, results):
+    with open(path, "w") as f:
+        json.dump(dict(sorted(results.items())), f, indent=2)
+        f.write("\n")
+
+
+def compare(results, baseline):
+    """
+    @dev
+        Compares measured gas to a baseline.
+    @param results dict of operation name to gas used.
+    @param baseline dict of operation name to baseline gas.
+    @return list of GasDiff sorted by name
+    """
+    return [
+        GasDiff(name, baseline.get(name), gas) for name, gas in sorted(results.items())
+    ]
+
+
+def format_report(diffs, threshold=DEFAULT_THRESHOLD):
+    """
+    @dev
+        Formats a table of the gas of every operation and its change, regressions
+        above threshold are marked.
+    """
+    width = max([len(diff.name) for diff in diffs] + [len("operation")])
+    lines = [f"{'operation':<{width}} {'baseline':>10} {'gas':>10} {'change':>9}"]
+    for diff in diffs:
+        baseline = "-" if diff.baseline is None else diff.baseline
+        change = "new" if diff.change is None else f"{diff.change:+.2%}"
+        mark = "  REGRESSION" if diff.is_regression(threshold) else ""
+        lines.append(
+            f"{diff.name:<{width}} {baseline:>10} {diff.gas:>10} {change:>9}{mark}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,163 @@
+from dataclasses import dataclass
+from eth_abi import decode_abi
+from hexbytes import HexBytes
+from brownie import Contract, VaultLens, VaultRegistry, ZERO_ADDRESS, web3
+from brownie.convert.utils import get_type_strings
+
+# vaults read per deployless call, the returned data is subject to the 24kB code size
+# limit and one VaultInfo encodes to 33 words
+DEPLOYLESS_BATCH = 20
+
+
+@dataclass
+class Positions:
+    perp_contracts: int
+    margin: int
+    unit_accumulative_funding: int
+
+
+@dataclass
+class MarginAccount:
+    cash: int
+    position: int
+    available_margin: int
+    margin: int
+    settleable_margin: int
+    is_initial_margin_safe: bool
+    is_maintenance_margin_safe: bool
+    is_margin_safe: bool
+
+
+@dataclass
+class VaultInfo:
+    vault: str
+    strategy: str
+    want: str
+    total_assets: int
+    total_lent: int
+    total_supply: int
+    price_per_share: int
+    idle_balance: int
+    queued_shares: int
+    total_claimable: int
+    performance_fee: int
+    management_fee: int
+    deposit_limit: int
+    individual_deposit_limit: int
+    idle_reserve: int
+    paused: bool
+    positions: Positions
+    margin_account: MarginAccount
+    funding_rate: int
+    is_unwind: bool
+    buffer: int
+
+    @classmethod
+    def decode(cls, row):
+        """
+        @dev
+            Builds a record from a decoded VaultLens.VaultInfo tuple.
+        """
+        row = list(row)
+        row[:3] = [web3.toChecksumAddress(address) for address in row[:3]]
+        row[16] = Positions(*row[16])
+        row[17] = MarginAccount(*row[17])
+        return cls(*row)
+
+
+class LensReader:
+    """
+    Reads the state of many vaults and their strategies with one eth_call to the
+    VaultLens contract.
+
+    Without a lens address the creation code of VaultLens is executed in an eth_call,
+    its constructor returns the read, so nothing has to be deployed on the network and
+    no Multicall2 is needed.
+    """
+
+    def __init__(self, lens_address=None):
+        self.lens = None
+        if lens_address:
+            self.lens = Contract.from_abi("VaultLens", lens_address, VaultLens.abi)
+        abi = next(item for item in VaultLens.abi if item.get("name") == "getVaults")
+        self._output_types = get_type_strings(abi["outputs"])
+
+    def _lens_tx(self, method, *args):
+        return {
+            "to": self.lens.address,
+            "data": getattr(self.lens, method).encode_input(*args),
+        }
+
+    def _deployless_tx(self, vaults, registry=ZERO_ADDRESS, offset=0, limit=0):
+        # the constructor returns what getVaults / getRegistryVaults would
+        return {"data": VaultLens.deploy.encode_input(vaults, registry, offset, limit)}
+
+    def _call(self, tx, block):
+        return self.decode(web3.eth.call(tx, block))
+
+    def request(self, vaults):
+        """
+        @dev
+            Builds the eth_call transaction of read, for callers that send it
+            themselves, e.g. in a JSON-RPC batch.
+        @param vaults List of at most DEPLOYLESS_BATCH vault addresses when no lens
+            address is set.
+        @return transaction dict, its result is decoded with decode
+        """
+        vaults = [str(v) for v in vaults]
+        if self.lens is not None:
+            return self._lens_tx("getVaults", vaults)
+        if len(vaults) > DEPLOYLESS_BATCH:
+            raise ValueError(f"at most {DEPLOYLESS_BATCH} vaults per deployless read")
+        return self._deployless_tx(vaults)
+
+    def decode(self, data):
+        """
+        @dev
+            Decodes the result of a read.
+        @param data Returned bytes or hex string.
+        @return list of VaultInfo
+        """
+        (rows,) = decode_abi(self._output_types, HexBytes(data))
+        return [VaultInfo.decode(row) for row in rows]
+
+    def read(self, vaults, block=None):
+        """
+        @dev
+            Reads a list of vaults.
+        @param vaults List of vault addresses.
+        @param block Block number to pin the read to, latest if omitted.
+        @return list of VaultInfo, in the order of the input
+        """
+        vaults = [str(v) for v in vaults]
+        if block is None:
+            block = web3.eth.block_number
+        if self.lens is not None:
+            return self._call(self._lens_tx("getVaults", vaults), block)
+        # the returned "runtime code" counts against the contract size limit
+        infos = []
+        for i in range(0, len(vaults), DEPLOYLESS_BATCH):
+            chunk = vaults[i : i + DEPLOYLESS_BATCH]
+            infos += self._call(self._deployless_tx(chunk), block)
+        return infos
+
+    def read_registry(self, registry, block=None):
+        """
+        @dev
+            Reads every active vault of a VaultRegistry.
+        @param registry VaultRegistry address.
+        @param block Block number to pin the read to, latest if omitted.
+        @return list of VaultInfo, in the order of VaultRegistry.getActiveVaults
+        """
+        registry = str(registry)
+        if block is None:
+            block = web3.eth.block_number
+        count = VaultRegistry.at(registry).activeVaultCount(block_identifier=block)
+        if self.lens is not None:
+            tx = self._lens_tx("getRegistryVaults", registry, 0, count)
+            return self._call(tx, block)
+        infos = []
+        for offset in range(0, count, DEPLOYLESS_BATCH):
+            tx = self._deployless_tx([], registry, offset, DEPLOYLESS_BATCH)
+            infos += self._call(tx, block)
+        return infos
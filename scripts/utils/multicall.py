@@ -0,0 +1,217 @@
+from dataclasses import dataclass
+from brownie import BasisStrategy, BasisVault, Contract, interface, web3
+from brownie._config import CONFIG
+from brownie.exceptions import VirtualMachineError
+
+# minimal ABI of https://github.com/makerdao/multicall/blob/master/src/Multicall2.sol
+MULTICALL2_ABI = [
+    {
+        "inputs": [
+            {"internalType": "bool", "name": "requireSuccess", "type": "bool"},
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall2.Call[]",
+                "name": "calls",
+                "type": "tuple[]",
+            },
+        ],
+        "name": "tryBlockAndAggregate",
+        "outputs": [
+            {"internalType": "uint256", "name": "blockNumber", "type": "uint256"},
+            {"internalType": "bytes32", "name": "blockHash", "type": "bytes32"},
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall2.Result[]",
+                "name": "returnData",
+                "type": "tuple[]",
+            },
+        ],
+        "stateMutability": "nonpayable",
+        "type": "function",
+    }
+]
+
+
+@dataclass
+class StrategyState:
+    address: str
+    funding_rate: int
+    unit_accumulative_funding: int
+    is_unwind: bool
+    margin_account: tuple
+    positions: tuple
+    buffer: int
+    harvest_preview: tuple
+    long_balance: int
+
+    @property
+    def margin(self):
+        return self.margin_account[3]
+
+    @property
+    def margin_positions(self):
+        return self.margin_account[1]
+
+
+@dataclass
+class VaultState:
+    address: str
+    total_assets: int
+    total_lent: int
+    total_supply: int
+    price_per_share: int
+    idle: int
+
+
+@dataclass
+class Snapshot:
+    block: int
+    vault: VaultState
+    strategy: StrategyState
+
+
+STRATEGY_GETTERS = (
+    "getFundingRate",
+    "getUnitAccumulativeFunding",
+    "isUnwind",
+    "getMarginAccount",
+    "positions",
+    "buffer",
+    "harvestPreview",
+)
+VAULT_GETTERS = ("totalAssets", "totalLent", "totalSupply", "pricePerShare")
+
+
+class StateReader:
+    """
+    Reads BasisVault and BasisStrategy state for any number of vaults with a single
+    Multicall2 eth_call pinned to one block. Falls back to one call per getter
+    (pinned to the same block) when Multicall2 is not deployed on the network.
+    """
+
+    def __init__(self, multicall_address=None):
+        if multicall_address is None:
+            multicall_address = CONFIG.active_network.get("multicall2")
+        self.multicall = None
+        if multicall_address and len(web3.eth.get_code(multicall_address)) > 0:
+            self.multicall = Contract.from_abi(
+                "Multicall2", multicall_address, MULTICALL2_ABI
+            )
+        self._contracts = {}
+        self._tokens = {}
+
+    def _contract(self, container, address):
+        key = (container._name, address)
+        if key not in self._contracts:
+            self._contracts[key] = Contract.from_abi(
+                container._name, address, container.abi
+            )
+        return self._contracts[key]
+
+    def aggregate(self, calls, block=None):
+        """
+        @dev
+            Executes a list of (ContractCall, args) pairs in one round trip.
+        @param calls List of bound brownie contract methods with their arguments.
+        @param block Block number to pin the reads to, latest if omitted.
+        @return block number the results were read at
+                list of decoded results, None for calls that reverted
+        """
+        if block is None:
+            block = web3.eth.block_number
+        if self.multicall is None:
+            return block, [self._single_call(fn, args, block) for fn, args in calls]
+
+        encoded = [(fn._address, fn.encode_input(*args)) for fn, args in calls]
+        _, _, results = self.multicall.tryBlockAndAggregate.call(
+            False, encoded, block_identifier=block
+        )
+        decoded = [
+            fn.decode_output(data) if success else None
+            for (fn, _), (success, data) in zip(calls, results)
+        ]
+        return block, decoded
+
+    def _single_call(self, fn, args, block):
+        try:
+            return fn(*args, block_identifier=block)
+        except (ValueError, VirtualMachineError):
+            return None
+
+    def _load_tokens(self, vaults, strategies):
+        missing_vaults = [v for v in vaults if v not in self._tokens]
+        missing_strategies = [s for s in strategies if s not in self._tokens]
+        if not missing_vaults and not missing_strategies:
+            return
+        calls = [(self._contract(BasisVault, v).want, ()) for v in missing_vaults]
+        calls += [
+            (self._contract(BasisStrategy, s).long, ()) for s in missing_strategies
+        ]
+        _, results = self.aggregate(calls)
+        for address, token in zip(missing_vaults + missing_strategies, results):
+            self._tokens[address] = interface.IERC20(token)
+
+    def _strategy_calls(self, address):
+        strategy = self._contract(BasisStrategy, address)
+        calls = [(getattr(strategy, getter), ()) for getter in STRATEGY_GETTERS]
+        calls.append((self._tokens[address].balanceOf, (address,)))
+        return calls
+
+    def _vault_calls(self, address):
+        vault = self._contract(BasisVault, address)
+        calls = [(getattr(vault, getter), ()) for getter in VAULT_GETTERS]
+        calls.append((self._tokens[address].balanceOf, (address,)))
+        return calls
+
+    def read_strategies(self, strategies, block=None):
+        """
+        @dev
+            Reads the state of a list of strategy addresses.
+        @return list of StrategyState, in the order of the input
+        """
+        strategies = [str(s) for s in strategies]
+        self._load_tokens([], strategies)
+        calls = []
+        for address in strategies:
+            calls += self._strategy_calls(address)
+        _, results = self.aggregate(calls, block)
+        width = len(STRATEGY_GETTERS) + 1
+        return [
+            StrategyState(address, *results[i * width : (i + 1) * width])
+            for i, address in enumerate(strategies)
+        ]
+
+    def snapshot(self, vaults, block=None):
+        """
+        @dev
+            Reads vault and strategy state for every vault in one aggregated call.
+        @param vaults List of {"vault": address, "strategy": address} entries,
+               the format of addresses/<chain>/vaults.json.
+        @return list of Snapshot, in the order of the input
+        """
+        pairs = [(str(v["vault"]), str(v["strategy"])) for v in vaults]
+        self._load_tokens([v for v, _ in pairs], [s for _, s in pairs])
+        calls = []
+        for vault, strategy in pairs:
+            calls += self._vault_calls(vault)
+            calls += self._strategy_calls(strategy)
+        block, results = self.aggregate(calls, block)
+        vault_width = len(VAULT_GETTERS) + 1
+        width = vault_width + len(STRATEGY_GETTERS) + 1
+        snapshots = []
+        for i, (vault, strategy) in enumerate(pairs):
+            row = results[i * width : (i + 1) * width]
+            snapshots.append(
+                Snapshot(
+                    block,
+                    VaultState(vault, *row[:vault_width]),
+                    StrategyState(strategy, *row[vault_width:]),
+                )
+            )
+        return snapshots
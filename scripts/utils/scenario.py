@@ -0,0 +1,196 @@
+import itertools
+import requests
+from dataclasses import dataclass, field
+from brownie import chain, web3
+from scripts.utils.lens import LensReader, VaultInfo
+
+# seconds between keeper calls, one MCDEX funding period and a second
+PERIOD = 28801
+# periods sent per JSON-RPC batch, bounds the size of a request and its response
+BATCH_PERIODS = 25
+# gas of every keeper call, the driver does not estimate its transactions
+CALL_GAS = 8_000_000
+# seconds to wait for the response of a batch, a fork executes it against a remote node
+BATCH_TIMEOUT = 600
+
+
+@dataclass
+class Period:
+    index: int
+    elapsed: int
+    transactions: list
+    block: int
+    info: VaultInfo
+
+
+@dataclass
+class Scenario:
+    periods: list = field(default_factory=list)
+
+    def series(self, name):
+        """
+        @dev
+            Time series of a VaultInfo field.
+        @param name Field name, nested fields are separated by dots, e.g.
+            "margin_account.margin".
+        @return list with the value of the field after every period
+        """
+        values = []
+        for period in self.periods:
+            value = period.info
+            for attr in name.split("."):
+                value = getattr(value, attr)
+            values.append(value)
+        return values
+
+
+class ScenarioDriver:
+    """
+    Runs long-horizon scenarios against a local chain: every period advances the time,
+    sends the keeper calls and reads the vault through VaultLens. The requests of many
+    periods go to the node in one JSON-RPC batch and every transaction is mined on its
+    own.
+
+    A node may process the requests of a batch concurrently, e.g. ganache with
+    asyncRequestProcessing, so the vault is read at the block of the last call of each
+    period and a period whose calls were mined before the time was advanced raises.
+
+    The calls are sent with eth_sendTransaction, so the sender has to be an account
+    unlocked in the node, e.g. a brownie development or fork account.
+    """
+
+    def __init__(self, vault, sender, lens_address=None, batch_periods=BATCH_PERIODS):
+        self.vault = str(vault)
+        self.sender = str(sender)
+        self.reader = LensReader(lens_address)
+        self.batch_periods = batch_periods
+        self.endpoint = web3.provider.endpoint_uri
+        self._ids = itertools.count(1)
+
+    def _transaction(self, call):
+        method, *args = call if isinstance(call, tuple) else (call,)
+        return {
+            "from": self.sender,
+            "to": method._address,
+            "data": method.encode_input(*args),
+            "gas": hex(CALL_GAS),
+        }
+
+    def _batch(self, calls):
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": next(self._ids),
+                "method": method,
+                "params": params,
+            }
+            for method, params in calls
+        ]
+        response = requests.post(self.endpoint, json=payload, timeout=BATCH_TIMEOUT)
+        response.raise_for_status()
+        # the responses of a batch may come in any order
+        results = {result["id"]: result for result in response.json()}
+        return [results[request["id"]] for request in payload]
+
+    def run(self, periods, calls, interval=PERIOD):
+        """
+        @dev
+            Runs a number of periods, a call that fails or reverts raises after the
+            batch it is in.
+        @param periods Number of periods.
+        @param calls Contract methods called every period in order, e.g.
+            strategy.harvest, or (method, *args) tuples. At least one, the vault is
+            read at the block of the last call of a period.
+        @param interval Seconds the time is advanced by before the calls of a period.
+        @return Scenario with the transaction hashes, the block and the VaultInfo of
+            every period
+        """
+        if not calls:
+            raise ValueError("a period needs at least one call")
+        scenario = Scenario()
+        transactions = [self._transaction(call) for call in calls]
+        read = self.reader.request([self.vault])
+        step = len(transactions) + 1
+        timestamp = web3.eth.get_block("latest")["timestamp"]
+        for start in range(0, periods, self.batch_periods):
+            indexes = range(start, min(start + self.batch_periods, periods))
+            batch = []
+            for _ in indexes:
+                batch.append(("evm_increaseTime", [interval]))
+                batch += [("eth_sendTransaction", [tx]) for tx in transactions]
+            responses = self._batch(batch)
+            # chain.time() only counts the time brownie advanced itself, sleeping 0
+            # seconds reads the total time advanced from the node
+            chain.sleep(0)
+            hashes = []
+            for n, index in enumerate(indexes):
+                period = responses[n * step : (n + 1) * step]
+                for (method, _), response in zip(batch[n * step :], period):
+                    if "error" in response:
+                        message = response["error"].get("message")
+                        raise ValueError(f"period {index}: {method} failed: {message}")
+                hashes.append([r["result"] for r in period[1:]])
+            blocks = self._check_receipts(indexes, hashes, calls)
+
+            # the first block of every period and the vault after its last call
+            reads = self._batch(
+                [
+                    request
+                    for first, last in blocks
+                    for request in (
+                        ("eth_getBlockByNumber", [hex(first), False]),
+                        ("eth_call", [read, hex(last)]),
+                    )
+                ]
+            )
+            for n, index in enumerate(indexes):
+                block, result = reads[2 * n : 2 * n + 2]
+                if "error" in result:
+                    message = result["error"].get("message")
+                    raise ValueError(f"period {index}: read failed: {message}")
+                mined = int(block["result"]["timestamp"], 16)
+                if mined - timestamp < interval:
+                    raise ValueError(
+                        f"period {index}: mined {mined - timestamp}s after the "
+                        "previous one, the node did not run the batch in order"
+                    )
+                timestamp = mined
+                scenario.periods.append(
+                    Period(
+                        index=index,
+                        elapsed=(index + 1) * interval,
+                        transactions=hashes[n],
+                        block=blocks[n][1],
+                        info=self.reader.decode(result["result"])[0],
+                    )
+                )
+        return scenario
+
+    def _check_receipts(self, indexes, hashes, calls):
+        """
+        @dev
+            Checks that every call succeeded and that the calls were mined in the order
+            they were sent.
+        @return list of the first and the last block of every period
+        """
+        receipts = self._batch(
+            [("eth_getTransactionReceipt", [tx]) for txs in hashes for tx in txs]
+        )
+        receipts = iter(receipts)
+        blocks = []
+        previous = 0
+        for index in indexes:
+            numbers = []
+            for call in calls:
+                receipt = next(receipts)["result"]
+                # nodes that do not return reverts as errors still report them here
+                if int(receipt["status"], 16) == 0:
+                    method = call[0] if isinstance(call, tuple) else call
+                    raise ValueError(f"period {index}: {method._name} reverted")
+                number = int(receipt["blockNumber"], 16)
+                if number <= previous:
+                    raise ValueError(f"period {index}: calls were mined out of order")
+                numbers.append(number)
+                previous = number
+            blocks.append((numbers[0], numbers[-1]))
+        return blocks
@@ -0,0 +1,214 @@
+from dataclasses import dataclass, field
+
+# BasisVault.MAX_BPS
+MAX_BPS = 10_000
+# BasisVault.RESERVE_BAND
+RESERVE_BAND = 2_500
+# BasisVault.SECS_PER_YEAR
+SECS_PER_YEAR = 31_556_952
+
+
+class VaultRevert(Exception):
+    """
+    Raised where BasisVault reverts, with the revert string of the require or None
+    for an arithmetic panic.
+    """
+
+    def __init__(self, reason=None):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _sub(a, b):
+    # checked subtraction of solidity 0.8
+    if b > a:
+        raise VaultRevert()
+    return a - b
+
+
+@dataclass
+class VaultModel:
+    """
+    Integer reference of the BasisVault share accounting: share issuance, share value,
+    expectedLoss and the protocol fees of an update, rounding like the contract.
+    A method that reverts on chain raises VaultRevert before changing the model.
+
+    The strategy is modelled by the want it holds, it pays withdrawals out of that
+    balance and reports the shortfall as a loss like BasisStrategy.withdraw.
+    Withdrawal requests are not modelled, queuedShares and totalClaimable stay 0.
+    """
+
+    performance_fee: int = 0
+    management_fee: int = 0
+    deposit_limit: int = 0
+    individual_deposit_limit: int = 0
+    idle_reserve: int = 0
+    fee_recipient: str = None
+    limit_activate: bool = True
+    # want held by the vault and the strategy
+    vault_balance: int = 0
+    strategy_balance: int = 0
+    total_lent: int = 0
+    last_update: int = 0
+    balances: dict = field(default_factory=dict)
+    user_deposit: dict = field(default_factory=dict)
+
+    @property
+    def total_supply(self):
+        return sum(self.balances.values())
+
+    def balance_of(self, account):
+        return self.balances.get(account, 0)
+
+    def total_assets(self):
+        return self.vault_balance + self.total_lent
+
+    def price_per_share(self, decimals):
+        return self.share_value(10**decimals)
+
+    def shares_issuable(self, amount):
+        """
+        @dev
+            BasisVault._calcSharesIssuable.
+        """
+        total_supply = self.total_supply
+        if total_supply == 0:
+            return amount
+        if self.total_assets() == 0:
+            raise VaultRevert("totalAssets == 0")
+        return amount * total_supply // self.total_assets()
+
+    def share_value(self, shares):
+        """
+        @dev
+            BasisVault._calcShareValue.
+        """
+        total_supply = self.total_supply
+        if total_supply == 0:
+            return shares
+        return shares * self.total_assets() // total_supply
+
+    def expected_loss(self, shares):
+        """
+        @dev
+            BasisVault.expectedLoss.
+        """
+        needed = self.share_value(shares) - self.vault_balance
+        return max(needed - self.strategy_balance, 0) if needed > 0 else 0
+
+    def protocol_fees(self, gain, timestamp):
+        """
+        @dev
+            BasisVault._determineProtocolFees, without issuing the shares.
+        @return fee in want
+        """
+        if gain == 0:
+            return 0
+        duration = timestamp - self.last_update
+        if duration <= 0:
+            raise VaultRevert("!duration")
+        performance = gain * self.performance_fee // MAX_BPS
+        management = (
+            self.total_lent * duration * self.management_fee // MAX_BPS
+        ) // SECS_PER_YEAR
+        return min(performance + management, gain)
+
+    def _mint(self, account, shares):
+        self.balances[account] = self.balance_of(account) + shares
+
+    def _strategy_withdraw(self, amount):
+        if amount == 0:
+            raise VaultRevert("withdraw: _amount is 0")
+        withdrawn = min(amount, self.strategy_balance)
+        self.strategy_balance -= withdrawn
+        self.vault_balance += withdrawn
+        return amount - withdrawn, withdrawn
+
+    def deposit(self, user, amount, recipient=None):
+        """
+        @dev
+            BasisVault.deposit from user.
+        @return shares minted to recipient
+        """
+        if amount == 0:
+            raise VaultRevert("!_amount")
+        if self.limit_activate:
+            if self.total_assets() + amount > self.deposit_limit:
+                raise VaultRevert("!depositLimit")
+            deposited = self.user_deposit.get(user, 0)
+            if deposited + amount > self.individual_deposit_limit:
+                raise VaultRevert("user cap reached")
+        shares = self.shares_issuable(amount)
+        self.user_deposit[user] = self.user_deposit.get(user, 0) + amount
+        self._mint(recipient or user, shares)
+        self.vault_balance += amount
+        return shares
+
+    def withdraw(self, user, shares, max_loss):
+        """
+        @dev
+            BasisVault.withdraw by user.
+        @return amount paid out
+        """
+        if shares == 0:
+            raise VaultRevert("!_shares")
+        if shares > self.balance_of(user):
+            raise VaultRevert("insufficient balance")
+        amount = self.share_value(shares)
+        vault_balance = self.vault_balance
+        total_lent = self.total_lent
+        if amount > vault_balance:
+            needed = min(amount - vault_balance, total_lent)
+            withdrawn = min(needed, self.strategy_balance)
+            loss = needed - withdrawn
+            if loss > 0:
+                if loss > max_loss:
+                    raise VaultRevert("loss more than expected")
+                amount = vault_balance + withdrawn
+                total_lent = _sub(total_lent, loss)
+            total_lent = total_lent - withdrawn if total_lent >= withdrawn else 0
+            self._strategy_withdraw(needed)
+            vault_balance = self.vault_balance
+        self.total_lent = total_lent
+        self.balances[user] -= shares
+        amount = min(amount, vault_balance)
+        self.vault_balance -= amount
+        return amount
+
+    def update(self, amount, loss, timestamp):
+        """
+        @dev
+            BasisVault.update called by the strategy at timestamp, the strategy already
+            holds a reported gain.
+        @return fee in want and fee shares issued to the fee recipient, want sent to
+                the strategy
+        """
+        fee = fee_shares = 0
+        if loss:
+            self.total_lent = _sub(self.total_lent, amount)
+        else:
+            fee = self.protocol_fees(amount, timestamp)
+            if fee > 0:
+                fee_shares = self.shares_issuable(fee)
+                self._mint(self.fee_recipient, fee_shares)
+            self.total_lent += amount
+        reserve = self.total_assets() * self.idle_reserve // MAX_BPS
+        shortfall = max(reserve - self.vault_balance, 0)
+        if shortfall * MAX_BPS > reserve * RESERVE_BAND and self.total_lent > 0:
+            withdrawal = min(reserve - self.vault_balance, self.total_lent)
+            loss, withdrawn = self._strategy_withdraw(withdrawal)
+            self.total_lent -= min(loss + withdrawn, self.total_lent)
+        to_deposit = self.available_to_deposit()
+        self.total_lent += to_deposit
+        self.last_update = timestamp
+        self.vault_balance -= to_deposit
+        self.strategy_balance += to_deposit
+        return fee, fee_shares, to_deposit
+
+    def available_to_deposit(self):
+        """
+        @dev
+            BasisVault.availableToDeposit.
+        """
+        reserve = self.total_assets() * self.idle_reserve // MAX_BPS
+        return max(self.vault_balance - reserve, 0)
@@ -0,0 +1,269 @@
+# fixtures of the tests, tests_bsc and tests_heavy suites, every conftest imports
+# them. constants and constants_bsc are the modules next to the conftest of the
+# suite that runs
+import pytest
+import constants
+import constants_bsc
+from brownie import (
+    BasisVault,
+    BasicERC20,
+    MockERC20,
+    MockMCLP,
+    MockOracle,
+    MockSwapRouter,
+    MockUniswapV3Pool,
+    TestStrategy,
+    Faucet,
+    accounts,
+    network,
+    Contract,
+    interface,
+)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def isolate_func(fn_isolation):
+    # perform a chain rewind after completing each test, to ensure proper isolation
+    # https://eth-brownie.readthedocs.io/en/v1.10.3/tests-pytest-intro.html#isolation-fixtures
+    # module_isolation resets the chain before and after every module, so the setups
+    # below are module scoped. They are deployed once per module before the snapshot of
+    # the first test that uses them, every later test of the module only pays the
+    # evm_revert
+    pass
+
+
+# token, long and oracle request module_isolation, so the chain is reset before any
+# setup of a module is deployed
+
+
+@pytest.fixture(scope="module", autouse=True)
+def token(module_isolation, deployer, users, usdc_whale):
+    constant = data()
+    if network.show_active() == "development":
+        toke = BasicERC20.deploy("Test", "TT", {"from": deployer})
+        toke.mint(1_000_000_000_000e18, {"from": deployer})
+        for user in users:
+            toke.mint(1_000_000e18, {"from": user})
+    else:
+        toke = interface.IERC20(constant.USDC)
+        # every test sees 10 deposits free, the two deposited vaults hold one each
+        for user in users:
+            toke.transfer(user, constant.DEPOSIT_AMOUNT * 12, {"from": usdc_whale})
+    # usdc
+    yield toke
+
+
+def data():
+    if network.show_active() == "arbitrum-main-fork":
+        constant = constants
+    elif network.show_active() == "development":
+        constant = constants
+    else:
+        constant = constants_bsc
+    return constant
+
+
+@pytest.fixture(scope="module", autouse=True)
+def long(module_isolation, deployer, users):
+    constant = data()
+    if network.show_active() == "development":
+        toke = MockERC20.deploy("Test", "TT", 18, {"from": deployer})
+        toke.mint(1_000_000_000_000e18, {"from": deployer})
+        for user in users:
+            toke.mint(1_000_000e18, {"from": user})
+    else:
+        toke = interface.IERC20(constant.LONG_ASSET)
+    yield toke
+
+
+@pytest.fixture(scope="module", autouse=True)
+def oracle(module_isolation, deployer):
+    constant = data()
+
+    if network.show_active() == "development":
+        oracle = MockOracle.deploy(constant.MOCK_PRICE, {"from": deployer})
+    else:
+        oracle = interface.IOracle(constant.MCDEX_ORACLE)
+    yield oracle
+
+
+@pytest.fixture(scope="module", autouse=True)
+def mcLiquidityPool(deployer, token, oracle):
+    constant = data()
+    if network.show_active() == "development":
+        mc = MockMCLP.deploy(token, oracle, {"from": deployer})
+        # the strategy takes an accumulative funding of 0 for a perpetual it has not
+        # harvested yet, a live perpetual has accrued funding
+        mc.setUnitAccumulativeFunding(constant.MOCK_FUNDING, {"from": deployer})
+        # collateral to pay out the funding
+        token.transfer(mc, constant.MOCK_LIQUIDITY, {"from": deployer})
+    else:
+        mc = interface.IMCLP(constant.MCLIQUIDITY)
+    yield mc
+
+
+@pytest.fixture(scope="module")
+def router(deployer, token, long, oracle):
+    constant = data()
+    if network.show_active() == "development":
+        swap_router = MockSwapRouter.deploy(oracle, token, long, {"from": deployer})
+        token.transfer(swap_router, constant.MOCK_LIQUIDITY, {"from": deployer})
+        long.transfer(swap_router, constant.MOCK_LONG_LIQUIDITY, {"from": deployer})
+        yield swap_router
+    else:
+        yield constant.ROUTER
+
+
+@pytest.fixture(scope="module")
+def uni_pool(deployer, token, long):
+    constant = data()
+    if network.show_active() == "development":
+        yield MockUniswapV3Pool.deploy(token, long, 500, {"from": deployer})
+    else:
+        yield constant.UNI_POOL
+
+
+@pytest.fixture(scope="module")
+def markets(long, uni_pool, router, mcLiquidityPool):
+    # the addresses the strategy trades on, mocks on the development network
+    constant = data()
+    weth = long if network.show_active() == "development" else constant.WETH
+    yield long, uni_pool, router, weth, mcLiquidityPool
+
+
+@pytest.fixture(scope="session")
+def usdc_whale():
+    constant = data()
+    yield accounts.at(constant.USDC_WHALE, force=True)
+
+
+@pytest.fixture(scope="session")
+def deployer():
+    constant = data()
+    if network.show_active() == "development":
+        yield accounts[0]
+    else:
+        yield accounts.at(constant.USDC_WHALE, force=True)
+
+
+@pytest.fixture(scope="session")
+def governance():
+    yield accounts[1]
+
+
+@pytest.fixture(scope="session")
+def users():
+    yield accounts[1:10]
+
+
+@pytest.fixture(scope="session")
+def randy():
+    yield accounts.at(constants.RANDOM, force=True)
+
+
+def deploy_vault(deployer, token):
+    constant = data()
+    vaulty = BasisVault.deploy({"from": deployer})
+    vaulty.initialize(
+        token,
+        constant.DEPOSIT_LIMIT,
+        constant.INDIVIDUAL_DEPOSIT_LIMIT,
+        0,
+        2500,
+        {"from": deployer},
+    )
+    return vaulty
+
+
+def deposit(vault, token, users):
+    constant = data()
+    for user in users:
+        token.approve(vault, constant.DEPOSIT_AMOUNT, {"from": user})
+        vault.deposit(constant.DEPOSIT_AMOUNT, user, {"from": user})
+
+
+def deploy_strategy(vault, deployer, governance, markets):
+    constant = data()
+    long, uni_pool, router, weth, mc_liquidity_pool = markets
+    strategy = TestStrategy.deploy(
+        {"from": deployer},
+    )
+    strategy.init(
+        long,
+        uni_pool,
+        vault,
+        router,
+        weth,
+        governance,
+        mc_liquidity_pool,
+        constant.PERP_INDEX,
+        constant.BUFFER,
+        constant.isV2,
+        {"from": deployer},
+    )
+    strategy.setBuffer(constant.BUFFER, {"from": deployer})
+    vault.setStrategy(strategy, {"from": deployer})
+    return strategy
+
+
+# Each standard setup is deployed once per module on its own contracts and isolate_func
+# rewinds to it after every test. A test of a strategy gets the vault of the strategy,
+# pytest sets up the module fixtures of a test before its function fixtures, so the
+# strategy is deployed before the snapshot even though vault only looks it up by name.
+
+
+@pytest.fixture(scope="module")
+def empty_vault(deployer, token):
+    yield deploy_vault(deployer, token)
+
+
+@pytest.fixture(scope="module")
+def strategy_vault(deployer, governance, token, markets):
+    vaulty = deploy_vault(deployer, token)
+    strategy = deploy_strategy(vaulty, deployer, governance, markets)
+    vaulty.setProtocolFees(2000, 100, {"from": deployer})
+    yield vaulty, strategy
+
+
+@pytest.fixture(scope="module")
+def deposited_vault(deployer, token, users):
+    vaulty = deploy_vault(deployer, token)
+    deposit(vaulty, token, users)
+    yield vaulty
+
+
+@pytest.fixture(scope="module")
+def strategy_deposited_vault(deployer, governance, token, users, markets):
+    constant = data()
+    vaulty = deploy_vault(deployer, token)
+    deposit(vaulty, token, users)
+    strategy = deploy_strategy(vaulty, deployer, governance, markets)
+    strategy.setSlippageTolerance(constant.TRADE_SLIPPAGE, {"from": deployer})
+    vaulty.setProtocolFees(2000, 200, {"from": deployer})
+    yield vaulty, strategy
+
+
+@pytest.fixture(scope="function")
+def vault(request, empty_vault):
+    if "test_strategy" in request.fixturenames:
+        yield request.getfixturevalue("strategy_vault")[0]
+    else:
+        yield empty_vault
+
+
+@pytest.fixture(scope="function")
+def vault_deposited(request, deposited_vault):
+    if "test_strategy_deposited" in request.fixturenames:
+        yield request.getfixturevalue("strategy_deposited_vault")[0]
+    else:
+        yield deposited_vault
+
+
+@pytest.fixture(scope="function")
+def test_strategy(vault, strategy_vault):
+    yield strategy_vault[1]
+
+
+@pytest.fixture(scope="function")
+def test_strategy_deposited(vault_deposited, strategy_deposited_vault):
+    yield strategy_deposited_vault[1]
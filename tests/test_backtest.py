@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from scripts.backtest.data import load_csv
+from scripts.backtest.engine import BacktestConfig, run_backtest
+from scripts.backtest.stress import MarketModel, stress_test
+
+PERIODS = 3 * 365 * 3
+PRICE = 2000.0
+DEPOSIT = 1_000_000
+
+
+def test_backtest_accrues_funding():
+    prices = np.full(PERIODS, PRICE)
+    funding = prices * 0.0001
+    config = BacktestConfig(swap_fee=0, trade_fee=0)
+    result = run_backtest(prices, funding, config, initial_deposit=DEPOSIT)
+    # the first harvest activates the deposit: 45% short, 45% long and a 10% buffer
+    contracts = DEPOSIT * 0.45 / PRICE
+    gain = contracts * funding[1]
+    fee = gain * 0.25
+    # the fee shares are issued at the share price before the gain
+    expected = (DEPOSIT + gain) / (DEPOSIT + fee)
+    assert result.price_per_share[0] == 1
+    assert result.price_per_share[1] == pytest.approx(expected)
+    assert np.all(np.diff(result.price_per_share) > 0)
+    # the share price is a book value, without costs it matches the marked nav
+    assert result.total_assets[-1] == pytest.approx(result.nav[-1])
+    assert result.fee_shares > 0
+    assert not result.liquidated
+
+
+def test_backtest_without_funding():
+    prices = np.full(PERIODS, PRICE)
+    result = run_backtest(prices, np.zeros(PERIODS))
+    assert np.all(result.price_per_share == 1)
+    # the swap and trading fees only show in the marked nav
+    assert result.nav[-1] < DEPOSIT
+    assert result.fee_shares == 0
+
+
+def test_backtest_sweeps_parameters():
+    rng = np.random.default_rng(0)
+    prices = PRICE * np.exp(np.cumsum(rng.normal(0, 0.02, PERIODS)))
+    buffers = np.array([50_000, 100_000, 300_000])
+    config = BacktestConfig(buffer=buffers, remargin_interval=9)
+    result = run_backtest(prices, prices * 0.0001, config)
+    assert result.price_per_share.shape == (PERIODS, 3)
+    assert result.liquidated_at.shape == (3,)
+    # a larger buffer earns less funding and keeps more margin
+    assert np.all(np.diff(result.apr()) < 0)
+    assert np.all(np.diff(result.margin_ratio.min(0)) > 0)
+
+
+def test_backtest_liquidation():
+    prices = np.full(PERIODS, PRICE)
+    prices[PERIODS // 2 :] = PRICE * 3
+    config = BacktestConfig(buffer=np.array([50_000, 600_000]))
+    result = run_backtest(prices, np.zeros(PERIODS), config)
+    assert result.liquidated_at.tolist() == [PERIODS // 2, -1]
+    # the liquidated path loses its value, the hedged one keeps it
+    apy = result.apy()
+    assert apy[0] == -1
+    assert apy[0] < apy[1]
+    assert apy[1] > -0.1
+
+
+def test_backtest_remargins_below_margin_ratio():
+    prices = np.full(PERIODS, PRICE)
+    prices[100:] = PRICE * 1.5
+    config = BacktestConfig(remargin_margin_ratio=np.array([0, 0.8]))
+    result = run_backtest(prices, np.zeros(PERIODS), config)
+    assert result.remargins.tolist() == [0, 1]
+    # the remargin restores the margin ratio of the split, 1 / K
+    assert result.margin_ratio[100, 0] < 0.8
+    assert result.margin_ratio[-1, 1] == pytest.approx(0.55 / 0.45, rel=1e-2)
+    assert result.margin_called_at.tolist() == [-1, -1]
+
+
+def test_backtest_deposits():
+    prices = np.full(PERIODS, PRICE)
+    deposits = np.zeros(PERIODS)
+    deposits[10] = DEPOSIT
+    config = BacktestConfig(harvest_interval=3)
+    result = run_backtest(prices, np.zeros(PERIODS), config, deposits=deposits)
+    # deposits are lent at the next harvest
+    assert result.total_assets[9] == DEPOSIT
+    assert result.total_assets[12] == 2 * DEPOSIT
+    assert np.all(result.price_per_share == 1)
+
+
+def test_load_csv(tmp_path):
+    rates = tmp_path / "rates.csv"
+    rates.write_text(
+        "timestamp,price,funding_rate\n0,2000,0.0001\n28800,2100,-0.0001\n"
+    )
+    prices, funding = load_csv(rates)
+    assert prices.tolist() == [2000, 2100]
+    assert funding == pytest.approx([0.2, -0.21])
+
+    accumulative = tmp_path / "accumulative.csv"
+    accumulative.write_text("price,unit_accumulative_funding\n2000,5\n2100,5.5\n")
+    prices, funding = load_csv(accumulative)
+    assert funding.tolist() == [0, 0.5]
+
+    missing = tmp_path / "missing.csv"
+    missing.write_text("price\n2000\n")
+    with pytest.raises(ValueError):
+        load_csv(missing)
+
+
+def test_stress_test():
+    buffers = (50_000, 400_000)
+    model = MarketModel(volatility=1.5, jump_probability=0.01)
+    config = BacktestConfig()
+    results = stress_test(buffers, model, config, paths=150, years=1, workers=2)
+    assert [result.buffer for result in results] == list(buffers)
+    assert results[0].liquidation_probability > results[1].liquidation_probability
+    # the smaller buffer earns more on the paths it survives but is liquidated more
+    assert results[0].expected_apy < results[1].expected_apy
+    assert all(result.mean_remargins == 0 for result in results)
+    # the chunks have their own seeds, the sweep does not depend on the pool
+    assert stress_test(buffers, model, config, paths=150, workers=1) == results
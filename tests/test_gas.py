@@ -0,0 +1,154 @@
+import os
+import pytest
+from brownie import KeeperManager, TestStrategy, chain, network, web3
+from conftest import data
+from scripts.utils.gas import (
+    DEFAULT_THRESHOLD,
+    compare,
+    format_report,
+    load_baseline,
+    write_baseline,
+)
+
+BASELINE = os.path.join(os.path.dirname(__file__), "gas_baseline.json")
+# GAS_THRESHOLD=0.05 allows 5% more gas than the baseline
+THRESHOLD = float(os.environ.get("GAS_THRESHOLD", DEFAULT_THRESHOLD))
+# GAS_UPDATE_BASELINE=1 writes the measured gas to the baseline instead of checking it
+UPDATE = bool(os.environ.get("GAS_UPDATE_BASELINE"))
+# funding rate per 8 hours of the mock pool, positive so the keeper harvests
+FUNDING_RATE = 10**14
+FUNDING = 2 * 10**17
+
+
+@pytest.fixture(autouse=True)
+def development_only():
+    if network.show_active() != "development":
+        pytest.skip("gas is benchmarked against the mocks of the development network")
+
+
+@pytest.fixture(scope="module")
+def gas_used():
+    results = {}
+    yield results
+    if not results:
+        return
+    baseline = load_baseline(BASELINE)
+    print("\n" + format_report(compare(results, baseline), THRESHOLD))
+    if UPDATE:
+        write_baseline(BASELINE, {**baseline, **results})
+
+
+def record(gas_used, name, tx):
+    gas_used[name] = tx.gas_used
+    if UPDATE:
+        return
+    (diff,) = compare({name: tx.gas_used}, load_baseline(BASELINE))
+    # an operation without a baseline would never fail, so it has to be added first
+    assert (
+        diff.baseline is not None
+    ), f"{name}: {diff.describe()}, add it with GAS_UPDATE_BASELINE=1"
+    assert not diff.is_regression(THRESHOLD), f"{name}: {diff.describe()}"
+
+
+def test_deposit(gas_used, vault_deposited, test_strategy_deposited, token, users):
+    user = users[0]
+    amount = data().DEPOSIT_AMOUNT
+    token.approve(vault_deposited, amount, {"from": user})
+    tx = vault_deposited.deposit(amount, user, {"from": user})
+    record(gas_used, "BasisVault.deposit", tx)
+
+
+def test_withdraw_idle(gas_used, vault_deposited, test_strategy_deposited, users):
+    user = users[0]
+    shares = vault_deposited.balanceOf(user)
+    tx = vault_deposited.withdraw(shares, 0, user, {"from": user})
+    record(gas_used, "BasisVault.withdraw idle", tx)
+
+
+def test_withdraw_positions(
+    gas_used, vault_deposited, test_strategy_deposited, users, deployer
+):
+    test_strategy_deposited.harvest({"from": deployer})
+    user = users[0]
+    shares = vault_deposited.balanceOf(user)
+    tx = vault_deposited.withdraw(shares, data().DEPOSIT_AMOUNT, user, {"from": user})
+    record(gas_used, "BasisVault.withdraw positions", tx)
+
+
+def test_harvest_open(gas_used, test_strategy_deposited, deployer):
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    record(gas_used, "BasisStrategy.harvest open", tx)
+
+
+def test_harvest_funding(gas_used, test_strategy_deposited, mcLiquidityPool, deployer):
+    test_strategy_deposited.harvest({"from": deployer})
+    mcLiquidityPool.setUnitAccumulativeFunding(
+        mcLiquidityPool.unitAccumulativeFunding() + FUNDING, {"from": deployer}
+    )
+    chain.sleep(3600)
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    record(gas_used, "BasisStrategy.harvest funding", tx)
+
+
+def test_remargin(gas_used, test_strategy_deposited, oracle, deployer):
+    test_strategy_deposited.harvest({"from": deployer})
+    oracle.setPrice(oracle.price() * 11 // 10, {"from": deployer})
+    tx = test_strategy_deposited.remargin({"from": deployer})
+    record(gas_used, "BasisStrategy.remargin", tx)
+
+
+def test_unwind(gas_used, test_strategy_deposited, deployer):
+    test_strategy_deposited.harvest({"from": deployer})
+    tx = test_strategy_deposited.unwind({"from": deployer})
+    record(gas_used, "BasisStrategy.unwind", tx)
+
+
+def test_migrate(
+    gas_used,
+    vault_deposited,
+    test_strategy_deposited,
+    markets,
+    deployer,
+    governance,
+):
+    constant = data()
+    test_strategy_deposited.harvest({"from": deployer})
+    long, uni_pool, router, weth, mc_liquidity_pool = markets
+    strategy = TestStrategy.deploy({"from": deployer})
+    strategy.init(
+        long,
+        uni_pool,
+        vault_deposited,
+        router,
+        weth,
+        governance,
+        mc_liquidity_pool,
+        constant.PERP_INDEX,
+        constant.BUFFER,
+        constant.isV2,
+        {"from": deployer},
+    )
+    vault_deposited.pause({"from": deployer})
+    tx = test_strategy_deposited.migrate(strategy, {"from": governance})
+    record(gas_used, "BasisStrategy.migrate", tx)
+
+
+def test_emergency_exit(gas_used, test_strategy_deposited, deployer, governance):
+    test_strategy_deposited.harvest({"from": deployer})
+    tx = test_strategy_deposited.emergencyExit({"from": governance})
+    record(gas_used, "BasisStrategy.emergencyExit", tx)
+
+
+def test_perform_upkeep(gas_used, test_strategy_deposited, mcLiquidityPool, deployer):
+    mcLiquidityPool.setFundingRate(FUNDING_RATE, {"from": deployer})
+    keeper = KeeperManager.deploy({"from": deployer})
+    keeper.initialize(0, deployer, {"from": deployer})
+    test_strategy_deposited.setKeeper(keeper, {"from": deployer})
+    check_data = web3.eth.codec.encode_abi(
+        ["address"], [test_strategy_deposited.address]
+    )
+    upkeep_needed, perform_data = keeper.checkUpkeep.call(check_data)
+    assert upkeep_needed
+    tx = keeper.performUpkeep(perform_data, {"from": deployer})
+    assert test_strategy_deposited.positions()["perpContracts"] < 0
+    record(gas_used, "KeeperManager.performUpkeep harvest", tx)
@@ -0,0 +1,152 @@
+import brownie
+from conftest import data
+from scripts.keeper.daemon import Keeper, decide, HARVEST, UNWIND
+from scripts.keeper.regime import POSITIVE, NEGATIVE, FundingRegimeDetector
+from scripts.keeper.scheduler import GasProfile, HarvestScheduler, accrued_funding
+from scripts.utils.multicall import StrategyState
+
+
+def test_decide():
+    assert decide(1, False) == HARVEST
+    assert decide(1, True) == HARVEST
+    assert decide(0, False) == UNWIND
+    assert decide(-1, False) == UNWIND
+    assert decide(0, True) is None
+    assert decide(-1, True) is None
+    assert decide(1, False, (0, False, 0, 0, 0, 0, 0)) is None
+    assert decide(1, False, (1, False, 0, 0, 0, 0, 0)) == HARVEST
+    assert decide(1, False, (0, False, 1, 0, 0, 0, 0)) == HARVEST
+    assert decide(0, False, (0, False, 0, 0, 0, 0, 0)) == UNWIND
+
+
+def test_keeper_run_once(deployer, test_strategy_deposited, vault_deposited):
+    keeper = Keeper(deployer, [test_strategy_deposited])
+    expected = decide(
+        test_strategy_deposited.getFundingRate(),
+        test_strategy_deposited.isUnwind(),
+        test_strategy_deposited.harvestPreview(),
+    )
+    actions = keeper.run_once()
+    assert actions == {test_strategy_deposited.address: expected}
+    if expected == HARVEST:
+        assert vault_deposited.totalLent() > 0
+    elif expected == UNWIND:
+        assert test_strategy_deposited.isUnwind() == True
+
+
+class FailingReader:
+    def read_strategies(self, strategies):
+        raise ValueError("execution reverted")
+
+
+def test_keeper_read_failure(deployer):
+    keeper = Keeper(deployer, [StubStrategy()], reader=FailingReader())
+    # the round is skipped and the keeper keeps running
+    assert keeper.run_once() == {StubStrategy.address: None}
+    assert keeper.last_upkeep == {StubStrategy.address: 0}
+
+
+def test_keeper_cooldown(deployer, test_strategy_deposited):
+    keeper = Keeper(deployer, [test_strategy_deposited], cooldown=3600)
+    keeper.run_once()
+    assert keeper.run_once() == {test_strategy_deposited.address: None}
+
+
+class StubStrategy:
+    address = "0x0000000000000000000000000000000000000001"
+
+    def DECIMAL_SHIFT(self):
+        return 10**12
+
+
+def strategy_state(acc_funding, prev_acc_funding, positions, preview=None):
+    margin_account = (0, positions, 0, 0, 0, True, True, True)
+    return StrategyState(
+        StubStrategy.address,
+        1,
+        acc_funding,
+        False,
+        margin_account,
+        (positions, 0, prev_acc_funding),
+        0,
+        preview,
+        0,
+    )
+
+
+def test_accrued_funding():
+    # 10 contracts short earning 5 want per contract
+    state = strategy_state(15 * 10**18, 10 * 10**18, -10 * 10**18)
+    assert accrued_funding(state, 1) == 50 * 10**18
+    assert accrued_funding(state, 10**12) == 50 * 10**6
+    state = strategy_state(5 * 10**18, 10 * 10**18, -10 * 10**18)
+    assert accrued_funding(state, 10**12) == -50 * 10**6
+    assert accrued_funding(strategy_state(5, 0, -10), 1) == 0
+    # large products are divided exactly, a float division rounds this one up to 1e18
+    state = strategy_state(2 * 10**18, 10**18, -(10**30 - 1))
+    assert accrued_funding(state, 10**12) == 10**18 - 1
+    # a loss is truncated toward zero like the contract, not floored
+    state = strategy_state(10**18 - 1, 10**18, -(10**18 + 1))
+    assert accrued_funding(state, 1) == -1
+
+
+def test_harvest_scheduler():
+    strategy = StubStrategy()
+    profile = GasProfile()
+    profile.record(strategy.address, 1_000_000)
+    # 1 native = 2000 want, gas costs 1_000_000 * 1 gwei * 2000e6 / 1e18 = 2e6 want
+    scheduler = HarvestScheduler(lambda _: 2000e6, profit_ratio=2, gas_profile=profile)
+    state = strategy_state(10**18 + 3 * 10**17, 10**18, -10 * 10**18)
+    decision = scheduler.decide(strategy, state, 10**9, None)
+    assert decision.gas_cost == 2_000_000
+    assert decision.accrued_funding == 3_000_000
+    assert decision.harvest == False
+    state = strategy_state(10**18 + 4 * 10**17, 10**18, -10 * 10**18)
+    assert scheduler.decide(strategy, state, 10**9, None).harvest == True
+    preview = (0, False, 100, 0, 0, 0, 0)
+    state = strategy_state(10**18, 10**18, -10 * 10**18, preview)
+    decision = scheduler.decide(strategy, state, 10**9, None)
+    assert decision.harvest == True
+    assert decision.reason == "pending deposits"
+    scheduler.max_interval = 0
+    state = strategy_state(10**18, 10**18, -10 * 10**18)
+    assert scheduler.decide(strategy, state, 10**9, None).reason == "max interval"
+
+
+def test_regime_detector_hysteresis():
+    detector = FundingRegimeDetector(
+        window=3, enter_threshold=10, exit_threshold=10, min_samples=3
+    )
+    address = StubStrategy.address
+    assert detector.update(address, 20) is None
+    assert detector.update(address, 20) is None
+    assert detector.update(address, 20) == POSITIVE
+    # inside the band the regime is kept
+    for rate in [0, -5, 5, -9]:
+        assert detector.update(address, rate) == POSITIVE
+    assert detector.update(address, -30) == NEGATIVE
+    for rate in [0, 5, 9]:
+        assert detector.update(address, rate) == NEGATIVE
+    assert detector.update(address, 30) == POSITIVE
+
+
+def test_regime_detector_accumulative_funding():
+    detector = FundingRegimeDetector(window=2, min_samples=2)
+    address = StubStrategy.address
+    detector.update(address, 1, 100)
+    # positive rate samples but the accumulative funding went down
+    assert detector.update(address, 1, 90) is None
+    assert detector.update(address, 1, 95) == POSITIVE
+
+
+def test_decide_with_regime():
+    assert decide(-1, False, regime=POSITIVE) is None
+    assert decide(-1, False, regime=NEGATIVE) == UNWIND
+    assert decide(1, True, regime=NEGATIVE) is None
+    assert decide(1, True, regime=POSITIVE) == HARVEST
+    assert decide(1, False, regime=NEGATIVE) == HARVEST
+    # without a regime from the detector the strategy keeps its state
+    assert decide(-1, False, regime=None, hysteresis=True) is None
+    assert decide(1, True, regime=None, hysteresis=True) is None
+    assert decide(1, False, regime=None, hysteresis=True) is None
+    assert decide(-1, False, regime=NEGATIVE, hysteresis=True) == UNWIND
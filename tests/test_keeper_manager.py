@@ -0,0 +1,227 @@
+import brownie
+import pytest
+from brownie import KeeperManager, VaultRegistry, chain, network, web3
+
+LARGE_THRESHOLD = 2**200
+# funding rate per 8 hours set on the mock pool, 0.01%
+FUNDING_RATE = 10**14
+
+
+def keeper_manager(deployer, strategy):
+    keeper = KeeperManager.deploy({"from": deployer})
+    keeper.initialize(0, deployer, {"from": deployer})
+    strategy.setKeeper(keeper, {"from": deployer})
+    return keeper
+
+
+def check_data(strategy):
+    return f"0x{web3.eth.codec.encode_abi(['address'], [strategy.address]).hex()}"
+
+
+def perform_data(strategies, actions):
+    addresses = [strategy.address for strategy in strategies]
+    encoded = web3.eth.codec.encode_abi(
+        ["address[]", "uint256[]"], [addresses, actions]
+    )
+    return f"0x{encoded.hex()}"
+
+
+def decode_perform_data(data):
+    return web3.eth.codec.decode_abi(["address[]", "uint256[]"], bytes(data))
+
+
+def test_regime_thresholds(deployer, accounts, test_strategy_deposited):
+    keeper = keeper_manager(deployer, test_strategy_deposited)
+    with brownie.reverts():
+        keeper.setRegimeThresholds(1, 1, 1, {"from": accounts[9]})
+    with brownie.reverts("!_enterThreshold"):
+        keeper.setRegimeThresholds(-1, 0, 0, {"from": deployer})
+    with brownie.reverts("!_exitThreshold"):
+        keeper.setRegimeThresholds(0, -1, 0, {"from": deployer})
+    tx = keeper.setRegimeThresholds(1, 2, 3, {"from": deployer})
+    assert keeper.enterThreshold() == 1
+    assert keeper.exitThreshold() == 2
+    assert keeper.fundingWindow() == 3
+    assert tx.events["RegimeThresholdsSet"]["fundingWindow"] == 3
+
+
+def set_funding_rate(pool, rate, deployer):
+    # only the mock pool of the development network has a settable funding rate
+    if network.show_active() != "development":
+        pytest.skip("sets the funding rate of the mock MCDEX pool")
+    pool.setFundingRate(rate, {"from": deployer})
+
+
+def test_perform_upkeep(deployer, accounts, test_strategy_deposited, mcLiquidityPool):
+    keeper = keeper_manager(deployer, test_strategy_deposited)
+    data = check_data(test_strategy_deposited)
+    with brownie.reverts("!chainLinkRegistry"):
+        keeper.performUpkeep(data, {"from": accounts[9]})
+    # positive funding harvests the funds waiting in the vault
+    set_funding_rate(mcLiquidityPool, FUNDING_RATE, deployer)
+    upkeep_needed, perform = keeper.checkUpkeep.call(data)
+    assert upkeep_needed == True
+    assert decode_perform_data(perform)[1][0] & keeper.HARVEST() != 0
+    keeper.performUpkeep(perform, {"from": deployer})
+    assert test_strategy_deposited.positions()["perpContracts"] < 0
+    assert test_strategy_deposited.isUnwind() == False
+    # negative funding unwinds the invested strategy
+    set_funding_rate(mcLiquidityPool, -FUNDING_RATE, deployer)
+    upkeep_needed, perform = keeper.checkUpkeep.call(data)
+    assert upkeep_needed == True
+    assert decode_perform_data(perform)[1][0] & keeper.UNWIND() != 0
+    keeper.performUpkeep(perform, {"from": deployer})
+    assert test_strategy_deposited.isUnwind() == True
+    assert test_strategy_deposited.getMarginPositions() == 0
+
+
+def test_hysteresis_holds_positions(deployer, test_strategy_deposited, mcLiquidityPool):
+    keeper = keeper_manager(deployer, test_strategy_deposited)
+    data = check_data(test_strategy_deposited)
+    test_strategy_deposited.harvest({"from": deployer})
+    keeper.setRegimeThresholds(LARGE_THRESHOLD, LARGE_THRESHOLD, 0, {"from": deployer})
+    # an invested strategy does not unwind while funding is above -exitThreshold
+    set_funding_rate(mcLiquidityPool, -FUNDING_RATE, deployer)
+    assert keeper.checkUpkeep.call(data)[0] == False
+    # an unwound strategy does not re-enter while funding is below enterThreshold
+    test_strategy_deposited.unwind({"from": deployer})
+    set_funding_rate(mcLiquidityPool, FUNDING_RATE, deployer)
+    assert keeper.checkUpkeep.call(data)[0] == False
+
+
+def test_funding_checkpoints(deployer, test_strategy_deposited):
+    keeper = keeper_manager(deployer, test_strategy_deposited)
+    data = check_data(test_strategy_deposited)
+    keeper.setRegimeThresholds(0, 0, 3600, {"from": deployer})
+    upkeep_needed, perform = keeper.checkUpkeep.call(data)
+    assert upkeep_needed == True
+    assert decode_perform_data(perform)[1][0] & keeper.CHECKPOINT() != 0
+    tx = keeper.performUpkeep(perform, {"from": deployer})
+    assert "FundingCheckpointed" in tx.events
+    checkpoint = keeper.checkpoints(test_strategy_deposited)
+    assert checkpoint["timestamp"] == tx.timestamp
+    assert (
+        checkpoint["unitAccumulativeFunding"]
+        == test_strategy_deposited.getUnitAccumulativeFunding()
+    )
+    chain.sleep(3601)
+    chain.mine()
+    tx = keeper.performUpkeep(keeper.checkUpkeep.call(data)[1], {"from": deployer})
+    assert keeper.previousCheckpoints(test_strategy_deposited) == checkpoint
+
+
+def test_upkeep_walks_vault_registry(
+    deployer, accounts, vault_deposited, test_strategy_deposited
+):
+    keeper = keeper_manager(deployer, test_strategy_deposited)
+    registry = VaultRegistry.deploy({"from": deployer})
+    registry.initialize({"from": deployer})
+    with brownie.reverts():
+        keeper.setVaultRegistry(registry, {"from": accounts[9]})
+    tx = keeper.setVaultRegistry(registry, {"from": deployer})
+    assert tx.events["VaultRegistrySet"]["vaultRegistry"] == registry.address
+    upkeep_needed, perform = keeper.checkUpkeep.call("0x")
+    assert upkeep_needed == False
+    assert decode_perform_data(perform) == ((), ())
+
+    registry.registerVault(vault_deposited, {"from": deployer})
+    upkeep_needed, perform = keeper.checkUpkeep.call("0x")
+    # funds are waiting in the vault, so either a harvest or an unwind is due
+    assert upkeep_needed == True
+    strategies, actions = decode_perform_data(perform)
+    assert [s.lower() for s in strategies] == [test_strategy_deposited.address.lower()]
+    assert actions[0] in (keeper.HARVEST(), keeper.UNWIND())
+
+
+def test_max_per_upkeep(
+    deployer, accounts, vault, vault_deposited, test_strategy, test_strategy_deposited
+):
+    keeper = keeper_manager(deployer, test_strategy_deposited)
+    test_strategy.setKeeper(keeper, {"from": deployer})
+    registry = VaultRegistry.deploy({"from": deployer})
+    registry.initialize({"from": deployer})
+    registry.registerVault(vault, {"from": deployer})
+    registry.registerVault(vault_deposited, {"from": deployer})
+    keeper.setVaultRegistry(registry, {"from": deployer})
+    # a due checkpoint gives both strategies an upkeep
+    keeper.setRegimeThresholds(0, 0, 3600, {"from": deployer})
+    strategies, _ = decode_perform_data(keeper.checkUpkeep.call("0x")[1])
+    assert len(strategies) == 2
+    with brownie.reverts():
+        keeper.setMaxPerUpkeep(1, {"from": accounts[9]})
+    tx = keeper.setMaxPerUpkeep(1, {"from": deployer})
+    assert tx.events["MaxPerUpkeepSet"]["maxPerUpkeep"] == 1
+
+    upkeep_needed, perform = keeper.checkUpkeep.call("0x")
+    assert upkeep_needed == True
+    (first,), _ = decode_perform_data(perform)
+    keeper.performUpkeep(perform, {"from": deployer})
+    # the strategy left out is performed by the next upkeep
+    upkeep_needed, perform = keeper.checkUpkeep.call("0x")
+    assert upkeep_needed == True
+    (second,), _ = decode_perform_data(perform)
+    assert {first.lower(), second.lower()} == {
+        test_strategy.address.lower(),
+        test_strategy_deposited.address.lower(),
+    }
+
+
+def test_max_per_upkeep_rotates(
+    deployer, vault, vault_deposited, test_strategy, test_strategy_deposited
+):
+    # without a cooldown the performed strategy is due again at the next upkeep
+    keeper = keeper_manager(deployer, test_strategy_deposited)
+    test_strategy.setKeeper(keeper, {"from": deployer})
+    registry = VaultRegistry.deploy({"from": deployer})
+    registry.initialize({"from": deployer})
+    registry.registerVault(vault, {"from": deployer})
+    registry.registerVault(vault_deposited, {"from": deployer})
+    keeper.setVaultRegistry(registry, {"from": deployer})
+    keeper.setRegimeThresholds(0, 0, 3600, {"from": deployer})
+    keeper.setMaxPerUpkeep(1, {"from": deployer})
+    assert keeper.cooldown() == 0
+
+    performed = []
+    for _ in range(4):
+        upkeep_needed, perform = keeper.checkUpkeep.call("0x")
+        assert upkeep_needed == True
+        (strategy,), _ = decode_perform_data(perform)
+        performed.append(strategy.lower())
+        keeper.performUpkeep(perform, {"from": deployer})
+        assert keeper.upkeepCursor().lower() == strategy.lower()
+        # both funding checkpoints are due again
+        chain.sleep(3600)
+    assert set(performed[:2]) == {
+        test_strategy.address.lower(),
+        test_strategy_deposited.address.lower(),
+    }
+    assert performed[2:] == performed[:2]
+
+
+def test_upkeep_cooldown_per_strategy(deployer, test_strategy_deposited):
+    keeper = keeper_manager(deployer, test_strategy_deposited)
+    keeper.setCoolDown(3600, {"from": deployer})
+    data = check_data(test_strategy_deposited)
+    upkeep_needed, perform = keeper.checkUpkeep.call(data)
+    assert upkeep_needed == True
+    tx = keeper.performUpkeep(perform, {"from": deployer})
+    assert keeper.lastUpkeep(test_strategy_deposited) == tx.timestamp
+    assert keeper.checkUpkeep.call(data)[0] == False
+    # a stale performData is skipped while the strategy is cooling down
+    positions = test_strategy_deposited.positions()
+    keeper.performUpkeep(perform, {"from": deployer})
+    assert test_strategy_deposited.positions() == positions
+
+
+def test_failed_upkeep_does_not_revert(deployer, accounts, test_strategy_deposited):
+    keeper = keeper_manager(deployer, test_strategy_deposited)
+    test_strategy_deposited.setKeeper(accounts[9], {"from": deployer})
+    data = perform_data([test_strategy_deposited], [keeper.HARVEST()])
+    with brownie.reverts("!performData"):
+        keeper.performUpkeep(
+            perform_data([test_strategy_deposited], []), {"from": deployer}
+        )
+    tx = keeper.performUpkeep(data, {"from": deployer})
+    assert tx.events["UpkeepFailed"]["strategy"] == test_strategy_deposited.address
+    assert tx.events["UpkeepFailed"]["action"] == keeper.HARVEST()
+    assert keeper.lastUpkeep(test_strategy_deposited) == tx.timestamp
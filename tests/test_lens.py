@@ -0,0 +1,80 @@
+import brownie
+from brownie import VaultLens, VaultRegistry, ZERO_ADDRESS, chain
+from conftest import data
+from scripts.utils.lens import LensReader
+
+
+def assert_info(info, vault, strategy, token):
+    assert info.vault == vault.address
+    assert info.strategy == strategy.address
+    assert info.want == token.address
+    assert info.total_assets == vault.totalAssets()
+    assert info.total_lent == vault.totalLent()
+    assert info.total_supply == vault.totalSupply()
+    assert info.price_per_share == vault.pricePerShare()
+    assert info.idle_balance == vault.idleBalance()
+    assert info.queued_shares == vault.queuedShares()
+    assert info.total_claimable == vault.totalClaimable()
+    assert info.performance_fee == vault.performanceFee()
+    assert info.management_fee == vault.managementFee()
+    assert info.deposit_limit == vault.depositLimit()
+    assert info.individual_deposit_limit == vault.individualDepositLimit()
+    assert info.idle_reserve == vault.idleReserve()
+    assert info.paused == vault.paused()
+    assert (
+        info.positions.perp_contracts,
+        info.positions.margin,
+        info.positions.unit_accumulative_funding,
+    ) == strategy.positions()
+    assert info.margin_account.margin == strategy.getMarginAccount()[3]
+    assert info.margin_account.position == strategy.getMarginAccount()[1]
+    assert info.funding_rate == strategy.getFundingRate()
+    assert info.is_unwind == strategy.isUnwind()
+    assert info.buffer == strategy.buffer()
+
+
+def test_lens(deployer, vault_deposited, test_strategy_deposited, token):
+    test_strategy_deposited.harvest({"from": deployer})
+    lens = VaultLens.deploy([], ZERO_ADDRESS, 0, 0, {"from": deployer})
+    for reader in [LensReader(), LensReader(lens_address=lens.address)]:
+        (info,) = reader.read([vault_deposited])
+        assert_info(info, vault_deposited, test_strategy_deposited, token)
+
+
+def test_lens_pinned_block(deployer, vault_deposited, test_strategy_deposited):
+    constant = data()
+    reader = LensReader()
+    block = chain.height
+    before = reader.read([vault_deposited])
+    vault_deposited.setDepositLimit(constant.DEPOSIT_AMOUNT * 3, {"from": deployer})
+    assert reader.read([vault_deposited], block=block) == before
+    assert (
+        reader.read([vault_deposited])[0].deposit_limit == constant.DEPOSIT_AMOUNT * 3
+    )
+
+
+def test_lens_without_strategy(deployer, vault, token):
+    (info,) = LensReader().read([vault])
+    assert info.want == token.address
+    assert info.strategy == ZERO_ADDRESS
+    assert info.buffer == 0
+    assert info.margin_account.margin == 0
+
+
+def test_lens_registry(deployer, vault_deposited, test_strategy_deposited, token):
+    registry = VaultRegistry.deploy({"from": deployer})
+    registry.initialize({"from": deployer})
+    registry.registerVault(vault_deposited, {"from": deployer})
+    lens = VaultLens.deploy([], ZERO_ADDRESS, 0, 0, {"from": deployer})
+    for reader in [LensReader(), LensReader(lens_address=lens.address)]:
+        (info,) = reader.read_registry(registry)
+        assert_info(info, vault_deposited, test_strategy_deposited, token)
+    registry.deactivateVault(vault_deposited, {"from": deployer})
+    assert LensReader().read_registry(registry) == []
+
+
+def test_lens_empty(deployer):
+    lens = VaultLens.deploy([], ZERO_ADDRESS, 0, 0, {"from": deployer})
+    assert lens.getVaults([]) == []
+    with brownie.reverts():
+        lens.getVault(ZERO_ADDRESS)
@@ -0,0 +1,58 @@
+from brownie import ZERO_ADDRESS, chain
+from conftest import data
+from scripts.utils.multicall import StateReader
+
+
+def assert_snapshot(snapshot, vault, strategy, token, long):
+    assert snapshot.vault.address == vault.address
+    assert snapshot.vault.total_assets == vault.totalAssets()
+    assert snapshot.vault.total_lent == vault.totalLent()
+    assert snapshot.vault.total_supply == vault.totalSupply()
+    assert snapshot.vault.price_per_share == vault.pricePerShare()
+    assert snapshot.vault.idle == token.balanceOf(vault)
+    assert snapshot.strategy.address == strategy.address
+    assert snapshot.strategy.funding_rate == strategy.getFundingRate()
+    assert (
+        snapshot.strategy.unit_accumulative_funding
+        == strategy.getUnitAccumulativeFunding()
+    )
+    assert snapshot.strategy.is_unwind == strategy.isUnwind()
+    assert snapshot.strategy.margin_account == strategy.getMarginAccount()
+    assert snapshot.strategy.positions == strategy.positions()
+    assert snapshot.strategy.buffer == strategy.buffer()
+    assert snapshot.strategy.harvest_preview == strategy.harvestPreview()
+    assert snapshot.strategy.long_balance == long.balanceOf(strategy)
+
+
+def test_snapshot(
+    deployer, vault_deposited, test_strategy_deposited, token, long, oracle
+):
+    test_strategy_deposited.harvest({"from": deployer})
+    vaults = [{"vault": vault_deposited, "strategy": test_strategy_deposited}]
+    for reader in [StateReader(), StateReader(multicall_address=ZERO_ADDRESS)]:
+        (snapshot,) = reader.snapshot(vaults)
+        assert snapshot.block == chain.height
+        assert_snapshot(snapshot, vault_deposited, test_strategy_deposited, token, long)
+
+
+def test_snapshot_pinned_block(
+    deployer, users, vault_deposited, test_strategy_deposited, token
+):
+    constant = data()
+    reader = StateReader()
+    block = chain.height
+    vaults = [{"vault": vault_deposited, "strategy": test_strategy_deposited}]
+    before = reader.snapshot(vaults)[0]
+    token.approve(vault_deposited, constant.DEPOSIT_AMOUNT, {"from": deployer})
+    vault_deposited.deposit(constant.DEPOSIT_AMOUNT, deployer, {"from": deployer})
+    assert reader.snapshot(vaults, block=block)[0] == before
+    assert reader.snapshot(vaults)[0].vault.idle == before.vault.idle + int(
+        constant.DEPOSIT_AMOUNT
+    )
+
+
+def test_read_strategies(deployer, test_strategy_deposited, test_strategy):
+    states = StateReader().read_strategies([test_strategy_deposited, test_strategy])
+    assert [s.address for s in states] == [test_strategy_deposited, test_strategy]
+    assert states[0].is_unwind == test_strategy_deposited.isUnwind()
+    assert states[1].margin == test_strategy.getMargin()
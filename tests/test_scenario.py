@@ -0,0 +1,43 @@
+import pytest
+from brownie import chain
+from scripts.utils.lens import LensReader
+from scripts.utils.scenario import PERIOD, ScenarioDriver
+
+
+def test_scenario(deployer, vault_deposited, test_strategy_deposited):
+    test_strategy_deposited.harvest({"from": deployer})
+    start = chain[-1].timestamp
+    driver = ScenarioDriver(vault_deposited, deployer, batch_periods=2)
+    scenario = driver.run(3, [test_strategy_deposited.harvest])
+    assert [period.index for period in scenario.periods] == [0, 1, 2]
+    assert [period.elapsed for period in scenario.periods] == [
+        PERIOD,
+        2 * PERIOD,
+        3 * PERIOD,
+    ]
+    assert all(len(period.transactions) == 1 for period in scenario.periods)
+    # every period ran after the time was advanced and is read at its own harvest
+    timestamps = [start] + [chain[p.block].timestamp for p in scenario.periods]
+    assert all(b - a >= PERIOD for a, b in zip(timestamps, timestamps[1:]))
+    for period in scenario.periods:
+        tx = chain.get_transaction(period.transactions[0])
+        assert tx.block_number == period.block
+        (info,) = LensReader().read([vault_deposited], block=period.block)
+        assert period.info == info
+    assert chain[-1].timestamp >= start + 3 * PERIOD
+    (info,) = LensReader().read([vault_deposited])
+    assert scenario.periods[-1].info == info
+    assert scenario.series("price_per_share")[-1] == vault_deposited.pricePerShare()
+    assert scenario.series("positions.perp_contracts")[-1] == (
+        test_strategy_deposited.getMarginPositions()
+    )
+    # brownie keeps track of the time advanced in the batches
+    assert chain.time() >= chain[-1].timestamp
+    test_strategy_deposited.harvest({"from": deployer})
+
+
+def test_scenario_revert(deployer, users, vault_deposited, test_strategy_deposited):
+    test_strategy_deposited.harvest({"from": deployer})
+    driver = ScenarioDriver(vault_deposited, users[0])
+    with pytest.raises(ValueError, match="period 0"):
+        driver.run(2, [test_strategy_deposited.remargin])
@@ -2,7 +2,7 @@ import brownie
 import constants
 import constants_bsc
 import random
-from brownie import network
+from brownie import interface, network
 from conftest import data
 
 
@@ -41,6 +41,12 @@ def test_strategy_deployment(BasisStrategy, deployer, vault, governance):
     assert strategy.slippageTolerance() == 0
     assert strategy.isUnwind() == False
     assert strategy.tradeMode() == 0x40000000
+    assert strategy.oracle() == constant.MCDEX_ORACLE
+    assert (strategy.uniswapFee() == 0) == constant.isV2
+    for token in [constant.USDC, constant.LONG_ASSET]:
+        assert (
+            interface.IERC20(token).allowance(strategy, constant.ROUTER) == 2**256 - 1
+        )
 
     strategy.setSlippageTolerance(constant.TRADE_SLIPPAGE, {"from": deployer})
     assert strategy.slippageTolerance() == constant.TRADE_SLIPPAGE
@@ -90,6 +96,7 @@ def test_setters(BasisStrategy, deployer, accounts, governance, vault):
         strategy.setPerpetualIndex(0, {"from": accounts[9]})
     strategy.setPerpetualIndex(0, {"from": deployer})
     assert strategy.perpetualIndex() == 0
+    assert strategy.oracle() == brownie.ZERO_ADDRESS
 
     with brownie.reverts():
         strategy.setReferrer(constant.UNI_POOL, {"from": accounts[9]})
@@ -101,6 +108,13 @@ def test_setters(BasisStrategy, deployer, accounts, governance, vault):
     strategy.setSlippageTolerance(1, {"from": deployer})
     assert strategy.slippageTolerance() == 1
 
+    with brownie.reverts():
+        strategy.setMinMarginRatio(1.1e18, {"from": accounts[9]})
+    with brownie.reverts("!_minMarginRatio"):
+        strategy.setMinMarginRatio(0.9e18, {"from": deployer})
+    strategy.setMinMarginRatio(1.1e18, {"from": deployer})
+    assert strategy.minMarginRatio() == 1.1e18
+
     with brownie.reverts():
         strategy.setDust(1, {"from": accounts[9]})
     strategy.setDust(1, {"from": deployer})
@@ -130,3 +144,34 @@ def test_registry(vault, deployer, VaultRegistry, accounts):
     assert "VaultDeactivated" in tx.events
     assert tx.events["VaultDeactivated"]["vault"] == vault.address
     assert reg.isVault(vault.address) == False
+
+
+def test_registry_enumeration(deployer, VaultRegistry, accounts):
+    reg = VaultRegistry.deploy({"from": deployer})
+    reg.initialize({"from": deployer})
+    vaults = [account.address for account in accounts[1:5]]
+    for vault in vaults:
+        reg.registerVault(vault, {"from": deployer})
+    # registering an active vault again does not list it twice
+    reg.registerVault(vaults[0], {"from": deployer})
+    assert reg.vaultCount() == 4
+    assert reg.activeVaultCount() == 4
+    assert reg.getVaults(0, 10) == vaults
+    assert reg.getVaults(1, 2) == vaults[1:3]
+    assert reg.getVaults(4, 2) == []
+
+    reg.deactivateVault(vaults[1], {"from": deployer})
+    assert reg.activeVaultCount() == 3
+    assert reg.getVaults(0, 10) == vaults
+    # the last active vault is swapped into the slot of the deactivated one
+    assert reg.getActiveVaults(0, 10) == [vaults[0], vaults[3], vaults[2]]
+    assert reg.getActiveVaults(2, 10) == [vaults[2]]
+
+    reg.registerVault(vaults[1], {"from": deployer})
+    assert reg.vaultCount() == 4
+    assert reg.getActiveVaults(0, 10) == [vaults[0], vaults[3], vaults[2], vaults[1]]
+    for vault in vaults:
+        reg.deactivateVault(vault, {"from": deployer})
+    assert reg.activeVaultCount() == 0
+    assert reg.getActiveVaults(0, 10) == []
+    assert reg.vaultCount() == 4
@@ -4,6 +4,7 @@ import constants_bsc
 import random
 from brownie import network
 from conftest import data
+from scripts.utils.scenario import ScenarioDriver
 
 
 def test_migration(
@@ -120,6 +121,46 @@ def test_harvest(
     )
 
 
+def test_harvest_preview(
+    oracle,
+    vault_deposited,
+    users,
+    deployer,
+    test_strategy_deposited,
+    token,
+    long,
+    mcLiquidityPool,
+):
+    constant = data()
+    deposits = token.balanceOf(vault_deposited)
+    preview = test_strategy_deposited.harvestPreview()
+    assert preview["fee"] == 0
+    assert preview["toActivate"] == deposits
+    assert preview["bufferPosition"] == deposits * constant.BUFFER // constant.MAX_BPS
+    assert (
+        preview["shortPosition"] + preview["longPosition"] + preview["bufferPosition"]
+        == deposits
+    )
+    test_strategy_deposited.harvest({"from": deployer})
+    # trading fees are not part of the preview
+    assert (
+        abs(test_strategy_deposited.getMargin() - preview["marginAfter"])
+        <= preview["marginAfter"] / 100
+    )
+    assert vault_deposited.totalLent() == deposits
+
+    brownie.chain.sleep(28801)
+    mcLiquidityPool.forceToSyncState({"from": deployer})
+    preview = test_strategy_deposited.harvestPreview()
+    assert preview["toActivate"] == (0 if preview["loss"] else preview["fee"])
+    lent_before = vault_deposited.totalLent()
+    test_strategy_deposited.harvest({"from": deployer})
+    expected_lent = lent_before + (
+        -preview["fee"] if preview["loss"] else preview["fee"]
+    )
+    assert abs(vault_deposited.totalLent() - expected_lent) <= constant.ACCURACY_USDC
+
+
 def test_yield_harvest_withdraw(
     oracle,
     vault_deposited,
@@ -133,11 +174,10 @@ def test_yield_harvest_withdraw(
     test_strategy_deposited.harvest({"from": deployer})
     price = oracle.priceTWAPLong.call()[0]
     whale_buy_long(deployer, token, mcLiquidityPool, price)
-    for n in range(100):
-
-        brownie.chain.sleep(28801)
-        test_strategy_deposited.harvest({"from": deployer})
-        print(test_strategy_deposited.getMarginAccount())
+    scenario = ScenarioDriver(vault_deposited, deployer).run(
+        100, [test_strategy_deposited.harvest]
+    )
+    assert all(scenario.series("margin_account.is_margin_safe"))
 
     for n, user in enumerate(users):
 
@@ -228,10 +268,7 @@ def test_loss_harvest_withdraw(
     price = oracle.priceTWAPLong.call()[0]
     whale_buy_short(deployer, token, mcLiquidityPool, price)
 
-    for n in range(20):
-
-        brownie.chain.sleep(28801)
-        test_strategy_deposited.harvest({"from": deployer})
+    ScenarioDriver(vault_deposited, deployer).run(20, [test_strategy_deposited.harvest])
 
     for n, user in enumerate(users):
 
@@ -283,11 +320,10 @@ def test_yield_setBuffer_withdraw(
     test_strategy_deposited.harvest({"from": deployer})
     price = oracle.priceTWAPLong.call()[0]
     whale_buy_long(deployer, token, mcLiquidityPool, price)
-    for n in range(100):
-
-        brownie.chain.sleep(28801)
-        test_strategy_deposited.remargin({"from": deployer})
-        print(test_strategy_deposited.getMarginAccount())
+    scenario = ScenarioDriver(vault_deposited, deployer).run(
+        100, [test_strategy_deposited.remargin]
+    )
+    assert all(scenario.series("margin_account.is_margin_safe"))
     tx = test_strategy_deposited.setBufferAndRemargin(300_000, {"from": deployer})
     assert test_strategy_deposited.buffer() == 300_000
     assert "Remargined" in tx.events
@@ -392,10 +428,9 @@ def test_loss_remargin_withdraw(
     price = oracle.priceTWAPLong.call()[0]
     whale_buy_short(deployer, token, mcLiquidityPool, price)
 
-    for n in range(20):
-
-        brownie.chain.sleep(28801)
-        test_strategy_deposited.remargin({"from": deployer})
+    ScenarioDriver(vault_deposited, deployer).run(
+        20, [test_strategy_deposited.remargin]
+    )
 
     for n, user in enumerate(users):
 
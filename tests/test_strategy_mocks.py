@@ -0,0 +1,111 @@
+import pytest
+from brownie import chain, network
+from conftest import data
+
+# unitAccumulativeFunding added to the mock pool, paid to the short by the long side
+FUNDING = 2 * 10**17
+
+
+@pytest.fixture(autouse=True)
+def development_only():
+    if network.show_active() != "development":
+        pytest.skip("drives the mock MCDEX pool, oracle and router")
+
+
+def test_harvest_opens_hedged_position(
+    vault_deposited, test_strategy_deposited, mcLiquidityPool, token, long, deployer
+):
+    constant = data()
+    deposited = vault_deposited.totalAssets()
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    contracts = -test_strategy_deposited.getMarginPositions()
+    assert contracts > 0
+    assert contracts == long.balanceOf(test_strategy_deposited)
+    assert token.balanceOf(test_strategy_deposited) == 0
+    assert vault_deposited.totalLent() == deposited
+    # the long is bought with half of what is left after the buffer, at the oracle
+    # price less the pool fee, and the short matches it
+    buffer = deposited * constant.BUFFER // constant.MAX_BPS
+    long_amount = (deposited - buffer) // 2
+    price = int(constant.MOCK_PRICE)
+    swapped = long_amount * (10**6 - 500) // 10**6
+    expected_long = swapped * 10**30 // price
+    assert contracts == expected_long
+    fee = contracts * price // 10**18 * mcLiquidityPool.tradeFeeRate() // 10**18
+    margin = (deposited - long_amount) * int(constant.DECIMAL_SHIFT) - fee
+    assert abs(test_strategy_deposited.getMargin() - margin) <= 1
+    assert tx.events["Harvest"]["perpContracts"] == -contracts
+
+
+def test_harvest_reports_funding(
+    vault_deposited, test_strategy_deposited, mcLiquidityPool, deployer
+):
+    constant = data()
+    test_strategy_deposited.harvest({"from": deployer})
+    contracts = -test_strategy_deposited.getMarginPositions()
+    price_per_share = vault_deposited.pricePerShare()
+    mcLiquidityPool.setUnitAccumulativeFunding(
+        mcLiquidityPool.unitAccumulativeFunding() + FUNDING, {"from": deployer}
+    )
+    chain.sleep(3600)
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    profit = FUNDING * contracts // 10**18 // int(constant.DECIMAL_SHIFT)
+    assert tx.events["StrategyUpdate"]["profitOrLoss"] == profit
+    assert not tx.events["StrategyUpdate"]["isLoss"]
+    assert vault_deposited.pricePerShare() > price_per_share
+
+
+def test_unwind_after_price_move(
+    vault_deposited, test_strategy_deposited, oracle, token, long, deployer
+):
+    constant = data()
+    deposited = vault_deposited.totalAssets()
+    test_strategy_deposited.harvest({"from": deployer})
+    oracle.setPrice(int(constant.MOCK_PRICE) * 9 // 10, {"from": deployer})
+    test_strategy_deposited.unwind({"from": deployer})
+    assert test_strategy_deposited.getMarginPositions() == 0
+    assert long.balanceOf(test_strategy_deposited) == 0
+    # the short gained what the long lost, only the swap and trade fees are paid
+    unwound = token.balanceOf(test_strategy_deposited)
+    assert deposited * 997 // 1000 < unwound <= deposited
+
+
+def test_margin_call_on_price_rise(
+    test_strategy_deposited, mcLiquidityPool, oracle, deployer
+):
+    constant = data()
+    test_strategy_deposited.harvest({"from": deployer})
+    account = mcLiquidityPool.getMarginAccount(0, test_strategy_deposited)
+    assert account["isMaintenanceMarginSafe"]
+    oracle.setPrice(int(constant.MOCK_PRICE) * 3, {"from": deployer})
+    account = mcLiquidityPool.getMarginAccount(0, test_strategy_deposited)
+    assert not account["isMaintenanceMarginSafe"]
+    assert account["isMarginSafe"]
+
+
+def test_withdraw_unwinds_positions(
+    vault_deposited, test_strategy_deposited, token, users, deployer
+):
+    constant = data()
+    test_strategy_deposited.harvest({"from": deployer})
+    user = users[0]
+    balance = token.balanceOf(user)
+    vault_deposited.withdraw(
+        vault_deposited.balanceOf(user), constant.DEPOSIT_AMOUNT, user, {"from": user}
+    )
+    withdrawn = token.balanceOf(user) - balance
+    assert constant.DEPOSIT_AMOUNT * 0.997 < withdrawn <= constant.DEPOSIT_AMOUNT
+
+
+def test_harvest_v2_router(
+    vault_deposited, test_strategy_deposited, router, long, deployer
+):
+    test_strategy_deposited.setVersion(True, {"from": deployer})
+    deposited = vault_deposited.totalAssets()
+    test_strategy_deposited.harvest({"from": deployer})
+    buffer = deposited * data().BUFFER // data().MAX_BPS
+    expected = router.getAmountsOut(
+        (deposited - buffer) // 2, [vault_deposited.want(), long]
+    )[-1]
+    assert long.balanceOf(test_strategy_deposited) == expected
+    assert -test_strategy_deposited.getMarginPositions() == expected
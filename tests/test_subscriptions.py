@@ -0,0 +1,52 @@
+import asyncio
+from brownie import chain, web3
+from scripts.keeper.subscriptions import Subscriber
+
+
+def ws_url():
+    # ganache and anvil serve websockets on the http port
+    return web3.provider.endpoint_uri.replace("http", "ws", 1)
+
+
+def test_subscriber_maps_logs(test_strategy, mcLiquidityPool):
+    subscriber = Subscriber(ws_url(), [test_strategy])
+    assert subscriber.affected({"address": test_strategy.address.lower()}) == {
+        test_strategy.address
+    }
+    assert subscriber.affected({"address": mcLiquidityPool.address}) == {
+        test_strategy.address
+    }
+    assert subscriber.affected({"address": web3.eth.accounts[0]}) == set()
+
+
+def test_subscriber_reports_strategy_events(
+    deployer, test_strategy_deposited, vault_deposited
+):
+    subscriber = Subscriber(ws_url(), [test_strategy_deposited])
+
+    async def scenario():
+        heads = subscriber.heads()
+        # the first head reports every strategy, nothing was watched before
+        block, changed = await asyncio.wait_for(heads.__anext__(), 30)
+        assert changed == {test_strategy_deposited.address}
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            None, lambda: test_strategy_deposited.harvest({"from": deployer})
+        )
+        touched = set()
+        for _ in range(3):
+            chain.mine()
+            _, changed = await asyncio.wait_for(heads.__anext__(), 30)
+            touched |= changed
+        await heads.aclose()
+        return touched
+
+    # the subscription only yields on a new block, mine one so the first head arrives
+    async def with_first_block():
+        task = asyncio.ensure_future(scenario())
+        await asyncio.sleep(1)
+        chain.mine()
+        return await task
+
+    assert asyncio.run(with_first_block()) == {test_strategy_deposited.address}
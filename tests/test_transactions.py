@@ -0,0 +1,153 @@
+import asyncio
+import pytest
+from brownie import accounts, web3
+from scripts.keeper.daemon import Keeper, decide, HARVEST, UNWIND
+from scripts.keeper.transactions import TransactionPipeline
+
+
+def set_automine(enabled):
+    # anvil and hardhat, ganache only knows miner_start / miner_stop
+    response = web3.provider.make_request("evm_setAutomine", [enabled])
+    if "error" in response:
+        web3.provider.make_request("miner_start" if enabled else "miner_stop", [])
+
+
+def mine():
+    web3.provider.make_request("evm_mine", [])
+
+
+@pytest.fixture
+def manual_mining():
+    set_automine(False)
+    yield
+    set_automine(True)
+
+
+@pytest.fixture
+def keeper_account(users):
+    account = accounts.add()
+    users[0].transfer(account, "1 ether")
+    yield account
+
+
+def test_pipeline_keeps_transactions_in_flight(keeper_account, users, manual_mining):
+    pipeline = TransactionPipeline(keeper_account, poll_interval=0.1)
+    nonce = web3.eth.get_transaction_count(keeper_account.address)
+
+    async def scenario():
+        sends = [
+            asyncio.ensure_future(
+                pipeline.send_transaction({"to": users[1].address, "value": 1})
+            )
+            for _ in range(3)
+        ]
+        await asyncio.sleep(1)
+        assert not any(send.done() for send in sends)
+        mine()
+        return await asyncio.gather(*sends)
+
+    receipts = asyncio.run(scenario())
+    assert all(receipt["status"] == 1 for receipt in receipts)
+    nonces = [
+        web3.eth.get_transaction(receipt["transactionHash"])["nonce"]
+        for receipt in receipts
+    ]
+    assert sorted(nonces) == [nonce, nonce + 1, nonce + 2]
+
+
+def test_pipeline_escalates_stuck_transaction(keeper_account, users, manual_mining):
+    gas_price = max(web3.eth.gas_price, 10**9)
+    max_gas_price = int(gas_price * 1.125)
+    pipeline = TransactionPipeline(
+        keeper_account,
+        escalation_interval=0,
+        max_gas_price=max_gas_price,
+        poll_interval=0.1,
+    )
+
+    async def scenario():
+        send = asyncio.ensure_future(
+            pipeline.send_transaction(
+                {"to": users[1].address, "value": 1}, gas_price=gas_price
+            )
+        )
+        await asyncio.sleep(1)
+        assert not send.done()
+        mine()
+        return await send
+
+    receipt = asyncio.run(scenario())
+    assert receipt["status"] == 1
+    tx = web3.eth.get_transaction(receipt["transactionHash"])
+    assert tx["gasPrice"] == max_gas_price
+
+
+def test_pipeline_resyncs_nonce_after_failed_broadcast(keeper_account, users):
+    pipeline = TransactionPipeline(keeper_account, poll_interval=0.1)
+    nonce = web3.eth.get_transaction_count(keeper_account.address)
+    balance = keeper_account.balance()
+
+    with pytest.raises(ValueError):
+        asyncio.run(
+            pipeline.send_transaction({"to": users[1].address, "value": balance})
+        )
+    receipt = asyncio.run(
+        pipeline.send_transaction({"to": users[1].address, "value": 1})
+    )
+    assert web3.eth.get_transaction(receipt["transactionHash"])["nonce"] == nonce
+
+
+def test_pipeline_keeps_nonces_of_pending_transactions(
+    keeper_account, users, manual_mining
+):
+    pipeline = TransactionPipeline(keeper_account, poll_interval=0.1)
+    nonce = web3.eth.get_transaction_count(keeper_account.address)
+    balance = keeper_account.balance()
+
+    async def scenario():
+        first = asyncio.ensure_future(
+            pipeline.send_transaction({"to": users[1].address, "value": 1})
+        )
+        await asyncio.sleep(1)
+        # the failed broadcast does not resync while the first one is pending
+        with pytest.raises(ValueError):
+            await pipeline.send_transaction({"to": users[1].address, "value": balance})
+        second = asyncio.ensure_future(
+            pipeline.send_transaction({"to": users[1].address, "value": 1})
+        )
+        await asyncio.sleep(1)
+        mine()
+        return await asyncio.gather(first, second)
+
+    receipts = asyncio.run(scenario())
+    nonces = [
+        web3.eth.get_transaction(receipt["transactionHash"])["nonce"]
+        for receipt in receipts
+    ]
+    assert nonces == [nonce, nonce + 1]
+
+
+def test_pipeline_wait_times_out(keeper_account, users, manual_mining):
+    pipeline = TransactionPipeline(keeper_account, poll_interval=0.1, max_wait=1)
+    with pytest.raises(TimeoutError):
+        asyncio.run(pipeline.send_transaction({"to": users[1].address, "value": 1}))
+    mine()
+
+
+def test_keeper_with_pipeline(deployer, test_strategy_deposited):
+    keeper = Keeper(
+        deployer,
+        [test_strategy_deposited],
+        pipeline=TransactionPipeline(deployer, poll_interval=0.1),
+    )
+    nonce = web3.eth.get_transaction_count(deployer.address)
+    expected = decide(
+        test_strategy_deposited.getFundingRate(),
+        test_strategy_deposited.isUnwind(),
+        test_strategy_deposited.harvestPreview(),
+    )
+    # funds are waiting in the vault, so either a harvest or an unwind is due
+    assert expected in (HARVEST, UNWIND)
+    assert keeper.run_once() == {test_strategy_deposited.address: expected}
+    assert web3.eth.get_transaction_count(deployer.address) == nonce + 1
+    assert test_strategy_deposited.isUnwind() == (expected == UNWIND)
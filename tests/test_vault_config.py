@@ -71,6 +71,15 @@ def test_vault_set_non_strat_params(BasisVault, deployer, accounts):
     assert tx.events["ProtocolFeesUpdated"]["newManagementFee"] == 1
     assert tx.events["ProtocolFeesUpdated"]["newPerformanceFee"] == 1
 
+    with brownie.reverts():
+        vault.setIdleReserve(1, {"from": accounts[9]})
+    with brownie.reverts("!_idleReserve"):
+        vault.setIdleReserve(10_000, {"from": deployer})
+    tx = vault.setIdleReserve(1_000, {"from": deployer})
+    assert vault.idleReserve() == 1_000
+    assert tx.events["IdleReserveUpdated"]["oldReserve"] == 0
+    assert tx.events["IdleReserveUpdated"]["newReserve"] == 1_000
+
 
 def test_vault_add_strategy(BasisVault, BasisStrategy, deployer, accounts):
     constant = data()
@@ -0,0 +1,141 @@
+import copy
+import pytest
+from brownie import TestVaultStrategy, chain
+from brownie.exceptions import VirtualMachineError
+from brownie.test import strategy
+from tests.fixtures import deploy_vault
+from scripts.utils.vault_model import VaultModel, VaultRevert
+
+# largest deposit and gain of a step, keeps a run within the balance of the users
+MAX_AMOUNT = 10_000 * 10**6
+
+
+class VaultStateMachine:
+    """
+    Runs random deposits, withdrawals, gains and losses against BasisVault and the
+    VaultModel reference and compares shares, assets, fees and expectedLoss after
+    every step. A difference is shrunk by hypothesis to the shortest sequence.
+    """
+
+    user = strategy("uint256", max_value=2)
+    amount = strategy("uint256", max_value=MAX_AMOUNT)
+    # in 1e4 of a balance, above 1e4 asks for more than there is
+    fraction = strategy("uint256", max_value=12_000)
+    duration = strategy("uint256", min_value=1, max_value=30 * 86400)
+
+    def __init__(cls, vault, token, users, deployer):
+        cls.vault = vault
+        cls.token = token
+        cls.users = users
+        cls.deployer = deployer
+        cls.strategy = TestVaultStrategy.deploy(vault, {"from": deployer})
+        vault.setStrategy(cls.strategy, {"from": deployer})
+        vault.setProtocolFees(2000, 200, {"from": deployer})
+        vault.setIdleReserve(1000, {"from": deployer})
+        for user in users:
+            token.approve(vault, 2**256 - 1, {"from": user})
+
+    def setup(self):
+        self.model = VaultModel(
+            performance_fee=self.vault.performanceFee(),
+            management_fee=self.vault.managementFee(),
+            deposit_limit=self.vault.depositLimit(),
+            individual_deposit_limit=self.vault.individualDepositLimit(),
+            idle_reserve=self.vault.idleReserve(),
+            fee_recipient=self.vault.protocolFeeRecipient(),
+            last_update=self.vault.lastUpdate(),
+        )
+
+    def _transact(self, step, transact):
+        # a step that reverts on chain has to raise the same revert in the model
+        try:
+            tx = transact()
+        except VirtualMachineError as exc:
+            with pytest.raises(VaultRevert) as revert:
+                step(copy.deepcopy(self.model), chain.time())
+            if revert.value.reason is not None:
+                assert exc.revert_msg == revert.value.reason
+            return None, None
+        return tx, step(self.model, tx.timestamp)
+
+    def rule_deposit(self, user, amount):
+        user = self.users[user]
+        tx, shares = self._transact(
+            lambda model, _: model.deposit(user.address, amount),
+            lambda: self.vault.deposit(amount, user, {"from": user}),
+        )
+        if tx:
+            assert tx.events["Deposit"]["shares"] == shares
+
+    def rule_withdraw(self, user, fraction, amount):
+        user = self.users[user]
+        shares = self.model.balance_of(user.address) * fraction // 10_000
+        # amount is the max loss
+        tx, withdrawal = self._transact(
+            lambda model, _: model.withdraw(user.address, shares, amount),
+            lambda: self.vault.withdraw(shares, amount, user, {"from": user}),
+        )
+        if tx:
+            assert tx.events["Withdraw"]["withdrawal"] == withdrawal
+
+    def rule_gain(self, amount, duration):
+        chain.sleep(duration)
+        if amount > 0:
+            self.token.transfer(self.strategy, amount, {"from": self.deployer})
+            self.model.strategy_balance += amount
+        self._update(amount, False)
+
+    def rule_loss(self, fraction, duration):
+        chain.sleep(duration)
+        self._update(self.model.total_lent * fraction // 10_000, True)
+
+    def rule_strategy_loss(self, fraction):
+        lost = self.model.strategy_balance * min(fraction, 10_000) // 10_000
+        if lost > 0:
+            self.strategy.lose(lost, {"from": self.deployer})
+            self.model.strategy_balance -= lost
+
+    def _update(self, amount, loss):
+        tx, result = self._transact(
+            lambda model, timestamp: model.update(amount, loss, timestamp),
+            lambda: self.strategy.update(amount, loss, {"from": self.deployer}),
+        )
+        if tx:
+            fee, fee_shares, to_deposit = result
+            if "ProtocolFeesIssued" in tx.events:
+                event = tx.events["ProtocolFeesIssued"]
+                assert (event["wantAmount"], event["sharesIssued"]) == (
+                    fee,
+                    fee_shares,
+                )
+            else:
+                assert fee == 0
+            assert tx.events["StrategyUpdate"]["toDeposit"] == to_deposit
+
+    def invariant_share_math(self):
+        vault, model = self.vault, self.model
+        assert vault.totalSupply() == model.total_supply
+        assert vault.totalAssets() == model.total_assets()
+        assert vault.totalLent() == model.total_lent
+        assert vault.idleBalance() == model.vault_balance
+        assert self.token.balanceOf(self.strategy) == model.strategy_balance
+        assert vault.pricePerShare() == model.price_per_share(vault.decimals())
+        for account in list(self.users) + [model.fee_recipient]:
+            shares = vault.balanceOf(account)
+            assert shares == model.balance_of(str(account))
+            assert vault.expectedLoss(shares) == model.expected_loss(shares)
+        supply = model.total_supply
+        assert vault.expectedLoss(supply) == model.expected_loss(supply)
+
+
+def test_vault_model(state_machine, token, users, deployer):
+    # state_machine replaces the snapshot of isolate_func with its own, so the machine
+    # sets up a vault of its own instead of changing the shared vault setup
+    state_machine(
+        VaultStateMachine,
+        deploy_vault(deployer, token),
+        token,
+        users[:3],
+        deployer,
+        settings={"max_examples": 30, "stateful_step_count": 20},
+    )
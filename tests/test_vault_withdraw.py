@@ -102,3 +102,199 @@ def test_withdraw_failures(vault_deposited, users, token, deployer):
         vault_deposited.withdraw(0, 0, user, {"from": user})
     with brownie.reverts("insufficient balance"):
         vault_deposited.withdraw(constant.DEPOSIT_LIMIT - 1, 0, user, {"from": user})
+
+
+def test_withdraw_queue(
+    vault_deposited, test_strategy_deposited, users, token, deployer
+):
+    constant = data()
+    # the default max loss covers the swap and trade fees of the unwind of the epoch
+    assert (
+        vault_deposited.maxSettlementLoss()
+        == vault_deposited.DEFAULT_MAX_SETTLEMENT_LOSS()
+    )
+    test_strategy_deposited.harvest({"from": deployer})
+    shares = {user: vault_deposited.balanceOf(user) for user in users[:3]}
+    for user in users[:3]:
+        tx = vault_deposited.requestWithdraw(shares[user], {"from": user})
+        assert tx.events["WithdrawRequested"]["shares"] == shares[user]
+        assert tx.events["WithdrawRequested"]["epoch"] == 0
+        assert vault_deposited.balanceOf(user) == 0
+    assert vault_deposited.queuedShares() == sum(shares.values())
+    with brownie.reverts("!settled"):
+        vault_deposited.claim(users[0], {"from": users[0]})
+
+    # one strategy withdrawal settles every request of the epoch
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    assert len(tx.events["WithdrawStrategy"]) == 1
+    settled = tx.events["WithdrawEpochSettled"]
+    assert settled["epoch"] == 0
+    assert settled["shares"] == sum(shares.values())
+    assert vault_deposited.withdrawEpoch() == 1
+    assert vault_deposited.queuedShares() == 0
+    assert vault_deposited.totalClaimable() == settled["amount"]
+    assert token.balanceOf(vault_deposited) >= settled["amount"]
+
+    for user in users[:3]:
+        balance_before = token.balanceOf(user)
+        expected = vault_deposited.claimable(user)
+        assert abs(expected - constant.DEPOSIT_AMOUNT) < constant.DEPOSIT_AMOUNT / 20
+        tx = vault_deposited.claim(user, {"from": user})
+        assert tx.events["WithdrawClaimed"]["amount"] == expected
+        assert token.balanceOf(user) == balance_before + expected
+        with brownie.reverts("!request"):
+            vault_deposited.claim(user, {"from": user})
+    assert vault_deposited.totalClaimable() < len(users)
+
+
+def test_withdraw_queue_max_loss(
+    vault_deposited, test_strategy_deposited, users, deployer
+):
+    with brownie.reverts():
+        vault_deposited.setMaxSettlementLoss(500, {"from": users[0]})
+    with brownie.reverts("!_maxSettlementLoss"):
+        vault_deposited.setMaxSettlementLoss(10_001, {"from": deployer})
+    tx = vault_deposited.setMaxSettlementLoss(0, {"from": deployer})
+    assert tx.events["MaxLossUpdated"]["maxLoss"] == 0
+    test_strategy_deposited.harvest({"from": deployer})
+    user = users[0]
+    vault_deposited.requestWithdraw(vault_deposited.balanceOf(user), {"from": user})
+    queued = vault_deposited.queuedShares()
+    # the fees of the unwind are not settled onto the queue without a max loss, the
+    # harvest goes through and the epoch stays open
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    assert "WithdrawEpochSettled" not in tx.events
+    deferred = tx.events["WithdrawEpochDeferred"]
+    assert deferred["epoch"] == 0
+    assert deferred["available"] < deferred["amount"]
+    assert vault_deposited.withdrawEpoch() == 0
+    assert vault_deposited.queuedShares() == queued
+    # the withdrawn want stays idle for the epoch
+    assert vault_deposited.availableToDeposit() == 0
+    vault_deposited.setMaxSettlementLoss(500, {"from": deployer})
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    assert tx.events["WithdrawEpochSettled"]["amount"] > 0
+    assert vault_deposited.withdrawEpoch() == 1
+
+
+def test_withdraw_queue_cancel(vault_deposited, users):
+    user = users[0]
+    shares = vault_deposited.balanceOf(user)
+    vault_deposited.requestWithdraw(shares // 2, {"from": user})
+    vault_deposited.requestWithdraw(shares - shares // 2, {"from": user})
+    assert vault_deposited.withdrawRequests(user)["shares"] == shares
+    tx = vault_deposited.cancelWithdraw({"from": user})
+    assert tx.events["WithdrawCancelled"]["shares"] == shares
+    assert vault_deposited.balanceOf(user) == shares
+    assert vault_deposited.queuedShares() == 0
+    with brownie.reverts("!request"):
+        vault_deposited.cancelWithdraw({"from": user})
+    with brownie.reverts("!_shares"):
+        vault_deposited.requestWithdraw(0, {"from": user})
+    with brownie.reverts("insufficient balance"):
+        vault_deposited.requestWithdraw(shares + 1, {"from": user})
+
+
+def test_withdraw_queue_excluded_from_assets(
+    vault_deposited, test_strategy_deposited, users, token, deployer
+):
+    user = users[0]
+    shares = vault_deposited.balanceOf(user)
+    vault_deposited.requestWithdraw(shares // 2, {"from": user})
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    claimable = tx.events["WithdrawEpochSettled"]["amount"]
+    # the settled payout stays in the vault but is neither lent nor part of the assets
+    assert vault_deposited.idleBalance() == token.balanceOf(vault_deposited) - claimable
+    assert vault_deposited.totalAssets() == vault_deposited.totalLent()
+    with brownie.reverts("unclaimed withdrawal"):
+        vault_deposited.requestWithdraw(shares // 2, {"from": user})
+    vault_deposited.claim(user, {"from": user})
+    vault_deposited.requestWithdraw(shares // 2, {"from": user})
+    assert vault_deposited.withdrawRequests(user)["epoch"] == 1
+
+
+def test_withdraw_queue_nets_deposits(
+    vault_deposited, test_strategy_deposited, users, token, deployer
+):
+    constant = data()
+    test_strategy_deposited.harvest({"from": deployer})
+    token.approve(vault_deposited, constant.DEPOSIT_AMOUNT * 2, {"from": deployer})
+    vault_deposited.deposit(constant.DEPOSIT_AMOUNT * 2, deployer, {"from": deployer})
+    user = users[0]
+    vault_deposited.requestWithdraw(vault_deposited.balanceOf(user), {"from": user})
+    inflow, outflow = vault_deposited.pendingFlows()
+    assert inflow == constant.DEPOSIT_AMOUNT * 2
+    assert outflow < inflow
+
+    # the withdrawal is paid from the new deposit, only the difference is traded
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    assert "WithdrawStrategy" not in tx.events
+    settled = tx.events["WithdrawEpochSettled"]
+    assert settled["netted"] == settled["amount"]
+    assert tx.events["StrategyUpdate"]["toDeposit"] == inflow - settled["amount"]
+
+
+def test_idle_reserve(vault_deposited, test_strategy_deposited, users, token, deployer):
+    vault_deposited.setIdleReserve(1_000, {"from": deployer})
+    test_strategy_deposited.harvest({"from": deployer})
+    reserve = vault_deposited.totalAssets() // 10
+    assert abs(token.balanceOf(vault_deposited) - reserve) <= 1
+
+    # a withdrawal inside the reserve is a single transfer
+    user = users[0]
+    shares = vault_deposited.balanceOf(user) // 2
+    assert vault_deposited.calcWithdrawIssuable(shares) < reserve
+    tx = vault_deposited.withdraw(shares, 0, user, {"from": user})
+    assert "WithdrawStrategy" not in tx.events
+
+    # the next harvest tops the reserve up again
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    assert "WithdrawStrategy" in tx.events
+    reserve = vault_deposited.totalAssets() // 10
+    assert abs(token.balanceOf(vault_deposited) - reserve) < reserve / 100
+
+
+def test_idle_reserve_band(
+    vault_deposited, test_strategy_deposited, users, token, deployer
+):
+    vault_deposited.setIdleReserve(1_000, {"from": deployer})
+    test_strategy_deposited.harvest({"from": deployer})
+    reserve = vault_deposited.totalAssets() // 10
+
+    # a shortfall inside the band is left to later deposits
+    user = users[0]
+    shares = vault_deposited.balanceOf(user) // 20
+    withdrawn = vault_deposited.calcWithdrawIssuable(shares)
+    assert withdrawn * vault_deposited.MAX_BPS() < (
+        reserve * vault_deposited.RESERVE_BAND()
+    )
+    vault_deposited.withdraw(shares, 0, user, {"from": user})
+    tx = test_strategy_deposited.harvest({"from": deployer})
+    assert "WithdrawStrategy" not in tx.events
+    assert tx.events["StrategyUpdate"]["toDeposit"] == 0
+
+
+def test_withdraw_from_buffer(
+    vault_deposited, test_strategy_deposited, users, token, long, deployer
+):
+    test_strategy_deposited.harvest({"from": deployer})
+    user = users[0]
+    shares = vault_deposited.balanceOf(user) // 100
+    long_before = long.balanceOf(test_strategy_deposited)
+
+    # disabled by default, every withdrawal trades
+    tx = vault_deposited.withdraw(shares, 0, user, {"from": user})
+    assert long.balanceOf(test_strategy_deposited) < long_before
+
+    test_strategy_deposited.setMinMarginRatio(1.01e18, {"from": deployer})
+    long_before = long.balanceOf(test_strategy_deposited)
+    positions_before = test_strategy_deposited.getMarginPositions()
+    margin_before = test_strategy_deposited.getMargin()
+    tx = vault_deposited.withdraw(shares, 0, user, {"from": user})
+    withdrawn = tx.events["WithdrawStrategy"]["amountWithdrawn"]
+    assert long.balanceOf(test_strategy_deposited) == long_before
+    assert test_strategy_deposited.getMarginPositions() == positions_before
+    # the margin only moves by the withdrawal and the funding accrued meanwhile
+    margin_change = margin_before - test_strategy_deposited.getMargin()
+    expected_change = withdrawn * test_strategy_deposited.DECIMAL_SHIFT()
+    assert abs(margin_change - expected_change) < expected_change / 100
@@ -27,3 +27,9 @@ USDC_WHALE = "0x905dfcd5649217c42684f23958568e533c711aa3"
 USDC_PROXY = "0x1eFB3f88Bc88f03FD1804A5C53b7141bbEf5dED8"
 MCDEX_ORACLE = "0x1cf22b7f84f86c36cb191bb24993eda2b191399e"
 RANDOM = "0x6B69fB91E91C6C43FaD962B9BD9636c2C95de748"
+
+# development network mocks
+MOCK_PRICE = 2_000e18
+MOCK_FUNDING = 1e18
+MOCK_LIQUIDITY = 1_000_000_000e6
+MOCK_LONG_LIQUIDITY = 1_000_000e18
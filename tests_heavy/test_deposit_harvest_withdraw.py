@@ -4,6 +4,7 @@ import constants_bsc
 import random
 from brownie import network
 from conftest import data
+from scripts.utils.scenario import ScenarioDriver
 
 
 def test_deposit_harvest_deposit_harvest_withdraw(
@@ -33,32 +34,29 @@ def test_deposit_harvest_deposit_harvest_withdraw(
 
     test_strategy.harvest({"from": deployer})
 
-    for n in range(100):
-        brownie.chain.sleep(28801)
-        test_strategy.harvest({"from": deployer})
+    driver = ScenarioDriver(vault, deployer)
+    driver.run(100, [test_strategy.harvest])
 
     vault.deposit(token.balanceOf(user_2), user_2, {"from": user_2})
 
-    for n in range(100):
-        brownie.chain.sleep(28801)
-        test_strategy.remargin({"from": deployer})
-        print(test_strategy.getMarginAccount())
+    scenario = driver.run(100, [test_strategy.remargin])
+    assert all(scenario.series("margin_account.is_margin_safe"))
 
     lossExpected = [vault.expectedLoss(amount_1), vault.expectedLoss(amount_2)]
 
     for n, user in enumerate(user_l):
         vault.withdraw(amounts[n], lossExpected[n], user, {"from": user})
 
-    for n in range(100):
-        brownie.chain.sleep(28801)
-        test_strategy.harvest({"from": deployer})
-        print("Margin account: " + str(test_strategy.getMarginAccount()))
-        print("Long strategy balance: " + str(long.balanceOf(test_strategy)))
-        print("Total lent: " + str(vault.totalLent()))
-        print("Total supply: " + str(vault.totalSupply()))
-        print("Strategy want balance: " + str(token.balanceOf(test_strategy)))
-        print("Vault want balance: " + str(token.balanceOf(vault)))
-        print("Price per share: " + str(vault.pricePerShare()))
+    scenario = driver.run(100, [test_strategy.harvest])
+    assert all(scenario.series("margin_account.is_margin_safe"))
+    price_per_share = scenario.series("price_per_share")
+    assert len(price_per_share) == 100
+    assert all(price > 0 for price in price_per_share)
+    # the strategy stays short while it harvests
+    assert all(c < 0 for c in scenario.series("positions.perp_contracts"))
+    # the last period is the state the vault reports after the run
+    assert price_per_share[-1] == vault.pricePerShare()
+    assert scenario.series("total_lent")[-1] == vault.totalLent()
     bal_bef = token.balanceOf(user_2)
     print(vault.balanceOf(user_2))
     lossExpected2 = vault.expectedLoss(vault.balanceOf(user_2))